@@ -1,6 +1,27 @@
 import os
+import re
+import json
+import time
+import asyncio
+import inspect
+import functools
+import contextvars
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import google.generativeai as genai
+from google.generativeai import protos
+from google.generativeai.types import content_types
 from dotenv import load_dotenv
+from app.utils.content_cache import content_cache, content_hash
+from app.utils.doc_parser import extract_pdf_pages, build_pdf_subset, has_text_layer, pdf_page_count, split_pdf, PAGE_BREAK
+from app.utils.context_window import ContextWindow
+from app.utils.retrieval import estimate_tokens
+from app.utils.model_dispatcher import model_dispatcher, ModelUnavailableError
+from app.utils.timing import span
+from app.utils.metrics import TOOL_ERRORS, FAST_PATH_TURNS
+from app.utils.intent_router import route, render
+from app.utils.response_cache import tokenize, shingles
+from app.utils.clause_scanner import scan_pages, clause_weight
 
 # --- Import Tools ---
 from app.tools.loan_math import banking_tools 
@@ -14,19 +35,103 @@ load_dotenv()
 
 # --- Combine ALL tools into one global list ---
 all_tools = banking_tools + investment_tools + eligibility_tools + bank_data_tools + kyc_tools + application_tools
+TOOL_REGISTRY = {fn.__name__: fn for fn in all_tools}
 
-class FinancialAgent:
-    def __init__(self):
-        # 1. Load API Key
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            raise ValueError("GEMINI_API_KEY missing in .env file")
+# Content-cache namespaces (bump the version when a prompt changes)
+OCR_CACHE_NS = "ocr-v2"
+AUDIT_CACHE_NS = "audit-v2"
+AUDIT_BATCH_CACHE_NS = "audit-batch-v1"
 
-        # 2. Configure Gemini
-        genai.configure(api_key=self.api_key)
+OCR_PROMPT = """
+            SYSTEM: OCR & DOCUMENT PARSER.
+            TASK: Read this document and output its COMPLETE raw text content.
+            - Preserve numbers, tables, and legal text exactly.
+            - Do not summarize.
+            """
+
+# Used when only some pages of a PDF are sent, so the output can be put back in place
+PAGED_OCR_PROMPT = OCR_PROMPT + """- Start every page with a line `=== PAGE n ===` (n = page number within this file, starting at 1).
+            """
+_PAGE_MARKER = re.compile(r"^\s*=== PAGE (\d+) ===\s*$", re.MULTILINE)
+
+SUMMARY_PROMPT = """
+            SYSTEM: CONVERSATION SUMMARIZER for the FinBot banking team.
+            TASK: Update the running summary of this customer conversation with the new messages.
+            - Keep every fact needed to continue: the user's name, loan type and amount, salary, existing EMIs,
+              tenure, rates quoted, documents discussed, decisions made, pending steps, and which officer is handling the user.
+            - Drop greetings and small talk.
+            - Under 200 words, plain bullet points.
+            """
+
+AUDIT_PROMPT = """
+            ACT AS: Senior Legal Risk Analyst.
+            TASK: Audit this uploaded document (PDF/Image).
+            
+            EXTRACT AND ANALYZE:
+            1. Document Type (Loan Agreement, Bank Statement, etc).
+            2. Critical Numbers: Interest Rates, Penalties, Dates.
+            3. RISK ASSESSMENT:
+               - Look for "Hidden Fees" or "Processing Charges".
+               - Look for "Floating/Variable Interest" clauses.
+               - Look for strict "Foreclosure/Default" conditions.
+            
+            OUTPUT:
+            Return a JSON-like text summary with keys: "doc_type", "risk_level" (Low/Med/High), "summary", "flagged_clauses".
+            """
 
-        # 3. Define the Master Persona (System Instructions)
-        self.system_instruction = """
+# Map step of the batched audit: one page range per call, findings back as strict JSON
+BATCH_AUDIT_PROMPT = AUDIT_PROMPT + """
+            This file holds pages {first}-{last} of a {total}-page document (its page 1 is page {first}).
+            Audit only these pages. Return ONLY a JSON object with those keys. "flagged_clauses" is a list of strings,
+            each quoting or paraphrasing one risky clause and ending with its page number in the full document as "(page n)".
+            """
+
+# Pre-screened audit (PDFs with a text layer on every page): the local clause scanner finds the
+# risky passages and only those, plus the opening text for doc type / summary, go to the model
+PRESCREEN_AUDIT_PROMPT = AUDIT_PROMPT + """
+            You get the document's opening text and the passages a keyword pre-screen flagged, each tagged [page n].
+            Judge and explain each flagged passage; leave out ones that are harmless in context.
+            Return ONLY a JSON object with those keys. "flagged_clauses" is a list of strings, each naming the clause,
+            explaining the risk to the borrower and ending with its page number as "(page n)".
+            """
+AUDIT_PRESCREEN = os.getenv("AUDIT_PRESCREEN", "1") != "0"
+AUDIT_MAX_PASSAGES = int(os.getenv("AUDIT_MAX_PASSAGES", "60"))  # highest-weighted first
+AUDIT_OPENING_CHARS = 3000
+
+# Long PDFs are audited in page batches: at most AUDIT_BATCH_PAGES per call (request size), at least
+# AUDIT_MIN_BATCH_PAGES (smaller isn't worth a call), up to AUDIT_MAX_PARALLEL batches at once per document
+AUDIT_BATCH_PAGES = int(os.getenv("AUDIT_BATCH_PAGES", "20"))
+AUDIT_MIN_BATCH_PAGES = int(os.getenv("AUDIT_MIN_BATCH_PAGES", "5"))
+AUDIT_MAX_PARALLEL = int(os.getenv("AUDIT_MAX_PARALLEL", "6"))
+
+# Audit risk levels, lowest first; flagged clauses this similar (shingle Jaccard) are merged
+RISK_LEVELS = ("Low", "Med", "High")
+CLAUSE_DUPLICATE_THRESHOLD = 0.8
+_PAGE_REF = re.compile(r"\(?\bpages?\s*\d+(?:\s*[-–]\s*\d+)?\)?", re.IGNORECASE)
+
+# Safety valve for the manual function-calling loop
+MAX_TOOL_ROUNDS = 8
+
+# Map Function Name -> (Agent Persona, Status Message) for the UI
+TOOL_PERSONAS = {
+    'submit_kyc_application': ("KYC Verification Agent", "Validating Identity Documents..."),
+    'calculate_loan_emi': ("Loan Calculator Agent", "Executing EMI formulas..."),
+    'calculate_emi_sweep': ("Loan Calculator Agent", "Building EMI comparison table..."),
+    'generate_amortization_schedule': ("Loan Calculator Agent", "Generating repayment schedule..."),
+    'check_loan_eligibility': ("Underwriting Agent", "Checking Salary vs. Debt Ratio..."),
+    'find_max_eligible_loan': ("Underwriting Agent", "Solving Maximum Eligible Loan Across Banks..."),
+    'query_best_loan_offers': ("Market Research Agent", "Querying Bank Rates Database..."),
+    'calculate_emi': ("Raj (Loan Advisor)", "Analyzing finances..."),
+    'get_interest_rates': ("Raj (Loan Advisor)", "Analyzing finances..."),
+    'calculate_sip': ("Raj (Loan Advisor)", "Projecting returns..."),
+    'calculate_fd': ("Raj (Loan Advisor)", "Projecting returns..."),
+    'update_application': ("Eva/Raj", "Processing Application..."),
+    'verify_pan': ("Sam (Verification)", "Verifying documents..."),
+    'check_bank_health': ("Risk & Audit Agent", "Scanning Solvency & NPA Reports..."),
+}
+
+# Master Persona (System Instructions)
+SYSTEM_INSTRUCTION = """
         You are the **FinBot Virtual Banking Team**. You are not a single AI, but a coordinated team of specialists working in a real physical bank simulation.
 
         **YOUR TEAM & ROLES:**
@@ -67,21 +172,54 @@ class FinancialAgent:
         - Only ask for documents that are missing.
         """
 
+
+@functools.lru_cache(maxsize=None)
+def tool_library():
+    """
+    Gemini function declarations (and callables) for all tools.
+    Built once per process, or once in a preloading server's master and shared by its workers.
+    """
+    return content_types.FunctionLibrary(all_tools)
+
+
+@functools.lru_cache(maxsize=None)
+def fixed_prompt_tokens() -> int:
+    """Tokens sent on every turn: system instruction + tool declarations."""
+    tool_tokens = sum(estimate_tokens(fn.__name__ + str(inspect.signature(fn)) + (fn.__doc__ or "")) for fn in all_tools)
+    return estimate_tokens(SYSTEM_INSTRUCTION) + tool_tokens
+
+
+class FinancialAgent:
+    def __init__(self):
+        # 1. Load API Key
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            raise ValueError("GEMINI_API_KEY missing in .env file")
+
+        # 2. Configure Gemini
+        genai.configure(api_key=self.api_key)
+
+        # 3. Master Persona (System Instructions)
+        self.system_instruction = SYSTEM_INSTRUCTION
+
         # 4. Initialize Model with all tools
         self.model = genai.GenerativeModel(
             model_name='gemini-flash-latest', 
-            tools=all_tools,
+            tools=tool_library(),
             system_instruction=self.system_instruction
         )
 
+        # 5. Tool-less model for folding old turns into the rolling summary
+        self.summary_model = genai.GenerativeModel(model_name='gemini-flash-latest')
+
+        # 6. Token budget: system instruction + tool declarations are sent on every turn
+        self.context_window = ContextWindow(fixed_tokens=fixed_prompt_tokens())
+
     def _detect_agent_activity(self, chat_session):
         """
         Inspects the chat history to see which tool was called.
         Returns the 'Agent Name' and a 'Status Message' for the UI.
         """
-        agent_name = "General Banking Agent"
-        process_log = "Answering from general knowledge..."
-
         try:
             # Look at the last few messages for function calls
             recent_history = chat_session.history[-5:] 
@@ -89,83 +227,116 @@ class FinancialAgent:
             for part in recent_history:
                 if hasattr(part, 'parts'):
                     for p in part.parts:
-                        if p.function_call:
-                            fname = p.function_call.name
-                            
-                            # Map Function Name -> Agent Persona
-                            if fname == 'submit_kyc_application':
-                                return "KYC Verification Agent", "Validating Identity Documents..."
-                            
-                            elif fname == 'calculate_loan_emi':
-                                return "Loan Calculator Agent", "Executing EMI formulas..."
-                            
-                            elif fname == 'check_loan_eligibility':
-                                return "Underwriting Agent", "Checking Salary vs. Debt Ratio..."
-                            
-                            elif fname == 'query_best_loan_offers':
-                                return "Market Research Agent", "Querying Bank Rates Database..."
-                            if fname in ['calculate_emi', 'get_interest_rates', 'check_loan_eligibility']:
-                                return "Raj (Loan Advisor)", "Analyzing finances..."
-                            
-                            elif fname in ['calculate_sip', 'calculate_fd']:
-                                return "Raj (Loan Advisor)", "Projecting returns..."
-                            
-                            elif fname == 'update_application':
-                                return "Eva/Raj", "Processing Application..."
-
-                            elif fname in ['submit_kyc_application', 'verify_pan']:
-                                return "Sam (Verification)", "Verifying documents..."
-                            
-                            elif fname == 'check_bank_health':
-                                return "Risk & Audit Agent", "Scanning Solvency & NPA Reports..."
-                            
-                            elif fname in ['calculate_sip', 'calculate_fd']:
-                                return "Investment Advisor Agent", "Projecting Future Returns..."
-                            
-                            elif fname == 'update_application':
-                                return "Application Manager", "Updating your application record..."
+                        if p.function_call and p.function_call.name in TOOL_PERSONAS:
+                            return TOOL_PERSONAS[p.function_call.name]
                                 
         except Exception:
             pass
             
         return "FinBot Team", "Processing..."
 
-    def get_response(self, user_text: str, history: list = None, context_data: dict = None):
+    def _build_input(self, user_text: str, context_data: dict = None) -> str:
         """
-        Main chat method.
-        Returns: (Response Text, Agent Name, Process Log)
+        Combines the user's profile/document context with the query (Hidden System Context).
         """
-        try:
-            # 0. Construct Context String
-            context_str = ""
-            if context_data:
-                profile = context_data.get("profile", {})
-                docs = context_data.get("documents", [])
-                
-                # Format Profile
-                if profile:
-                    context_str += f"[USER PROFILE]\nName: {profile.get('displayName', 'Unknown')}\nUID: {profile.get('uid')}\nEmail: {profile.get('email')}\n\n"
-                
-                # Format Documents
-                if docs:
-                    doc_summaries = []
-                    for d in docs:
-                        doc_summaries.append(f"- {d.get('name')} (Type: {d.get('mimeType')}, Uploaded: {d.get('uploadedAt')})\n  Preview: {d.get('summary')}")
-                    
-                    context_str += "[UPLOADED DOCUMENTS HISTORY]\n" + "\n".join(doc_summaries) + "\n\n"
+        context_str = ""
+        if context_data:
+            profile = context_data.get("profile", {})
+            docs = context_data.get("documents", [])
+            
+            # Format Profile
+            if profile:
+                context_str += f"[USER PROFILE]\nName: {profile.get('displayName', 'Unknown')}\nUID: {profile.get('uid')}\nEmail: {profile.get('email')}\n\n"
+
+            # Format Rolling Summary (turns older than the verbatim history)
+            if context_data.get("summary"):
+                context_str += f"[EARLIER CONVERSATION SUMMARY]\n{context_data['summary']}\n\n"
             
-            # Combine Context + User Input (Hidden System Context)
-            final_input = ""
-            if context_str:
-                final_input = f"""
+            # Format Documents
+            if docs:
+                doc_summaries = []
+                for d in docs:
+                    doc_summaries.append(f"- {d.get('name')} (Type: {d.get('mimeType')}, Uploaded: {d.get('uploadedAt')})\n  Preview: {d.get('summary')}")
+                
+                context_str += "[UPLOADED DOCUMENTS HISTORY]\n" + "\n".join(doc_summaries) + "\n\n"
+
+            # Format Retrieved Passages (top-k chunks for this query, already within the token budget)
+            passages = context_data.get("passages", [])
+            if passages:
+                excerpts = [f"(From {p.get('name')}, page {p.get('page')})\n{p.get('text')}" for p in passages]
+                context_str += "[RELEVANT DOCUMENT EXCERPTS]\n" + "\n---\n".join(excerpts) + "\n\n"
+        
+        if not context_str:
+            return user_text
+
+        return f"""
                 SYSTEM_CONTEXT:
                 {context_str}
                 
                 USER_QUERY:
                 {user_text}
                 """
-            else:
-                final_input = user_text
+
+    def fit_context(self, user_text: str, session: dict, context_data: dict):
+        """
+        Trims the turn to the configured token budget.
+        `session` is {"messages", "summary", "summarizedThrough"}; `messages` are the un-summarized ones.
+        Returns (user_text, gemini_history, context_data).
+        """
+        return self.context_window.fit(user_text, session, context_data, render=self._build_input)
+
+    async def summarize_conversation(self, previous_summary: str, messages: list) -> str:
+        """
+        Folds `messages` into the running summary (incremental: the old summary is the starting point).
+        """
+        transcript = "\n".join(
+            f"{'USER' if m['role'] == 'user' else 'FINBOT'}: {m['content']}" for m in messages
+        )
+        prompt = f"{SUMMARY_PROMPT}\nCURRENT SUMMARY:\n{previous_summary or '(none)'}\n\nNEW MESSAGES:\n{transcript}"
+        response = await model_dispatcher.acall("summary", self.summary_model.generate_content_async, prompt)
+        return response.text.strip()
+
+    def fast_path(self, user_text: str):
+        """
+        Answers a bare EMI / SIP calculation without the model: the router parses the
+        message, the tool runs directly and the reply is templated.
+        Returns the turn's events (same shapes as `stream_response`), or None when the
+        message isn't an unambiguous calculation.
+        """
+        routed = route(user_text)
+        if routed is None:
+            return None
+        tool, args = routed
+        agent_name, log = TOOL_PERSONAS[tool]
+
+        started = time.perf_counter()
+        result = self._execute_tool(tool, args)
+        if "error" in result:
+            # Let the model explain what's wrong with the inputs
+            return None
+        duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        reply = render(tool, args, result)
+        FAST_PATH_TURNS.inc(tool=tool)
+
+        return [
+            {"event": "tool_start", "name": tool, "args": args, "agent": agent_name, "log": log},
+            {"event": "tool_end", "name": tool, "duration_ms": duration_ms, "ok": True},
+            {"event": "token", "text": reply},
+            {"event": "done", "response": reply, "agent_used": agent_name, "process_log": log, "tools": [tool]},
+        ]
+
+    def get_response(self, user_text: str, history: list = None, context_data: dict = None):
+        """
+        Main chat method.
+        Returns: (Response Text, Agent Name, Process Log)
+        """
+        try:
+            events = self.fast_path(user_text)
+            if events is not None:
+                done = events[-1]
+                return done["response"], done["agent_used"], done["process_log"]
+
+            final_input = self._build_input(user_text, context_data)
 
             # Start chat with provided history
             chat = self.model.start_chat(
@@ -174,7 +345,7 @@ class FinancialAgent:
             )
             
             # 1. Send Message
-            response = chat.send_message(final_input)
+            response = model_dispatcher.call("chat", chat.send_message, final_input)
             
             # 2. Detect which agent worked
             agent_name, log = self._detect_agent_activity(chat)
@@ -184,46 +355,394 @@ class FinancialAgent:
         except Exception as e:
             return f"System Error: {str(e)}", "Error Handler", "Failed to process request"
 
-    def analyze_document(self, file_bytes: bytes, mime_type: str):
+    def _execute_tool(self, name: str, args: dict) -> dict:
+        """
+        Runs one tool requested by the model. Called from a worker thread.
+        Mirrors the SDK's wrapping: non-dict results are returned as {"result": ...}.
+        """
+        fn = TOOL_REGISTRY.get(name)
+        if fn is None:
+            return {"error": f"Unknown tool: {name}"}
+        with span("tool", name):
+            try:
+                result = fn(**args)
+            except Exception as e:
+                result = {"error": str(e)}
+        if not isinstance(result, dict):
+            result = {"result": result}
+        if "error" in result:
+            TOOL_ERRORS.inc(tool=name)
+        return result
+
+    async def stream_response(self, user_text: str, history: list = None, context_data: dict = None, stream: bool = True):
+        """
+        Runs one chat turn, yielding events as they happen:
+          {"event": "token", "text": ...}
+          {"event": "tool_start", "name": ..., "args": ..., "agent": ..., "log": ...}
+          {"event": "tool_end", "name": ..., "duration_ms": ..., "ok": ...}
+          {"event": "done", "response": ..., "agent_used": ..., "process_log": ..., "tools": [...]}
+        The SDK cannot combine `stream=True` with automatic function calling,
+        so function calls are executed here (in worker threads) and sent back manually.
+        The conversation is kept as a plain contents list (rather than a ChatSession) so a
+        rate-limited round can be retried by the dispatcher without corrupting history.
+        """
+        final_input = self._build_input(user_text, context_data)
+        contents = list(history or []) + [{"role": "user", "parts": [final_input]}]
+
+        reply_parts = []
+        tools_called = []
+        agent_name, log = "FinBot Team", "Processing..."
+
+        for round_number in range(1, MAX_TOOL_ROUNDS + 1):
+            function_calls = []
+            model_parts = []
+            with span("model", str(round_number)):
+                if stream:
+                    chunks = model_dispatcher.astream("chat", self.model.generate_content_async, contents)
+                else:
+                    chunks = _single(await model_dispatcher.acall("chat", self.model.generate_content_async, contents))
+
+                async for chunk in chunks:
+                    parts = chunk.candidates[0].content.parts if chunk.candidates else []
+                    for part in parts:
+                        model_parts.append(part)
+                        if "function_call" in part:
+                            function_calls.append(part.function_call)
+                        elif part.text:
+                            reply_parts.append(part.text)
+                            yield {"event": "token", "text": part.text}
+
+            if not function_calls:
+                break
+            contents.append(protos.Content(role="model", parts=model_parts))
+
+            response_parts = []
+            for fc in function_calls:
+                args = type(fc).to_dict(fc).get("args", {})
+                if not tools_called and fc.name in TOOL_PERSONAS:
+                    agent_name, log = TOOL_PERSONAS[fc.name]
+                tools_called.append(fc.name)
+
+                yield {"event": "tool_start", "name": fc.name, "args": args, "agent": agent_name, "log": log}
+                started = time.perf_counter()
+                result = await asyncio.to_thread(self._execute_tool, fc.name, args)
+                yield {
+                    "event": "tool_end",
+                    "name": fc.name,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "ok": "error" not in result
+                }
+
+                response_parts.append(protos.Part(
+                    function_response=protos.FunctionResponse(name=fc.name, response=result)
+                ))
+
+            contents.append(protos.Content(role="user", parts=response_parts))
+
+        yield {
+            "event": "done",
+            "response": "".join(reply_parts),
+            "agent_used": agent_name,
+            "process_log": log,
+            "tools": tools_called
+        }
+
+    async def get_response_async(self, user_text: str, history: list = None, context_data: dict = None):
+        """
+        Async variant of `get_response` used by the API.
+        The model round trips are awaited on the event loop instead of occupying a threadpool worker.
+        Returns: (Response Text, Agent Name, Process Log, Tools Called)
+        """
+        try:
+            async for event in self.stream_response(user_text, history, context_data, stream=False):
+                if event["event"] == "done":
+                    return event["response"], event["agent_used"], event["process_log"], event["tools"]
+
+        except ModelUnavailableError:
+            # Let the API answer 503 + Retry-After instead of a 200 with an error string
+            raise
+        except Exception as e:
+            return f"System Error: {str(e)}", "Error Handler", "Failed to process request", []
+
+    def analyze_document(self, file_bytes: bytes, mime_type: str, digest: str = None, progress=None):
         """
         Uses Gemini Vision to audit a document for risks.
+        PDFs with a text layer are pre-screened locally and only the flagged passages go to the model;
+        other long PDFs are audited in page batches concurrently and the findings merged (same keys).
+        Results are cached by content hash, so re-auditing the same file skips the model.
         """
         try:
-            prompt = """
-            ACT AS: Senior Legal Risk Analyst.
-            TASK: Audit this uploaded document (PDF/Image).
-            
-            EXTRACT AND ANALYZE:
-            1. Document Type (Loan Agreement, Bank Statement, etc).
-            2. Critical Numbers: Interest Rates, Penalties, Dates.
-            3. RISK ASSESSMENT:
-               - Look for "Hidden Fees" or "Processing Charges".
-               - Look for "Floating/Variable Interest" clauses.
-               - Look for strict "Foreclosure/Default" conditions.
-            
-            OUTPUT:
-            Return a JSON-like text summary with keys: "doc_type", "risk_level" (Low/Med/High), "summary", "flagged_clauses".
-            """
-            
-            content = [prompt, {"mime_type": mime_type, "data": file_bytes}]
-            response = self.model.generate_content(content)
-            return response.text
+            digest = digest or content_hash(file_bytes)
+            cached = content_cache.get(AUDIT_CACHE_NS, digest)
+            if cached is not None:
+                return cached
+
+            pages, ranges = None, []
+            if mime_type == "application/pdf":
+                try:
+                    if AUDIT_PRESCREEN:
+                        pages = extract_pdf_pages(file_bytes)
+                        page_count = len(pages)
+                    else:
+                        page_count = pdf_page_count(file_bytes)
+                    ranges = _audit_ranges(page_count)
+                except Exception as e:
+                    print(f"PDF unreadable, auditing it in one call: {e}")
+
+            complete = True
+            if pages and all(has_text_layer(page) for page in pages):
+                text = self._audit_prescreened(pages, progress)
+            elif len(ranges) > 1:
+                text, complete = self._audit_batched(file_bytes, digest, ranges, page_count, progress)
+            else:
+                content = [AUDIT_PROMPT, {"mime_type": mime_type, "data": file_bytes}]
+                text = model_dispatcher.call("audit", self.model.generate_content, content).text
+            # A partial audit isn't cached whole: the next upload redoes the failed batches (the rest are cached)
+            if complete:
+                content_cache.set(AUDIT_CACHE_NS, digest, text)
+            return text
+        except ModelUnavailableError:
+            raise
         except Exception as e:
             return f"Vision Analysis Error: {str(e)}"
 
-    def extract_content_from_file(self, file_bytes: bytes, mime_type: str) -> str:
+    def _audit_prescreened(self, pages: list, progress=None) -> str:
+        """
+        The clause scanner flags risky passages in the extracted text (milliseconds); one small
+        model call then explains them. Scanned passages fill in if the model's reply isn't JSON.
+        """
+        if progress:
+            progress("Pre-screening clauses...")
+        with span("clause_scan"):
+            scan = scan_pages(pages)
+        clauses = scan["clauses"]
+
+        # Boilerplate often repeats on many pages: each distinct passage is sent once, with all its pages
+        distinct = {}
+        for clause in sorted(clauses, key=lambda c: (-clause_weight(c), c["page"], c["offset"])):
+            distinct.setdefault(clause["passage"].casefold(), (clause, []))[1].append(clause["page"])
+        selected = sorted(list(distinct.values())[:AUDIT_MAX_PASSAGES], key=lambda e: (e[0]["page"], e[0]["offset"]))
+        labelled = [(clause, _pages_label(numbers)) for clause, numbers in selected]
+
+        opening = " ".join(PAGE_BREAK.join(pages)[:AUDIT_OPENING_CHARS].split())
+        passages = "\n".join(f"[{label}] {clause['passage']}" for clause, label in labelled) or "(none)"
+        prompt = (PRESCREEN_AUDIT_PROMPT
+                  + f"\nOPENING TEXT ({len(pages)} pages in total):\n{opening}\n"
+                  + f"\nFLAGGED PASSAGES ({len(selected)} of {len(distinct)} distinct):\n{passages}\n")
+        if progress:
+            progress(f"Explaining {len(selected)} flagged passages...")
+        response = model_dispatcher.call("audit", self.model.generate_content, prompt,
+                                         generation_config={"response_mime_type": "application/json"})
+
+        audit = _parse_audit(response.text)
+        risk = _normalize_risk(audit.get("risk_level")) or scan["risk_level"]
+        flagged = audit["flagged_clauses"] if "risk_level" in audit else [f"{c['passage']} ({label})" for c, label in labelled]
+        return json.dumps({
+            "doc_type": audit.get("doc_type") or "Unknown",
+            "risk_level": risk,
+            "summary": audit.get("summary", ""),
+            "flagged_clauses": flagged,
+            "prescreen": {"score": scan["score"], "risk_level": scan["risk_level"], "categories": scan["categories"],
+                          "total_matches": len(clauses),
+                          "matches": [{k: c[k] for k in ("page", "offset", "categories", "terms")} for c, _ in selected]},
+        }, indent=2, ensure_ascii=False)
+
+    def _audit_batched(self, file_bytes: bytes, digest: str, ranges: list, page_count: int, progress=None) -> tuple:
+        """
+        Map-reduce audit. Map: each page range goes to the model as its own sub-PDF, up to
+        AUDIT_MAX_PARALLEL at once (the dispatcher still applies the global quota). Reduce: the
+        findings are merged locally, so latency follows the slowest batch, not the page count.
+        Batch results are cached, so a retry after a failed batch only redoes what's missing.
+        Returns (audit JSON, whether every batch succeeded).
+        """
+        subsets = split_pdf(file_bytes, ranges)
+
+        def audit(start: int, stop: int, data: bytes) -> dict:
+            key = f"{digest}:{start}:{stop}"
+            text = content_cache.get(AUDIT_BATCH_CACHE_NS, key)
+            if text is None:
+                prompt = BATCH_AUDIT_PROMPT.format(first=start + 1, last=stop, total=page_count)
+                content = [prompt, {"mime_type": "application/pdf", "data": data}]
+                text = model_dispatcher.call("audit", self.model.generate_content, content,
+                                             generation_config={"response_mime_type": "application/json"}).text
+                content_cache.set(AUDIT_BATCH_CACHE_NS, key, text)
+            return _parse_audit(text)
+
+        parts = {}
+        with ThreadPoolExecutor(max_workers=min(AUDIT_MAX_PARALLEL, len(ranges))) as pool:
+            # Each batch carries the caller's context (trace spans); a Context can't be entered twice at once
+            futures = {pool.submit(contextvars.copy_context().run, audit, start, stop, data): (start, stop)
+                       for (start, stop), data in zip(ranges, subsets)}
+            for future in as_completed(futures):
+                try:
+                    parts[futures[future]] = future.result()
+                except ModelUnavailableError:
+                    raise
+                except Exception as e:
+                    print(f"Audit of pages {futures[future][0] + 1}-{futures[future][1]} failed: {e}")
+                    parts[futures[future]] = None
+                if progress:
+                    progress(f"Audited {len(parts)}/{len(ranges)} sections...")
+
+        complete = all(p is not None for p in parts.values())
+        return json.dumps(_merge_audits(parts, page_count), indent=2, ensure_ascii=False), complete
+
+    def extract_content_from_file(self, file_bytes: bytes, mime_type: str, digest: str = None) -> str:
         """
-        Uses Gemini Vision to OCR/Read a document for Context Chat.
+        Reads a document for Context Chat.
+        PDFs use their embedded text layer; only pages without one go to Gemini Vision.
+        Results are cached by content hash, so re-uploading the same file skips all of it.
         """
         try:
-            prompt = """
-            SYSTEM: OCR & DOCUMENT PARSER.
-            TASK: Read this document and output its COMPLETE raw text content.
-            - Preserve numbers, tables, and legal text exactly.
-            - Do not summarize.
-            """
-            content = [prompt, {"mime_type": mime_type, "data": file_bytes}]
-            response = self.model.generate_content(content)
-            return response.text
+            digest = digest or content_hash(file_bytes)
+            cached = content_cache.get(OCR_CACHE_NS, digest)
+            if cached is not None:
+                return cached
+
+            if mime_type == "application/pdf":
+                text = self._extract_pdf(file_bytes)
+            else:
+                text = self._ocr(file_bytes, mime_type)
+
+            content_cache.set(OCR_CACHE_NS, digest, text)
+            return text
+        except ModelUnavailableError:
+            raise
         except Exception as e:
-            return f"Error reading document: {str(e)}"
\ No newline at end of file
+            return f"Error reading document: {str(e)}"
+
+    def _ocr(self, file_bytes: bytes, mime_type: str, prompt: str = OCR_PROMPT) -> str:
+        """Uses Gemini Vision to OCR a document."""
+        content = [prompt, {"mime_type": mime_type, "data": file_bytes}]
+        response = model_dispatcher.call("ocr", self.model.generate_content, content)
+        return response.text
+
+    def _extract_pdf(self, file_bytes: bytes) -> str:
+        """
+        Text-layer fast path: pypdf extracts every page (in parallel for large files) and
+        only scanned/image pages are bundled into one sub-PDF for Vision OCR.
+        """
+        try:
+            pages = extract_pdf_pages(file_bytes)
+        except Exception as e:
+            print(f"PDF text layer unreadable, falling back to Vision OCR: {e}")
+            return self._ocr(file_bytes, "application/pdf")
+
+        missing = [i for i, text in enumerate(pages) if not has_text_layer(text)]
+        if missing:
+            subset = file_bytes if len(missing) == len(pages) else build_pdf_subset(file_bytes, missing)
+            ocr_pages = _split_ocr_pages(self._ocr(subset, "application/pdf", PAGED_OCR_PROMPT), len(missing))
+            for i, text in zip(missing, ocr_pages):
+                pages[i] = text
+
+        return PAGE_BREAK.join(pages)
+
+
+def _split_ocr_pages(text: str, expected: int) -> list:
+    """
+    Splits paged OCR output on its `=== PAGE n ===` markers.
+    If the model didn't follow the format, everything goes to the first missing page.
+    """
+    parts = _PAGE_MARKER.split(text)
+    # parts = [preamble, "1", page1, "2", page2, ...]
+    pages = {}
+    for number, body in zip(parts[1::2], parts[2::2]):
+        pages[int(number)] = body.strip()
+
+    if sorted(pages) == list(range(1, expected + 1)):
+        return [pages[n] for n in range(1, expected + 1)]
+    return [text.strip()] + [""] * (expected - 1)
+
+
+def _audit_ranges(page_count: int) -> list:
+    """
+    Splits `page_count` pages into contiguous (start, stop) batches of near-equal size: enough
+    batches to respect AUDIT_BATCH_PAGES, and more (down to AUDIT_MIN_BATCH_PAGES each) while
+    that fills the parallel slots.
+    """
+    count = max(-(-page_count // AUDIT_BATCH_PAGES), min(AUDIT_MAX_PARALLEL, page_count // AUDIT_MIN_BATCH_PAGES), 1)
+    size, extra = divmod(page_count, count)
+    ranges, start = [], 0
+    for i in range(count):
+        stop = start + size + (1 if i < extra else 0)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _pages_label(numbers: list, shown: int = 5) -> str:
+    numbers = sorted(set(numbers))
+    label = "page " + ", ".join(str(n) for n in numbers[:shown])
+    return label + (f" and {len(numbers) - shown} more" if len(numbers) > shown else "")
+
+
+def _normalize_risk(value) -> str:
+    text = str(value or "").strip().lower()
+    for level in RISK_LEVELS:
+        if text.startswith(level.lower()):
+            return level
+    return None
+
+
+def _parse_audit(text: str) -> dict:
+    """One batch's findings. Tolerates code fences and prose around the JSON object."""
+    text = text.strip()
+    start, end = text.find("{"), text.rfind("}")
+    try:
+        data = json.loads(text[start:end + 1]) if start != -1 else {}
+    except ValueError:
+        data = {}
+    if not isinstance(data, dict) or not data:
+        # Not JSON after all: keep the prose as the summary
+        return {"summary": text}
+    clauses = data.get("flagged_clauses") or []
+    data["flagged_clauses"] = clauses if isinstance(clauses, list) else [clauses]
+    return data
+
+
+def _clause_key(clause) -> frozenset:
+    text = clause if isinstance(clause, str) else json.dumps(clause, sort_keys=True)
+    return shingles(tokenize(_PAGE_REF.sub(" ", text)))
+
+
+def _merge_audits(parts: dict, page_count: int) -> dict:
+    """
+    Reduce step: {(start, stop): findings or None if the batch failed} -> one audit with the
+    same keys as a single-call audit. Risk is the highest any batch found (at least Med when
+    pages couldn't be audited); near-identical clauses found by several batches are kept once.
+    """
+    ordered = sorted(parts.items())
+    found = [(pages, p) for pages, p in ordered if p is not None]
+    failed = [pages for pages, p in ordered if p is None]
+
+    doc_types = Counter(str(p["doc_type"]).strip() for _, p in found if p.get("doc_type"))
+    # Most common type; ties go to the earliest batch (usually the title page)
+    doc_type = max(doc_types, key=doc_types.get) if doc_types else "Unknown"
+
+    levels = [RISK_LEVELS.index(level) for level in (_normalize_risk(p.get("risk_level")) for _, p in found) if level]
+    risk = max(levels, default=0)
+    if failed:
+        risk = max(risk, RISK_LEVELS.index("Med"))
+
+    clauses, seen = [], []
+    for _, p in found:
+        for clause in p.get("flagged_clauses", []):
+            key = _clause_key(clause)
+            if not key:
+                continue
+            if any(len(key & other) / len(key | other) >= CLAUSE_DUPLICATE_THRESHOLD for other in seen):
+                continue
+            seen.append(key)
+            clauses.append(clause)
+
+    lines = [f"Audited {page_count} pages in {len(parts)} sections; {len(clauses)} clauses flagged."]
+    lines += [f"Pages {start + 1}-{stop}: {str(p['summary']).strip()}" for (start, stop), p in found if p.get("summary")]
+    if failed:
+        lines.append("Could not audit pages " + ", ".join(f"{start + 1}-{stop}" for start, stop in failed) + "; review them manually.")
+
+    return {"doc_type": doc_type, "risk_level": RISK_LEVELS[risk], "summary": "\n".join(lines), "flagged_clauses": clauses}
+
+
+async def _single(response):
+    """Adapts a non-streamed response to the async chunk iteration used in `stream_response`."""
+    yield response
@@ -11,3 +11,12 @@ def set_chat_context(user_id: str, session_id: str):
 
 def get_chat_context():
     return user_id_ctx.get(), session_id_ctx.get()
+
+# Per-request trace (an app.utils.timing.StageTimer); copied into worker threads with the rest of the context
+trace_ctx = contextvars.ContextVar("trace_ctx", default=None)
+
+def set_trace(trace):
+    return trace_ctx.set(trace)
+
+def get_trace():
+    return trace_ctx.get()
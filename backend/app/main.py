@@ -1,9 +1,28 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
-from app.models import ChatRequest, ChatResponse
-from app.agent import FinancialAgent
-from app.memory import save_user_document, get_user_documents, get_user_profile, get_chat_history, save_chat_entry
-from app.context import set_chat_context
+import asyncio
+import json
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Request
+from fastapi.responses import StreamingResponse, PlainTextResponse, JSONResponse
+from starlette.background import BackgroundTask
+from app.models import ChatRequest, ChatResponse, EmiSweepRequest, AmortizationRequest
+from app.memory import db, invalidate_user_cache, save_user_document, get_user_documents, get_user_profile, get_chat_history, get_chat_session_meta, get_chat_tail, build_chat_session, queue_chat_turn, chat_writer, save_chat_summary, search_user_documents
+from app.context import set_chat_context, get_trace
+from app.tools.loan_math import calculate_emi_sweep, generate_amortization_schedule
+from app.utils.timing import StageTimer, ServerTimingMiddleware, span
+from app.utils.metrics import Gauge, render_metrics
+from app.utils.tool_cache import tool_cache_stats, CONTEXT_FREE_TOOLS
+from app.utils.response_cache import response_cache, is_generic, active_persona
+from app.utils.content_cache import content_cache
+from app.utils.context_window import fold_range
+from app.utils.model_dispatcher import model_dispatcher, ModelUnavailableError
+from app.utils.jobs import job_queue, spool_upload, UploadTooLargeError, QueueFullError
+from app.utils.admission import AdmissionController, OverloadedError
+from app.utils.bank_engine import bank_engine
+from app.utils.kyc_validation import validate_stream, BULK_FORMATS
+from app.utils.doc_parser import shutdown_pool as shutdown_pdf_pool
+from app.utils.lazy import Lazy
+from app.utils.readiness import Readiness
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI(title="FinBot Backend")
@@ -20,104 +39,521 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize the AI Agent
-agent = FinancialAgent()
+# Per-request spans -> Server-Timing header + latency histograms (outermost, so it times everything)
+app.add_middleware(ServerTimingMiddleware)
+
+def _create_agent():
+    # Pulls in the Gemini SDK and every tool module, so it stays off the import path
+    from app.agent import FinancialAgent
+    return FinancialAgent()
+
+# Initialize the AI Agent (on first use, or by the startup warm-up below)
+agent = Lazy(_create_agent)
+
+# Warmed in the background after startup; `/` answers meanwhile, `/ready` once all are loaded
+readiness = Readiness()
+readiness.add("firestore", db.get)
+readiness.add("model", agent.get)
+readiness.add("bank_data", bank_engine.snapshot)
+
+# Chat turns that need context reads / the model are admitted through here (fair per user, 429 when overloaded)
+admission = AdmissionController(backlog=lambda: model_dispatcher.slots.waiting())
 
 @app.get("/")
 def health_check():
+    # Liveness only: answers as soon as the process is up, before any client is loaded
     return {"status": "running", "service": "FinBot API"}
 
+@app.get("/ready")
+def readiness_check():
+    """
+    Readiness: 200 once Firestore, the Gemini agent and the bank data are loaded, 503 until then
+    (with per-component status, time to ready and the last warm-up error).
+    """
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+Gauge("finbot_write_behind_depth", "Chat turns buffered for write-behind.", lambda: chat_writer.depth())
+Gauge("finbot_model_in_flight", "Gemini calls currently running.", lambda: model_dispatcher.slots.in_use)
+Gauge("finbot_tool_cache_hit_rate", "Memoized tool hit rate.",
+      lambda: {name: s["hit_rate"] for name, s in tool_cache_stats().items()}, label="tool")
+Gauge("finbot_model_waiting", "Gemini calls waiting for a concurrency slot.", lambda: model_dispatcher.slots.waiting())
+Gauge("finbot_admission_in_flight", "Chat turns holding an admission slot.", lambda: admission.in_flight)
+Gauge("finbot_admission_queue_depth", "Chat turns waiting for an admission slot.", lambda: admission.queue_depth())
+Gauge("finbot_jobs_queued", "Document jobs waiting for a worker.", lambda: job_queue.queued())
+Gauge("finbot_jobs_running", "Document jobs being processed.", lambda: job_queue.running())
+Gauge("finbot_component_ready", "1 once a startup component has finished warming.",
+      lambda: {name: int(c["status"] == "ready") for name, c in readiness.status()["components"].items()}, label="component")
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """
+    Prometheus scrape endpoint (request, stage, tool, model and write-behind latencies).
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/history/{user_id}")
-def get_history_endpoint(user_id: str, session_id: str = None):
+def get_history_endpoint(user_id: str, session_id: str = None, limit: int = 50, before: datetime = None):
+    """
+    Fetch one page of a session's history (oldest -> newest).
+    Pass the returned `next_before` as `before` to page further back; it is null on the last page.
+    """
+    limit = max(1, min(limit, 200))
+    history = get_chat_history(user_id, session_id, limit=limit, before=before)
+    next_before = history[0]["timestamp"] if len(history) == limit else None
+    return {"history": history, "next_before": next_before}
+
+@app.on_event("startup")
+async def warm_up():
+    # Per process (after fork in multi-worker mode). Doesn't block startup: missing Firebase
+    # creds show up as a failing `firestore` component on /ready instead of a crash here
+    readiness.start()
+
+@app.on_event("shutdown")
+async def flush_pending_writes():
+    # Chat turns are written behind the response; don't lose buffered ones on deploy/restart
+    readiness.stop()
+    await chat_writer.close()
+    await job_queue.close()
+    shutdown_pdf_pool()
+
+# Strong references to fire-and-forget tasks (asyncio only keeps weak ones)
+_background_tasks = set()
+_folding_sessions = set()
+
+async def _load_chat_context(request: ChatRequest, timer: StageTimer):
+    """
+    Fetches Session (history + summary), Profile & Documents concurrently (blocking Firestore calls run off the loop),
+    then fits everything into the prompt token budget.
+    Returns (session, prompt_text, gemini_history, context_data).
+    """
+    with timer.stage("reads"):
+        meta, tail, user_profile, user_docs = await asyncio.gather(
+            timer.timed("session", asyncio.to_thread(get_chat_session_meta, request.user_id, request.session_id)),
+            timer.timed("history", asyncio.to_thread(get_chat_tail, request.user_id, request.session_id)),
+            timer.timed("profile", asyncio.to_thread(get_user_profile, request.user_id)),
+            timer.timed("documents", asyncio.to_thread(get_user_documents, request.user_id)),
+        )
+        # A document just uploaded through another worker may not be in this worker's cached list yet
+        if request.doc_id and not any(d.get("id") == request.doc_id for d in user_docs):
+            invalidate_user_cache(request.user_id)
+            user_docs = await timer.timed("documents", asyncio.to_thread(get_user_documents, request.user_id))
+
+        # Only touches Firestore again for a one-off migration of a legacy session
+        session = await asyncio.to_thread(build_chat_session, request.user_id, request.session_id, meta, tail)
+
+    # Pull only the chunks relevant to this message (scoped to doc_id in "Chat with Document")
+    passages = []
+    if user_docs:
+        with timer.stage("retrieval"):
+            passages = await asyncio.to_thread(search_user_documents, request.user_id, request.message, user_docs, request.doc_id)
+
+    context_data = {
+        "profile": user_profile,
+        "documents": user_docs,
+        "passages": passages
+    }
+
+    with timer.stage("context"):
+        prompt_text, gemini_history, context_data = (await agent.aget()).fit_context(request.message, session, context_data)
+    return session, prompt_text, gemini_history, context_data
+
+async def _fold_summary(user_id: str, session_id: str, summary: str, messages: list):
+    try:
+        new_summary = await (await agent.aget()).summarize_conversation(summary, messages)
+        await asyncio.to_thread(save_chat_summary, user_id, session_id, new_summary, messages[-1]["timestamp"])
+    except Exception as e:
+        print(f"Summary fold failed for {user_id}_{session_id}: {e}")
+
+def _schedule_summary_fold(request: ChatRequest, session: dict, turn: list):
     """
-    Fetch history for a user, optionally filtered by session_id.
+    Once enough turns have aged out of the verbatim window, fold them into the session summary
+    in the background (off the response path). One fold per session at a time. A session whose
+    summary lags behind the loaded tail folds its backlog first, in order, one batch per turn.
     """
-    return {"history": get_chat_history(user_id, session_id)}
+    key = (request.user_id, request.session_id)
+    if key in _folding_sessions:
+        return
+    if session.get("backlog"):
+        fold = session["backlog"]
+    else:
+        messages = session["messages"] + turn
+        end = fold_range(messages)
+        if end is None:
+            return
+        fold = messages[:end]
+
+    _folding_sessions.add(key)
+    task = asyncio.create_task(_fold_summary(request.user_id, request.session_id, session["summary"], fold))
+    _background_tasks.add(task)
+
+    def _done(t):
+        _background_tasks.discard(t)
+        _folding_sessions.discard(key)
+    task.add_done_callback(_done)
+
+def _cached_reply_key(request: ChatRequest, session: dict, context_data: dict):
+    """
+    (persona, question) for the generic-reply cache, or None when the turn could depend on the
+    user: uploaded documents, earlier turns (history or summary), or a message about their own
+    details. Only the opening turn of a session without documents is shared.
+    """
+    if (request.doc_id or context_data.get("passages") or context_data.get("documents")
+            or session.get("summary") or session.get("messages") or not is_generic(request.message)):
+        return None
+    return active_persona(session["messages"]), request.message
+
+def _remember_reply(key, context_data: dict, reply: str, agent_name: str, process_msg: str, tools: list):
+    # Only replies that used no tools beyond public reference data and don't address the user by name are reusable
+    if key is None or not reply or reply.startswith("System Error") or not CONTEXT_FREE_TOOLS.issuperset(tools):
+        return
+    profile = context_data.get("profile") or {}
+    name = (profile.get("displayName") or "").split()
+    personal = [p for p in (name[0] if name else None, profile.get("email")) if p]
+    if any(p.lower() in reply.lower() for p in personal):
+        return
+    response_cache.put(*key, {"response": reply, "agent_used": agent_name, "process_log": process_msg})
+
+def _overloaded(e: OverloadedError) -> HTTPException:
+    # Shed instead of queueing forever; Retry-After is the estimated time for the queue to drain
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+def _model_unavailable(e: ModelUnavailableError) -> HTTPException:
+    # Gemini quota/outage persisted through the dispatcher's retries
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
 @app.post("/chat", response_model=ChatResponse)
-def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest):
+    timer = get_trace() or StageTimer()
     try:
-        # 0. Set Context for Tools
+        # 0. Set Context for Tools (copied into worker threads by asyncio.to_thread)
         set_chat_context(request.user_id, request.session_id)
 
-        # 1. Fetch Context (Current Session History)
-        raw_history = get_chat_history(request.user_id, request.session_id)
-        
-        # Convert to Gemini format
-        gemini_history = []
-        for msg in raw_history:
-            role = "user" if msg["role"] == "user" else "model"
-            gemini_history.append({"role": role, "parts": [msg["content"]]})
-
-        # 2. Fetch User Profile & Documents (RAG/Context)
-        user_profile = get_user_profile(request.user_id)
-        user_docs = get_user_documents(request.user_id)
-
-        context_data = {
-            "profile": user_profile,
-            "documents": user_docs
-        }
-
-        # 3. Call Agent (Get Response + Metadata)
-        # We pass context_data to the agent
-        bot_reply_text, agent_name, process_msg = agent.get_response(request.message, history=gemini_history, context_data=context_data)
-        
-        # 4. Save to DB with Session ID
-        save_chat_entry(request.user_id, "user", request.message, request.session_id)
-        save_chat_entry(request.user_id, "model", bot_reply_text, request.session_id)
-        
+        # 1. Bare EMI / SIP calculations are answered directly (no context reads, no model call)
+        with timer.stage("fast_path"):
+            finbot = await agent.aget()
+            fast_events = finbot.fast_path(request.message)
+
+        if fast_events is not None:
+            done = fast_events[-1]
+            bot_reply_text, agent_name, process_msg = done["response"], done["agent_used"], done["process_log"]
+        else:
+            # 2. Wait for an admission slot (or get shed with 429)
+            with timer.stage("admission"):
+                ticket = admission.enter(request.user_id)
+                await ticket.wait()
+            try:
+                # 3. Fetch Context (History, Profile, Documents) within the token budget
+                session, prompt_text, gemini_history, context_data = await _load_chat_context(request, timer)
+
+                # 4. Generic questions reuse an earlier reply; otherwise call the Agent (Get Response + Metadata)
+                cache_key = _cached_reply_key(request, session, context_data)
+                cached = response_cache.get(*cache_key) if cache_key else None
+                if cached is not None:
+                    bot_reply_text, agent_name, process_msg = cached["response"], cached["agent_used"], cached["process_log"]
+                else:
+                    with timer.stage("llm"):
+                        bot_reply_text, agent_name, process_msg, tools = await finbot.get_response_async(
+                            prompt_text, history=gemini_history, context_data=context_data
+                        )
+                    _remember_reply(cache_key, context_data, bot_reply_text, agent_name, process_msg, tools)
+            finally:
+                ticket.release()
+
+        # 5. Queue the whole turn for a batched write-behind (off the response path)
+        with timer.stage("write"):
+            turn = await queue_chat_turn(request.user_id, request.session_id, request.message, bot_reply_text)
+        if fast_events is None:
+            _schedule_summary_fold(request, session, turn)
+
         return ChatResponse(
             response=bot_reply_text,
             agent_used=agent_name,
             process_log=process_msg
         )
 
+    except OverloadedError as e:
+        raise _overloaded(e)
+    except ModelUnavailableError as e:
+        raise _model_unavailable(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/upload-doc")
-async def upload_document_for_chat(file: UploadFile = File(...), user_id: str = Form(...)):
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest):
     """
-    Uploads a doc, extracts text via Vision, saves to memory.
+    Server-Sent-Events version of /chat.
+    Emits `status`, `token`, `tool_start`, `tool_end` and `done` (or `error`) events, then a `timing` event.
+    The finished turn is persisted exactly like /chat. An overloaded server answers 429 before the stream starts.
     """
-    allowed_types = ["application/pdf", "image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
+    timer = get_trace() or StageTimer()
+    with timer.stage("fast_path"):
+        finbot = await agent.aget()
+        fast_events = finbot.fast_path(request.message)
+
+    ticket = None
+    if fast_events is None:
+        try:
+            ticket = admission.enter(request.user_id)
+        except OverloadedError as e:
+            raise _overloaded(e)
+
+    async def event_stream():
+        # Flush headers immediately so the client sees the first byte before any Firestore/Gemini work
+        yield _sse("status", {"message": "Connecting you to the FinBot team..."})
+
+        try:
+            set_chat_context(request.user_id, request.session_id)
+            if ticket is not None and not ticket.admitted:
+                yield _sse("status", {"message": "All our advisors are busy. You're next in line..."})
+            if ticket is not None:
+                with timer.stage("admission"):
+                    await ticket.wait()
+
+            final = None
+            if fast_events is not None:
+                for event in fast_events:
+                    yield _sse(event["event"], event)
+                final = fast_events[-1]
+            else:
+                session, prompt_text, gemini_history, context_data = await _load_chat_context(request, timer)
+
+                cache_key = _cached_reply_key(request, session, context_data)
+                cached = response_cache.get(*cache_key) if cache_key else None
+                if cached is not None:
+                    final = dict(cached, event="done", tools=[])
+                    yield _sse("token", {"event": "token", "text": cached["response"]})
+                    yield _sse("done", final)
+                else:
+                    with timer.stage("llm"):
+                        async for event in finbot.stream_response(prompt_text, history=gemini_history, context_data=context_data):
+                            if event["event"] == "done":
+                                final = event
+                            yield _sse(event["event"], event)
+                    _remember_reply(cache_key, context_data, final["response"], final["agent_used"],
+                                    final["process_log"], final["tools"])
+                ticket.release()
+
+            with timer.stage("write"):
+                turn = await queue_chat_turn(request.user_id, request.session_id, request.message, final["response"])
+            if fast_events is None:
+                _schedule_summary_fold(request, session, turn)
+
+            # Headers went out before any work, so the breakdown is sent as a final event instead of Server-Timing
+            yield _sse("timing", {"spans": timer.spans, "total_ms": timer.total_ms()})
+
+        except (OverloadedError, ModelUnavailableError) as e:
+            yield _sse("error", {"detail": str(e), "retry_after": e.retry_after})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            if ticket is not None:
+                ticket.release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also frees the slot if the client disconnected before the stream started
+        background=BackgroundTask(ticket.release) if ticket is not None else None
+    )
+
+ALLOWED_DOC_TYPES = ["application/pdf", "image/jpeg", "image/png", "image/webp"]
+
+async def _submit_document_job(kind: str, file: UploadFile, fn, *args):
+    """
+    Spools the upload to disk and queues `fn(progress, upload, *args)` on the job workers.
+    Returns the 202 body with the job ID; the file is deleted once the job finishes.
+    """
+    if file.content_type not in ALLOWED_DOC_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type.")
 
     try:
-        file_bytes = await file.read()
-        extracted_text = agent.extract_content_from_file(file_bytes, file.content_type)
-        
-        # Save to User's History
-        doc_id = save_user_document(user_id, file.filename, file_bytes, file.content_type, extracted_text)
-        
-        return {
-            "status": "success",
-            "doc_id": doc_id,
-            "preview": extracted_text[:100] + "..."
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        with span("spool"):
+            upload = await spool_upload(file)
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    try:
+        job = await job_queue.submit(kind, fn, upload, *args, cleanup=upload.discard)
+    except QueueFullError as e:
+        await asyncio.to_thread(upload.discard)
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(int(e.retry_after))})
+
+    return {"status": "queued", "job_id": job.id, "status_url": f"/jobs/{job.id}"}
+
+def _upload_job(progress, upload, user_id: str) -> dict:
+    file_bytes = upload.read()
+    progress("Reading document...")
+    extracted_text = agent.extract_content_from_file(file_bytes, upload.content_type, digest=upload.digest)
+
+    # Save to User's History
+    progress("Saving to your documents...")
+    doc_id = save_user_document(user_id, upload.filename, file_bytes, upload.content_type, extracted_text, digest=upload.digest)
+
+    return {
+        "status": "success",
+        "doc_id": doc_id,
+        "preview": extracted_text[:100] + "..."
+    }
 
-@app.post("/analyze-doc")
+def _analyze_job(progress, upload) -> dict:
+    file_bytes = upload.read()
+    progress("Auditing document...")
+    return {
+        "filename": upload.filename,
+        "analysis": agent.analyze_document(file_bytes, upload.content_type, digest=upload.digest, progress=progress)
+    }
+
+@app.post("/upload-doc", status_code=202)
+async def upload_document_for_chat(file: UploadFile = File(...), user_id: str = Form(...)):
+    """
+    Uploads a doc for Context Chat. Returns a job ID at once; text extraction (Vision) and
+    saving to memory run in the background. Poll `/jobs/{job_id}` for `{doc_id, preview}`.
+    """
+    return await _submit_document_job("upload", file, _upload_job, user_id)
+
+@app.post("/analyze-doc", status_code=202)
 async def analyze_document(file: UploadFile = File(...)):
     """
-    One-off Legal Audit endpoint.
+    One-off Legal Audit endpoint. Returns a job ID at once; poll `/jobs/{job_id}` for `{filename, analysis}`.
     """
-    allowed_types = ["application/pdf", "image/jpeg", "image/png", "image/webp"]
-    if file.content_type not in allowed_types:
-        raise HTTPException(status_code=400, detail="Invalid file type.")
+    return await _submit_document_job("analyze", file, _analyze_job)
 
-    try:
-        file_bytes = await file.read()
-        analysis_result = agent.analyze_document(file_bytes, file.content_type)
-        
-        return {
-            "filename": file.filename,
-            "analysis": analysis_result
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/jobs/stats")
+async def job_stats():
+    """
+    Document job workers: queued / running jobs and totals.
+    """
+    return job_queue.stats()
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    """
+    Status of an upload / audit job: `queued`, `running` (with a `stage`), `done` (with `result`) or `failed` (with `error`).
+    """
+    state = await job_queue.lookup(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+    return state
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Server-Sent-Events progress for a job: one `job` event per change, ending with `done` or `failed`.
+    """
+    if await job_queue.lookup(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+
+    async def event_stream():
+        async for state in job_queue.watch(job_id):
+            yield _sse("job", state)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/cache/stats")
+def cache_stats():
+    """
+    Hit/miss counters for the content-addressed OCR / audit / storage cache, the memoized tools
+    and the generic-question reply cache.
+    """
+    return dict(content_cache.stats(), tools=tool_cache_stats(), responses=response_cache.stats())
+
+@app.get("/persistence/stats")
+async def persistence_stats():
+    """
+    Write-behind queue for chat turns: current depth vs capacity, batches, retries and drops.
+    """
+    return chat_writer.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """
+    Chat admission control: slots in use, queue depth, turns shed and the current Retry-After estimate.
+    """
+    return admission.stats()
+
+@app.get("/model/stats")
+async def model_stats():
+    """
+    Gemini dispatcher: in-flight / waiting calls and, per call type, queue wait vs. model time.
+    """
+    return model_dispatcher.stats()
+
+@app.post("/loan/emi-sweep")
+def emi_sweep_endpoint(request: EmiSweepRequest):
+    """
+    Rate x tenure x principal EMI table, computed in one vectorized pass.
+    """
+    result = calculate_emi_sweep(request.principals, request.rates_of_interest, request.tenure_years)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+@app.post("/loan/amortization")
+def amortization_endpoint(request: AmortizationRequest):
+    """
+    Full amortization schedule in columnar form (monthly by default, or yearly).
+    """
+    result = generate_amortization_schedule(request.principal, request.rate_of_interest, request.tenure_years, request.granularity)
+    if "error" in result:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose body is produced while the request body is still arriving. The
+    stock one listens for client disconnect on `receive` from the first byte, which would
+    swallow the upload's chunks; here that only starts once the upload has been read.
+    """
+
+    def __init__(self, content, upload_read: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.upload_read = upload_read
+
+    async def listen_for_disconnect(self, receive):
+        await self.upload_read.wait()
+        await super().listen_for_disconnect(receive)
+
+@app.post("/kyc/validate-bulk")
+async def kyc_validate_bulk(request: Request, format: str = None):
+    """
+    Validates a batch of KYC records (PAN, Aadhaar, mobile, DOB, name) uploaded as CSV with a
+    header row or as NDJSON (`?format=`, or from the Content-Type), as the raw request body;
+    multipart form uploads are rejected with 415. Rows are read and answered
+    as they stream: one NDJSON line per row `{row, ref?, valid, errors}`, then a `summary` line.
+    Clients should read the results while uploading (curl does); large batches otherwise stall.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type.startswith("multipart/"):
+        # A form upload would be read as NDJSON line by line (boundaries and all)
+        raise HTTPException(status_code=415, detail="Send the file as the raw request body (e.g. curl --data-binary @file.csv -H 'Content-Type: text/csv'), not as a multipart form.")
+    fmt = (format or ("csv" if content_type in ("text/csv", "application/csv") else "ndjson")).lower()
+    if fmt not in BULK_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{fmt}'. Use one of: {', '.join(BULK_FORMATS)}.")
+
+    upload_read = asyncio.Event()
+
+    async def upload():
+        try:
+            async for chunk in request.stream():
+                yield chunk
+        finally:
+            upload_read.set()
+
+    return UploadStreamingResponse(
+        validate_stream(upload(), fmt),
+        upload_read,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,10 +1,24 @@
 # app/memory.py
-import firebase_admin
-from firebase_admin import credentials, firestore, storage
 import os
 import json
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
+from app.utils.content_cache import content_cache, content_hash
+from app.utils.retrieval import RetrievalStore
+from app.utils.write_behind import WriteBehindQueue
+from app.utils.ttl_cache import TTLCache
+from app.utils.lazy import Lazy
+
+# Content-cache namespace for uploaded Storage objects ({user_id}:{sha256} -> blob path)
+STORAGE_CACHE_NS = "storage-v1"
+
+# Fields read on the chat path (never `extractedText`, which only the retrieval loader fetches)
+DOCUMENT_METADATA_FIELDS = ["id", "name", "mimeType", "uploadedAt", "summary"]
+PROFILE_FIELDS = ["uid", "displayName", "email"]
+
+# Per-user profile / document-list cache. Writes made through this backend invalidate it at once;
+# the TTL bounds staleness for writes made elsewhere (e.g. profile edits from the web app).
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
 
 # --- 1. INITIALIZE FIREBASE (Robust Setup) ---
 def initialize_firebase():
@@ -12,6 +26,10 @@ def initialize_firebase():
     Initializes Firebase Admin SDK.
     Checks if an app is already initialized to prevent hot-reload errors.
     """
+    # Imported here: the Firebase SDK takes a while to load and the health check shouldn't wait for it
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     try:
         # Check if already initialized
         if firebase_admin._apps:
@@ -52,63 +70,92 @@ def initialize_firebase():
     except Exception as e:
         raise ValueError(f"Firebase Initialization Error: {str(e)}")
 
-# Initialize DB Client immediately
-# This will crash intentionally if creds are missing (so you know to fix it)
-db = initialize_firebase()
+# Created per process on first use (or by the startup warm-up, see app/main.py);
+# this will crash intentionally on first use if creds are missing
+db = Lazy(initialize_firebase)
 
 
 # --- 2. DOCUMENT MEMORY (Firestore + Storage) ---
 
-def save_user_document(user_id: str, doc_name: str, file_bytes: bytes, mime_type: str, extracted_text: str) -> str:
+def save_user_document(user_id: str, doc_name: str, file_bytes: bytes, mime_type: str, extracted_text: str, digest: str = None) -> str:
     """
-    1. Uploads file to Firebase Storage (users/{uid}/uploads/{filename}).
+    1. Uploads file to Firebase Storage (users/{uid}/uploads/{sha256}/{filename}),
+       skipped when this user already uploaded identical bytes.
     2. Saves metadata & text to Firestore (users/{uid}/documents/{doc_id}).
     """
     doc_id = str(uuid.uuid4())
+    digest = digest or content_hash(file_bytes)
+    storage_key = f"{user_id}:{digest}"
     
-    # A. Upload to Storage
-    try:
-        bucket = storage.bucket(name="genai-d1e91.firebasestorage.app") # Hardcoded for now based on project ID
-        blob = bucket.blob(f"users/{user_id}/uploads/{doc_name}")
-        blob.upload_from_string(file_bytes, content_type=mime_type)
-        storage_path = blob.name
-    except Exception as e:
-        print(f"Storage Upload Error: {e}")
-        storage_path = "upload_failed"
+    # A. Upload to Storage (content-addressed, so a cached path always points at these bytes)
+    storage_path = content_cache.get(STORAGE_CACHE_NS, storage_key)
+    if storage_path is None:
+        try:
+            from firebase_admin import storage
+            db.get()  # Storage needs the Firebase app, which is initialized lazily per process
+            bucket = storage.bucket(name="genai-d1e91.firebasestorage.app") # Hardcoded for now based on project ID
+            storage_path = f"users/{user_id}/uploads/{digest}/{doc_name}"
+            blob = bucket.blob(storage_path)
+            blob.upload_from_string(file_bytes, content_type=mime_type)
+            content_cache.set(STORAGE_CACHE_NS, storage_key, storage_path)
+        except Exception as e:
+            print(f"Storage Upload Error: {e}")
+            storage_path = "upload_failed"
 
-    # B. Save metadata to Firestore
+    # B. Save metadata to Firestore (user doc upsert + document in one batched write)
     try:
         user_doc_ref = db.collection("users").document(user_id)
-        # Ensure user doc exists
-        if not user_doc_ref.get().exists:
-             user_doc_ref.set({"uid": user_id}, merge=True)
-
         doc_ref = user_doc_ref.collection("documents").document(doc_id)
         
         doc_data = {
             "id": doc_id,
             "name": doc_name,
             "storagePath": storage_path,
+            "contentHash": digest,
             "mimeType": mime_type,
             "uploadedAt": datetime.now(timezone.utc).isoformat(),
             "extractedText": extracted_text, # Save text for RAG/Context
             "summary": extracted_text[:200] + "..." # Quick preview
         }
         
-        doc_ref.set(doc_data)
+        batch = db.batch()
+        # Ensure user doc exists
+        batch.set(user_doc_ref, {"uid": user_id}, merge=True)
+        batch.set(doc_ref, doc_data)
+        batch.commit()
+
+        invalidate_user_cache(user_id)
+
+        # Extend the user's retrieval index now, so the first chat turn doesn't pay for chunking
+        document_index.add_document(user_id, doc_id, doc_name, extracted_text)
         return doc_id
     except Exception as e:
         print(f"Firestore Save Error: {e}")
         return ""
 
+user_cache = TTLCache(ttl=USER_CACHE_TTL, max_items=4096)
+
+def invalidate_user_cache(user_id: str):
+    """
+    Call after writing a user's profile or documents.
+    """
+    user_cache.invalidate(("documents", user_id))
+    user_cache.invalidate(("profile", user_id))
+
+def _load_document_metadata(user_id: str) -> list:
+    docs_ref = db.collection("users").document(user_id).collection("documents")
+    return [dict(d.to_dict(), id=d.id) for d in docs_ref.select(DOCUMENT_METADATA_FIELDS).stream()]
+
+def _load_profile(user_id: str) -> dict:
+    doc = db.collection("users").document(user_id).get(field_paths=PROFILE_FIELDS)
+    return doc.to_dict() if doc.exists else {}
+
 def get_user_documents(user_id: str) -> list:
     """
-    Fetches all document summaries for a user to inject into context.
+    Fetches all document summaries (metadata only) for a user to inject into context.
     """
     try:
-        docs_ref = db.collection("users").document(user_id).collection("documents")
-        docs = docs_ref.stream()
-        return [d.to_dict() for d in docs]
+        return list(user_cache.get_or_load(("documents", user_id), lambda: _load_document_metadata(user_id)))
     except Exception as e:
         print(f"Error getting docs: {e}")
         return []
@@ -118,13 +165,34 @@ def get_user_profile(user_id: str) -> dict:
     Fetches user profile data.
     """
     try:
-        doc = db.collection("users").document(user_id).get()
-        if doc.exists:
-            return doc.to_dict()
-        return {}
+        return dict(user_cache.get_or_load(("profile", user_id), lambda: _load_profile(user_id)))
     except Exception as e:
         return {}
 
+def get_user_document_texts(user_id: str, doc_ids: list) -> list:
+    """
+    Fetches full extracted text for specific documents (used to (re)build the retrieval index).
+    Raises on Firestore errors: the index must not mistake a failed read for deleted documents.
+    """
+    docs_ref = db.collection("users").document(user_id).collection("documents")
+    snapshots = db.get_all([docs_ref.document(doc_id) for doc_id in doc_ids])
+    return [s.to_dict() for s in snapshots if s.exists]
+
+# Per-user chunk/BM25 index over extractedText ("Chat with Document")
+document_index = RetrievalStore(loader=get_user_document_texts)
+
+def search_user_documents(user_id: str, query: str, documents: list, doc_id: str = None) -> list:
+    """
+    Returns the most relevant chunks of the user's documents for `query`
+    (only `doc_id` when the chat is pinned to one document), within the prompt token budget.
+    """
+    try:
+        doc_ids = {d.get("id") for d in documents if d.get("id")}
+        return document_index.search(user_id, query, doc_ids, scope_doc_id=doc_id)
+    except Exception as e:
+        print(f"Error searching documents: {e}")
+        return []
+
 def get_document_context(doc_id: str) -> str:
     # Legacy/Fallback if needed, or we can look it up in a global way if ID is unique
     # For now, let's just return empty as we are moving to user-centric
@@ -132,45 +200,253 @@ def get_document_context(doc_id: str) -> str:
 
 
 # --- 3. CHAT HISTORY (FIRESTORE) ---
-def get_chat_history(user_id: str, session_id: str = None) -> list:
+# Layout: chats/{user}_{session}                   -> session doc (summary, summarizedThrough, messageCount, updatedAt)
+#         chats/{user}_{session}/messages/{auto-id} -> one doc per message, ordered by `timestamp`
+
+# Most recent messages loaded for prompt assembly (the token budget trims further)
+HISTORY_TAIL_LIMIT = 60
+
+# Un-summarized messages older than that tail (legacy migrations, failed folds) are loaded this
+# many at a time, oldest first, and folded on successive turns until the summary catches up
+HISTORY_CATCHUP_LIMIT = 100
+
+# Default page size for /history
+HISTORY_PAGE_LIMIT = 50
+
+# Firestore caps a batch at 500 writes
+_BATCH_LIMIT = 500
+
+def _session_ref(user_id: str, session_id: str):
+    return db.collection("chats").document(f"{user_id}_{session_id}")
+
+def _message_from_snapshot(snapshot) -> dict:
+    data = snapshot.to_dict()
+    return {"role": data.get("role"), "content": data.get("content", ""), "timestamp": data.get("timestamp")}
+
+def _migrate_legacy_session(doc_ref, data: dict) -> list:
     """
-    Fetches chat history from Firestore.
+    Moves a pre-subcollection `messages` array into per-message docs (once, on first read).
+    Timestamps are nudged to be strictly increasing so ordering survives the move.
+    Returns the migrated messages.
+    """
+    messages, previous = [], None
+    for msg in data.get("messages") or []:
+        ts = msg.get("timestamp") or datetime.now(timezone.utc)
+        if previous is not None and ts <= previous:
+            ts = previous + timedelta(microseconds=1)
+        previous = ts
+        messages.append({"role": msg.get("role"), "content": msg.get("content", ""), "timestamp": ts})
+
+    for start in range(0, len(messages), _BATCH_LIMIT - 1):
+        batch = db.batch()
+        for msg in messages[start:start + _BATCH_LIMIT - 1]:
+            batch.set(doc_ref.collection("messages").document(), msg)
+        batch.commit()
+
+    from firebase_admin import firestore
+    update = {"messages": firestore.DELETE_FIELD, "summarizedCount": firestore.DELETE_FIELD, "messageCount": len(messages)}
+    summarized = min(data.get("summarizedCount", 0), len(messages))
+    if summarized:
+        update["summarizedThrough"] = messages[summarized - 1]["timestamp"]
+    doc_ref.set(update, merge=True)
+    return messages
+
+def _query_messages(doc_ref, limit: int, before: datetime = None) -> list:
+    """Newest-first page of a session's messages, returned oldest -> newest."""
+    from firebase_admin import firestore
+    query = doc_ref.collection("messages").order_by("timestamp", direction=firestore.Query.DESCENDING)
+    if before is not None:
+        query = query.start_after({"timestamp": before})
+    messages = [_message_from_snapshot(s) for s in query.limit(limit).stream()]
+    messages.reverse()
+    return messages
+
+def _query_messages_between(doc_ref, after: datetime, before: datetime, limit: int) -> list:
+    """Oldest-first messages with `after` < timestamp < `before` (`after=None`: from the start)."""
+    from firebase_admin import firestore
+    query = doc_ref.collection("messages").order_by("timestamp", direction=firestore.Query.ASCENDING)
+    if after is not None:
+        query = query.start_after({"timestamp": after})
+    query = query.end_before({"timestamp": before})
+    return [_message_from_snapshot(s) for s in query.limit(limit).stream()]
+
+def get_chat_history(user_id: str, session_id: str = None, limit: int = HISTORY_PAGE_LIMIT, before: datetime = None) -> list:
+    """
+    Fetches one page of chat history (oldest -> newest): the `limit` messages just before `before`
+    (or the latest ones). Only the requested page is read.
     """
     if not session_id:
         return []
 
     try:
-        doc_ref = db.collection("chats").document(f"{user_id}_{session_id}")
-        doc = doc_ref.get()
-        if doc.exists:
-            return doc.to_dict().get("messages", [])
-        return []
+        doc_ref = _session_ref(user_id, session_id)
+        messages = _query_messages(doc_ref, limit, before)
+        if before is None:
+            messages = _with_unwritten(user_id, session_id, messages)[-limit:]
+
+        # Sessions written before the per-message layout keep an array on the session doc
+        if not messages and before is None:
+            doc = doc_ref.get()
+            if doc.exists and "messages" in doc.to_dict():
+                return _migrate_legacy_session(doc_ref, doc.to_dict())[-limit:]
+
+        return messages
     except Exception as e:
         print(f"Error fetching history: {e}")
         return []
 
+def get_chat_session_meta(user_id: str, session_id: str = None) -> dict:
+    """
+    Fetches the session doc (rolling summary + cursor). Empty dict if none.
+    """
+    if not session_id:
+        return {}
+
+    try:
+        doc = _session_ref(user_id, session_id).get()
+        return doc.to_dict() if doc.exists else {}
+    except Exception as e:
+        print(f"Error fetching session: {e}")
+        return {}
+
+def build_chat_session(user_id: str, session_id: str, meta: dict, tail: list) -> dict:
+    """
+    Combines the session doc and the recent message tail (fetched concurrently) into
+    {"messages", "summary", "summarizedThrough", "backlog"}, where `messages` are only those
+    newer than the summary cursor. When the cursor is older than the tail, `backlog` holds the
+    next HISTORY_CATCHUP_LIMIT un-summarized messages before it (oldest first), to be folded
+    before anything in `messages`.
+    """
+    migrated = None
+    if meta.get("messages") is not None:
+        migrated = _migrate_legacy_session(_session_ref(user_id, session_id), meta)
+        tail = migrated[-HISTORY_TAIL_LIMIT:]
+        meta = get_chat_session_meta(user_id, session_id)
+
+    tail = _with_unwritten(user_id, session_id, tail)[-HISTORY_TAIL_LIMIT:]
+    cursor = meta.get("summarizedThrough")
+
+    # A full tail that starts after the cursor may have un-summarized messages before it
+    backlog = []
+    if len(tail) >= HISTORY_TAIL_LIMIT and (cursor is None or tail[0]["timestamp"] > cursor):
+        oldest = tail[0]["timestamp"]
+        if migrated is not None:
+            backlog = [m for m in migrated if m["timestamp"] < oldest and (cursor is None or m["timestamp"] > cursor)]
+            backlog = backlog[:HISTORY_CATCHUP_LIMIT]
+        else:
+            try:
+                backlog = _query_messages_between(_session_ref(user_id, session_id), cursor, oldest, HISTORY_CATCHUP_LIMIT)
+            except Exception as e:
+                print(f"Error fetching un-summarized history: {e}")
+
+    if cursor is not None:
+        tail = [m for m in tail if m["timestamp"] > cursor]
+
+    return {"messages": tail, "summary": meta.get("summary", ""), "summarizedThrough": cursor, "backlog": backlog}
+
+def save_chat_summary(user_id: str, session_id: str, summary: str, summarized_through: datetime):
+    """
+    Stores the rolling conversation summary and the timestamp of the last message folded into it.
+    """
+    if not session_id:
+        return
+
+    try:
+        _session_ref(user_id, session_id).set(
+            {"summary": summary, "summarizedThrough": summarized_through}, merge=True
+        )
+    except Exception as e:
+        print(f"Error saving chat summary: {e}")
+
+def write_chat_messages(items: list):
+    """
+    Writes `[((user_id, session_id), [messages]), ...]` in one batched Firestore write:
+    every message doc plus one counter update per session.
+    """
+    sessions = {}
+    for key, messages in items:
+        sessions.setdefault(key, []).extend(messages)
+
+    from firebase_admin import firestore
+    batch = db.batch()
+    for (user_id, session_id), messages in sessions.items():
+        doc_ref = _session_ref(user_id, session_id)
+        for msg in messages:
+            batch.set(doc_ref.collection("messages").document(), msg)
+        batch.set(doc_ref, {
+            "uid": user_id,
+            "messageCount": firestore.Increment(len(messages)),
+            "updatedAt": messages[-1]["timestamp"]
+        }, merge=True)
+    batch.commit()
+
+# Turns are persisted write-behind: batched, off the response path, in order per session
+chat_writer = WriteBehindQueue(write=write_chat_messages, name="chat-writer")
+
+def _with_unwritten(user_id: str, session_id: str, messages: list) -> list:
+    """Appends this session's queued-but-unwritten messages, so a follow-up turn sees the previous one."""
+    queued = [m for turn in chat_writer.pending((user_id, session_id)) for m in turn]
+    if messages:
+        queued = [m for m in queued if m["timestamp"] > messages[-1]["timestamp"]]
+    return messages + queued if queued else messages
+
 def save_chat_entry(user_id: str, role: str, message: str, session_id: str):
     """
-    Appends a message to the Firestore document array.
+    Appends a single message to the session.
     """
     if not session_id:
         return
 
     try:
-        doc_ref = db.collection("chats").document(f"{user_id}_{session_id}")
-        
-        new_message = {
-            "role": role,
-            "content": message,
-            "timestamp": datetime.now(timezone.utc)
-        }
+        write_chat_messages([((user_id, session_id), [
+            {"role": role, "content": message, "timestamp": datetime.now(timezone.utc)}
+        ])])
+    except Exception as e:
+        print(f"Error saving chat: {e}")
 
-        # Atomic update (ArrayUnion)
-        if not doc_ref.get().exists:
-            doc_ref.set({"messages": [new_message]})
-        else:
-            doc_ref.update({
-                "messages": firestore.ArrayUnion([new_message])
-            })
+def _build_turn(user_message: str, model_reply: str) -> list:
+    # The model reply is stamped 1µs later to keep ordering strict
+    now = datetime.now(timezone.utc)
+    return [
+        {"role": "user", "content": user_message, "timestamp": now},
+        {"role": "model", "content": model_reply, "timestamp": now + timedelta(microseconds=1)}
+    ]
+
+def save_chat_turn(user_id: str, session_id: str, user_message: str, model_reply: str) -> list:
+    """
+    Persists a full turn (user message + model reply) in a single batched Firestore write, synchronously.
+    Returns the message dicts written.
+    """
+    messages = _build_turn(user_message, model_reply)
+    if not session_id:
+        return messages
+
+    try:
+        write_chat_messages([((user_id, session_id), messages)])
+    except Exception as e:
+        print(f"Error saving chat turn: {e}")
+    return messages
+
+async def queue_chat_turn(user_id: str, session_id: str, user_message: str, model_reply: str) -> list:
+    """
+    Write-behind version of `save_chat_turn` used on the chat path: returns as soon as the
+    turn is buffered (stamped now, so ordering doesn't depend on when the write lands).
+    """
+    messages = _build_turn(user_message, model_reply)
+    if session_id:
+        await chat_writer.submit((user_id, session_id), messages)
+    return messages
+
+def get_chat_tail(user_id: str, session_id: str = None) -> list:
+    """
+    The most recent messages of a session, for prompt assembly.
+    Runs alongside `get_chat_session_meta`; legacy sessions are migrated by `build_chat_session`.
+    """
+    if not session_id:
+        return []
+
+    try:
+        return _query_messages(_session_ref(user_id, session_id), HISTORY_TAIL_LIMIT)
     except Exception as e:
-        print(f"Error saving chat: {e}")
\ No newline at end of file
+        print(f"Error fetching history: {e}")
+        return []
@@ -1,6 +1,7 @@
 # app/models.py
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Literal
+from app.utils.loan_kernel import MAX_TENURE_YEARS
 
 class ChatRequest(BaseModel):
     user_id: str
@@ -14,4 +15,16 @@ class ChatResponse(BaseModel):
     doc_id: Optional[str] = None
     status: str = "success"
     agent_used: str = "General Agent"
-    process_log: str = "Processing..."
\ No newline at end of file
+    process_log: str = "Processing..."
+
+class EmiSweepRequest(BaseModel):
+    principals: List[float]
+    rates_of_interest: List[float]
+    tenure_years: List[float]
+
+class AmortizationRequest(BaseModel):
+    principal: float = Field(gt=0)
+    rate_of_interest: float = Field(ge=0, le=100)
+    tenure_years: float = Field(gt=0, le=MAX_TENURE_YEARS)
+    # Full month-by-month table for the frontend (the agent's tool defaults to the compact yearly view)
+    granularity: Literal["monthly", "yearly"] = "monthly"
@@ -0,0 +1,36 @@
+# app/preload.py
+"""
+Builds the immutable reference data once, before a multi-process server forks its workers
+(see gunicorn.conf.py). Workers inherit it copy-on-write instead of each rebuilding it.
+
+Nothing here may open a network client (Firestore, Storage, Gemini): gRPC channels don't
+survive fork(), so those are created per worker when `app.main` is imported after the fork.
+"""
+import time
+
+
+def preload() -> dict:
+    started = time.perf_counter()
+
+    # Heavy imports (numpy, the Gemini SDK and its protos). Modules the app itself loads lazily
+    # for a fast cold start are imported here too, so workers share them instead of each loading them
+    import app.agent as agent_module
+    import pypdf  # noqa: F401
+    from firebase_admin import firestore, storage  # noqa: F401 (SDK modules only, no client)
+    from app.utils.bank_engine import bank_engine
+    from app.utils import intent_router, response_cache  # noqa: F401 (compiled patterns)
+
+    # Bank tables: indexed snapshot + read-only numpy columns
+    snapshot = bank_engine.snapshot()
+
+    # Tool schemas and the fixed prompt budget
+    library = agent_module.tool_library()
+    fixed_tokens = agent_module.fixed_prompt_tokens()
+
+    return {
+        "bank_data_version": snapshot.version,
+        "bank_offers": len(snapshot.offers),
+        "tools": len(library.to_proto()[0].function_declarations),
+        "fixed_prompt_tokens": fixed_tokens,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
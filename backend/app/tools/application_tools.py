@@ -1,5 +1,5 @@
 from app.context import get_chat_context
-from app.memory import db
+from app.memory import db, invalidate_user_cache
 from datetime import datetime, timezone
 from firebase_admin import firestore
 
@@ -50,6 +50,7 @@ def update_application(title: str, application_type: str, amount: float, status:
             user_ref.update({
                 "loanApplications": firestore.Increment(1)
             })
+            invalidate_user_cache(user_id)
         
         return {
             "status": "success", 
@@ -1,29 +1,16 @@
 # app/tools/bank_data.py
-import pandas as pd
-import os
-
-# Define paths relative to this file
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-RATES_CSV = os.path.join(BASE_DIR, "../data/bank_rates.csv")
-HEALTH_CSV = os.path.join(BASE_DIR, "../data/bank_health.csv")
+from app.utils.bank_engine import bank_engine
+from app.utils.tool_cache import pure_tool
 
+@pure_tool(uses_bank_data=True)
 def query_best_loan_offers(loan_amount: float = 0) -> dict:
     """
     Queries the 'bank_rates.csv' dataset to find banks that fit the user's loan amount.
     Returns detailed comparison data.
     """
     try:
-        df = pd.read_csv(RATES_CSV)
-        
-        # Filter: If loan amount is provided, filter banks that support it
-        if loan_amount > 0:
-            df = df[(df['Min_Loan_Amount'] <= loan_amount) & (df['Max_Loan_Amount'] >= loan_amount)]
-        
-        # Sort by Interest Rate (Cheapest first)
-        df = df.sort_values(by="Min_Interest_Rate")
-        
-        # Convert to dictionary format for Gemini
-        offers = df.to_dict(orient="records")
+        # Offers are pre-sorted by Interest Rate (Cheapest first) and indexed by loan range
+        offers = bank_engine.snapshot().offers_for_amount(loan_amount)
         
         return {
             "count": len(offers),
@@ -34,23 +21,22 @@ def query_best_loan_offers(loan_amount: float = 0) -> dict:
     except Exception as e:
         return {"error": f"Database Query Failed: {str(e)}"}
 
+@pure_tool(uses_bank_data=True)
 def check_bank_health(bank_name: str) -> dict:
     """
     Queries 'bank_health.csv' to perform an Audit/Risk check on a specific bank.
     Useful for detailed due diligence.
     """
     try:
-        df = pd.read_csv(HEALTH_CSV)
+        snapshot = bank_engine.snapshot()
         
-        # Fuzzy match bank name (simple string contains)
-        bank_data = df[df['Bank_Name'].str.contains(bank_name, case=False, na=False)]
+        # Resolve aliases / partial names / typos (e.g. "State Bank of India", "kotak", "icci")
+        canonical_name = snapshot.resolve_bank(bank_name)
+        record = snapshot.health.get(canonical_name)
         
-        if bank_data.empty:
+        if record is None:
             return {"status": "Not Found", "message": f"No audit data found for {bank_name}"}
         
-        # Get the first match
-        record = bank_data.iloc[0].to_dict()
-        
         return {
             "bank": record['Bank_Name'],
             "audit_rating": record['Audit_Rating'],
@@ -63,4 +49,4 @@ def check_bank_health(bank_name: str) -> dict:
         return {"error": f"Audit Query Failed: {str(e)}"}
 
 # Register both tools
-bank_data_tools = [query_best_loan_offers, check_bank_health]
\ No newline at end of file
+bank_data_tools = [query_best_loan_offers, check_bank_health]
@@ -1,3 +1,9 @@
+import numpy as np
+from app.utils.loan_kernel import emi_kernel, max_principal_kernel
+from app.utils.bank_engine import bank_engine
+from app.utils.tool_cache import pure_tool
+
+@pure_tool()
 def check_loan_eligibility(monthly_salary: float, current_emis: float, requested_loan_amount: float, tenure_years: int, rate_of_interest: float) -> dict:
     """
     Acts as an Approval Agent. Checks if a user is eligible based on FOIR (Fixed Obligation to Income Ratio).
@@ -8,9 +14,7 @@ def check_loan_eligibility(monthly_salary: float, current_emis: float, requested
             return {"status": "Rejected", "reason": "Invalid salary input."}
 
         # 1. Calculate the New EMI for the requested loan
-        r = rate_of_interest / (12 * 100)
-        n = tenure_years * 12
-        new_emi = requested_loan_amount * r * ((1 + r)**n) / (((1 + r)**n) - 1)
+        new_emi = float(emi_kernel(requested_loan_amount, rate_of_interest, tenure_years * 12))
 
         # 2. Calculate Total Obligations
         total_monthly_obligation = current_emis + new_emi
@@ -41,5 +45,83 @@ def check_loan_eligibility(monthly_salary: float, current_emis: float, requested
     except Exception as e:
         return {"error": str(e)}
 
+@pure_tool(uses_bank_data=True)
+def find_max_eligible_loan(monthly_salary: float, current_emis: float = 0, foir_percent: float = 50, conservative: bool = False) -> dict:
+    """
+    Finds the MAXIMUM loan amount the user can get from every bank in 'bank_rates.csv', for every tenure
+    that bank offers, in one step. Use this instead of calling check_loan_eligibility repeatedly with guessed amounts.
+    
+    Args:
+        monthly_salary: Net monthly income.
+        current_emis: Sum of EMIs the user already pays.
+        foir_percent: Max share of salary all EMIs may take (bank standard 50).
+        conservative: If true, price at each bank's Max_Interest_Rate instead of its Min_Interest_Rate.
+    """
+    try:
+        if monthly_salary <= 0:
+            return {"status": "Rejected", "reason": "Invalid salary input."}
+
+        # 1. EMI headroom left under the FOIR cap
+        max_emi = monthly_salary * foir_percent / 100 - current_emis
+        if max_emi <= 0:
+            return {
+                "status": "Not Eligible",
+                "max_eligible_emi": 0,
+                "message": f"Existing EMIs already use {round(current_emis / monthly_salary * 100, 1)}% of salary (cap {foir_percent}%)."
+            }
+
+        # 2. Invert the annuity formula for every (bank, tenure) at once
+        snapshot = bank_engine.snapshot()
+        arrays = snapshot.arrays
+        rate_col = "Max_Interest_Rate" if conservative else "Min_Interest_Rate"
+        rates = arrays[rate_col][:, None]
+        tenures = np.arange(1, int(arrays["Max_Tenure"].max()) + 1)
+
+        principal = np.floor(max_principal_kernel(max_emi, rates, tenures[None, :] * 12))
+
+        # 3. Clip to each bank's loan range; tenures it doesn't offer / amounts below its minimum are ineligible
+        principal = np.minimum(principal, arrays["Max_Loan_Amount"][:, None])
+        offered = (tenures[None, :] >= arrays["Min_Tenure"][:, None]) & (tenures[None, :] <= arrays["Max_Tenure"][:, None])
+        eligible = offered & (principal >= arrays["Min_Loan_Amount"][:, None])
+        principal = np.where(eligible, principal, np.nan)
+
+        if not eligible.any():
+            return {
+                "status": "Not Eligible",
+                "max_eligible_emi": round(max_emi, 2),
+                "message": "The affordable EMI is below every bank's minimum loan amount."
+            }
+
+        best_bank, best_col = np.unravel_index(np.nanargmax(principal), principal.shape)
+        best_amount = float(principal[best_bank, best_col])
+        best_rate = float(rates[best_bank, 0])
+
+        banks = []
+        for i, offer in enumerate(snapshot.offers):
+            row = principal[i]
+            banks.append({
+                "bank": offer["Bank_Name"],
+                "rate": float(rates[i, 0]),
+                "max_loan_amount": [None if np.isnan(v) else v for v in row.tolist()]
+            })
+
+        return {
+            "status": "Eligible",
+            "max_eligible_emi": round(max_emi, 2),
+            "foir_cap": f"{foir_percent}%",
+            "rate_basis": rate_col,
+            "best_offer": {
+                "bank": snapshot.offers[best_bank]["Bank_Name"],
+                "tenure_years": int(tenures[best_col]),
+                "max_loan_amount": best_amount,
+                "monthly_emi": round(float(emi_kernel(best_amount, best_rate, int(tenures[best_col]) * 12)), 2)
+            },
+            "tenure_years": tenures.tolist(),
+            "banks": banks,
+            "message": "max_loan_amount[k] is the largest loan for tenure_years[k] (null = not offered / below bank minimum)."
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
 # Registry
-eligibility_tools = [check_loan_eligibility]
\ No newline at end of file
+eligibility_tools = [check_loan_eligibility, find_max_eligible_loan]
\ No newline at end of file
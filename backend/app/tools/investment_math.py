@@ -1,5 +1,7 @@
 # app/tools/investment_math.py
+from app.utils.tool_cache import pure_tool
 
+@pure_tool()
 def calculate_sip(monthly_investment: float, rate_of_interest: float, years: int) -> dict:
     """
     Calculates the future value of a SIP (Systematic Investment Plan).
@@ -26,6 +28,7 @@ def calculate_sip(monthly_investment: float, rate_of_interest: float, years: int
     except Exception as e:
         return {"error": str(e)}
 
+@pure_tool()
 def calculate_fd(principal: float, rate_of_interest: float, years: int) -> dict:
     """
     Calculates the maturity value of a Fixed Deposit (FD) with annual compounding.
@@ -1,15 +1,18 @@
 # app/tools/loan_math.py
+import numpy as np
+from app.utils.loan_kernel import emi_kernel, emi_grid, amortization_schedule, yearly_summary, to_columns, MAX_GRID_CELLS, MAX_TENURE_YEARS
+from app.utils.tool_cache import pure_tool
 
+@pure_tool()
 def calculate_loan_emi(principal: float, rate_of_interest: float, tenure_years: int) -> dict:
     """Calculates EMI. Params: principal (amount), rate_of_interest (annual %), tenure_years."""
     try:
         if principal <= 0 or rate_of_interest <= 0 or tenure_years <= 0:
             return {"error": "Values must be positive."}
-        
-        r = rate_of_interest / (12 * 100)
+
         n = tenure_years * 12
-        emi = principal * r * ((1 + r)**n) / (((1 + r)**n) - 1)
-        
+        emi = float(emi_kernel(principal, rate_of_interest, n))
+
         return {
             "monthly_emi": round(emi, 2),
             "total_payment": round(emi * n, 2),
@@ -19,4 +22,62 @@ def calculate_loan_emi(principal: float, rate_of_interest: float, tenure_years:
     except Exception as e:
         return {"error": str(e)}
 
-banking_tools = [calculate_loan_emi]
\ No newline at end of file
+def calculate_emi_sweep(principals: list[float], rates_of_interest: list[float], tenure_years: list[int]) -> dict:
+    """
+    Builds an EMI comparison table for every combination of loan amount, annual interest rate (%)
+    and tenure (years). Use this when the user wants to compare several amounts, rates or tenures at once.
+    Returns `emi[i][j][k]` for principals[i], rates_of_interest[j], tenure_years[k].
+    """
+    try:
+        p, r, t = np.asarray(principals, dtype=float), np.asarray(rates_of_interest, dtype=float), np.asarray(tenure_years, dtype=float)
+        if p.size == 0 or r.size == 0 or t.size == 0:
+            return {"error": "Provide at least one principal, rate and tenure."}
+        if (p <= 0).any() or (r < 0).any() or (t <= 0).any():
+            return {"error": "Values must be positive."}
+        if p.size * r.size * t.size > MAX_GRID_CELLS:
+            return {"error": f"Sweep too large (max {MAX_GRID_CELLS} combinations)."}
+
+        emis = emi_grid(p, r, t)
+        return {
+            "principals": p.tolist(),
+            "rates_of_interest": r.tolist(),
+            "tenure_years": t.tolist(),
+            "emi": np.round(emis, 2).tolist(),
+            "currency": "INR"
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+def generate_amortization_schedule(principal: float, rate_of_interest: float, tenure_years: int, granularity: str = "yearly") -> dict:
+    """
+    Generates the repayment (amortization) schedule of a loan: interest vs principal split and
+    outstanding balance over time. granularity: "yearly" (default, compact) or "monthly".
+    Tenure is capped at 40 years.
+    """
+    # Defaults to "yearly" because this result goes into the model's prompt; the
+    # /loan/amortization endpoint defaults to "monthly" for the frontend's full table
+    try:
+        if principal <= 0 or rate_of_interest < 0 or tenure_years <= 0:
+            return {"error": "Values must be positive."}
+        if tenure_years > MAX_TENURE_YEARS:
+            return {"error": f"Tenure can be at most {MAX_TENURE_YEARS} years."}
+        if granularity not in ("monthly", "yearly"):
+            return {"error": 'granularity must be "monthly" or "yearly".'}
+
+        schedule = amortization_schedule(principal, rate_of_interest, tenure_years)
+        columns = schedule if granularity == "monthly" else yearly_summary(schedule)
+        emi = float(schedule["emi"][0])
+        total_interest = float(schedule["interest"].sum())
+
+        return {
+            "monthly_emi": round(emi, 2),
+            "total_interest": round(total_interest, 2),
+            "total_payment": round(principal + total_interest, 2),
+            "granularity": granularity,
+            "schedule": to_columns(columns),
+            "currency": "INR"
+        }
+    except Exception as e:
+        return {"error": str(e)}
+
+banking_tools = [calculate_loan_emi, calculate_emi_sweep, generate_amortization_schedule]
@@ -0,0 +1,211 @@
+# app/utils/admission.py
+import os
+import math
+import time
+import heapq
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+
+from app.utils.metrics import ADMISSION_WAIT, ADMISSION_SHED
+
+# Chat turns allowed to load context / talk to the model at once
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))
+
+# Turns allowed to wait for a slot; past this new turns are shed immediately
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+
+# Waiting turns a single user may have; keeps one client from filling the queue
+ADMISSION_MAX_PER_USER = int(os.getenv("ADMISSION_MAX_PER_USER", "4"))
+
+# Longest a turn waits for a slot before it is shed
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "15"))
+
+# Shed new turns while this many model calls are already waiting in the dispatcher
+ADMISSION_MAX_MODEL_BACKLOG = int(os.getenv("ADMISSION_MAX_MODEL_BACKLOG", "48"))
+
+# Starting estimate of how long a turn holds its slot (refined as turns finish)
+INITIAL_SERVICE_SECONDS = 2.0
+SERVICE_EWMA_ALPHA = 0.2
+
+
+class OverloadedError(Exception):
+    """A turn was shed. `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float, reason: str):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class Ticket:
+    def __init__(self, controller, user_id: str, start: float, tag: float, admitted: bool):
+        self.controller = controller
+        self.user_id = user_id
+        self.start = start
+        self.tag = tag
+        self.created = time.monotonic()
+        self.admitted_at = self.created if admitted else None
+        self.future = None if admitted else asyncio.get_running_loop().create_future()
+        self.cancelled = False
+        self.released = False
+
+    @property
+    def admitted(self) -> bool:
+        return self.admitted_at is not None
+
+    async def wait(self):
+        """Waits for a slot. Raises OverloadedError after `max_wait`."""
+        if self.admitted:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self.future), self.controller.max_wait)
+        except asyncio.TimeoutError:
+            if not self.admitted:
+                self.controller._withdraw(self)
+                raise self.controller._shed("timeout")
+        except BaseException:
+            # Client went away while queued
+            if self.admitted:
+                self.release()
+            else:
+                self.controller._withdraw(self)
+            raise
+
+    def release(self):
+        """Gives the slot back, or leaves the queue if not admitted yet (idempotent)."""
+        if self.released:
+            return
+        self.released = True
+        if self.admitted:
+            self.controller._release(self)
+        else:
+            # e.g. the client disconnected before the handler got to `wait()`
+            self.controller._withdraw(self)
+
+
+class AdmissionController:
+    """
+    Bounds concurrent chat turns and queues the rest with weighted-fair ordering per user.
+
+    Each turn gets a virtual start tag `max(virtual clock, user's last finish tag)` and a
+    finish tag `start + cost / weight`; a freed slot goes to the smallest finish tag, so a
+    user with many queued turns only gets their share while others are waiting. Turns are shed (OverloadedError -> 429) when the
+    queue or the user's share of it is full, when the model dispatcher is backed up, or
+    after waiting `max_wait`. Runs on the event loop only (no locking).
+    """
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 max_per_user: int = ADMISSION_MAX_PER_USER, max_wait: float = ADMISSION_MAX_WAIT,
+                 backlog=None, max_backlog: int = ADMISSION_MAX_MODEL_BACKLOG):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max_queue
+        self.max_per_user = max_per_user
+        self.max_wait = max_wait
+        self.backlog = backlog
+        self.max_backlog = max_backlog
+        self.in_flight = 0
+        self._heap = []             # (finish tag, seq, ticket)
+        self._queued = 0
+        self._queued_by_user = {}
+        self._last_tag = {}         # user -> finish tag of their latest turn
+        self._virtual = 0.0         # start tag of the turn admitted most recently
+        self._seq = itertools.count()
+        self._service_seconds = INITIAL_SERVICE_SECONDS
+        self._counters = {"admitted": 0, "queued": 0, "shed": 0, "max_queue_depth": 0}
+
+    def queue_depth(self) -> int:
+        return self._queued
+
+    def _retry_after(self) -> int:
+        backlog = (self._queued + 1) * self._service_seconds / self.max_in_flight
+        return int(min(60, max(1, math.ceil(backlog))))
+
+    def _shed(self, reason: str) -> OverloadedError:
+        self._counters["shed"] += 1
+        ADMISSION_SHED.inc(reason=reason)
+        return OverloadedError("The FinBot team is busy right now. Please try again shortly.",
+                               retry_after=self._retry_after(), reason=reason)
+
+    def enter(self, user_id: str, cost: float = 1.0, weight: float = 1.0) -> Ticket:
+        """
+        Takes a slot or a place in the queue for one turn (then `await ticket.wait()`).
+        Raises OverloadedError if the turn can't even be queued.
+        """
+        if self.backlog is not None and self.backlog() >= self.max_backlog:
+            raise self._shed("model_backlog")
+
+        start = max(self._virtual, self._last_tag.get(user_id, 0.0))
+        tag = start + cost / max(weight, 1e-6)
+        if self.in_flight < self.max_in_flight and not self._queued:
+            self.in_flight += 1
+            self._last_tag[user_id] = tag
+            self._virtual = start
+            self._counters["admitted"] += 1
+            ADMISSION_WAIT.observe(0.0)
+            return Ticket(self, user_id, start, tag, admitted=True)
+
+        if self._queued >= self.max_queue:
+            raise self._shed("queue_full")
+        if self._queued_by_user.get(user_id, 0) >= self.max_per_user:
+            raise self._shed("user_limit")
+
+        ticket = Ticket(self, user_id, start, tag, admitted=False)
+        self._last_tag[user_id] = tag
+        heapq.heappush(self._heap, (tag, next(self._seq), ticket))
+        self._queued += 1
+        self._queued_by_user[user_id] = self._queued_by_user.get(user_id, 0) + 1
+        self._counters["queued"] += 1
+        self._counters["max_queue_depth"] = max(self._counters["max_queue_depth"], self._queued)
+        return ticket
+
+    @asynccontextmanager
+    async def admit(self, user_id: str, cost: float = 1.0, weight: float = 1.0):
+        ticket = self.enter(user_id, cost, weight)
+        await ticket.wait()
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def _dequeued(self, ticket: Ticket):
+        self._queued -= 1
+        remaining = self._queued_by_user[ticket.user_id] - 1
+        if remaining:
+            self._queued_by_user[ticket.user_id] = remaining
+        else:
+            del self._queued_by_user[ticket.user_id]
+
+    def _withdraw(self, ticket: Ticket):
+        if not ticket.cancelled:
+            ticket.cancelled = True
+            self._dequeued(ticket)
+
+    def _release(self, ticket: Ticket):
+        held = time.monotonic() - ticket.admitted_at
+        self._service_seconds += SERVICE_EWMA_ALPHA * (held - self._service_seconds)
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        while self._heap and self.in_flight < self.max_in_flight:
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.cancelled:
+                continue
+            self._dequeued(ticket)
+            self.in_flight += 1
+            self._virtual = max(self._virtual, ticket.start)
+            ticket.admitted_at = time.monotonic()
+            ticket.future.set_result(None)
+            self._counters["admitted"] += 1
+            ADMISSION_WAIT.observe(ticket.admitted_at - ticket.created)
+
+        # Forget users whose last turn is behind the virtual clock (they'd start from it anyway)
+        if not self._heap:
+            self._last_tag = {u: t for u, t in self._last_tag.items() if t > self._virtual}
+
+    def stats(self) -> dict:
+        return dict(self._counters, in_flight=self.in_flight, capacity=self.max_in_flight,
+                    queue_depth=self._queued, queue_capacity=self.max_queue,
+                    users_waiting=len(self._queued_by_user),
+                    service_seconds=round(self._service_seconds, 3), retry_after=self._retry_after())
@@ -0,0 +1,171 @@
+# app/utils/bank_engine.py
+import os
+import re
+import time
+import difflib
+import threading
+import numpy as np
+
+# Define paths relative to this file
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RATES_CSV = os.path.join(BASE_DIR, "../data/bank_rates.csv")
+HEALTH_CSV = os.path.join(BASE_DIR, "../data/bank_health.csv")
+
+# How often (seconds) the CSV mtimes are re-checked for hot reload
+RELOAD_CHECK_INTERVAL = 2.0
+
+# Words that carry no identity when matching bank names
+_NAME_STOPWORDS = {"bank", "ltd", "limited", "the", "of", "and", "co", "corp", "corporation"}
+
+# Hand-maintained aliases that cannot be derived from the dataset names
+BANK_ALIASES = {
+    "state bank of india": "SBI",
+    "state bank": "SBI",
+    "kotak mahindra bank": "Kotak Mahindra",
+    "kotak bank": "Kotak Mahindra",
+}
+
+
+def normalize_bank_name(name: str) -> str:
+    """Lowercases, strips punctuation and generic words ('Bank', 'Ltd', ...)."""
+    words = re.sub(r"[^a-z0-9]+", " ", str(name).lower().replace("&", " and ")).split()
+    return " ".join(w for w in words if w not in _NAME_STOPWORDS)
+
+
+def _name_keys(name: str) -> list:
+    """All lookup keys for a canonical bank name: normalized, compact, acronym, first word."""
+    words = re.sub(r"[^a-z0-9]+", " ", name.lower()).split()
+    normalized = normalize_bank_name(name)
+    keys = [normalized, normalized.replace(" ", "")]
+    significant = [w for w in words if w not in ("of", "the", "and")]
+    if len(significant) >= 3:
+        keys.append("".join(w[0] for w in significant))
+    if normalized:
+        keys.append(normalized.split()[0])
+    return [k for k in keys if k]
+
+
+class BankSnapshot:
+    """
+    Immutable, fully indexed view of both CSVs. Replaced wholesale on reload.
+
+    - `offers` are the rate records pre-sorted by Min_Interest_Rate (cheapest first).
+    - The loan-amount interval index keeps the rows sorted by Min_Loan_Amount with their
+      Max_Loan_Amount alongside (O(n) memory, O(n log n) build). A lookup bisects to the rows
+      starting at or below the amount, keeps those whose range reaches it (one vectorized
+      comparison) and restores rate order by sorting the matching row numbers.
+    """
+
+    def __init__(self, rates_df: "pd.DataFrame", health_df: "pd.DataFrame", version: int):
+        self.version = version
+
+        # --- Rates (pre-sorted, stable so ties keep file order) ---
+        self.rates = rates_df.sort_values(by="Min_Interest_Rate", kind="mergesort").reset_index(drop=True)
+        self.offers = tuple(self.rates.to_dict(orient="records"))
+        # Read-only numeric columns (rate order) for vectorized tools
+        self.arrays = {}
+        for col in self.rates.select_dtypes(include="number").columns:
+            arr = self.rates[col].to_numpy(dtype=float, copy=True)
+            arr.setflags(write=False)
+            self.arrays[col] = arr
+
+        # Row numbers (rate order) sorted by range start, and the starts / ends in that order
+        self._by_start = np.argsort(self.arrays["Min_Loan_Amount"], kind="stable")
+        self._starts = self.arrays["Min_Loan_Amount"][self._by_start]
+        self._ends = self.arrays["Max_Loan_Amount"][self._by_start]
+
+        # --- Health (keyed by canonical name) + alias index ---
+        self.health = {row["Bank_Name"]: row for row in health_df.to_dict(orient="records")}
+
+        names = list(dict.fromkeys(list(self.health) + self.rates["Bank_Name"].tolist()))
+        self.name_index = {}
+        ambiguous = set()
+        for name in names:
+            for key in _name_keys(name):
+                if key in self.name_index and self.name_index[key] != name:
+                    ambiguous.add(key)
+                self.name_index.setdefault(key, name)
+        for key in ambiguous:
+            del self.name_index[key]
+        for alias, name in BANK_ALIASES.items():
+            if name in names:
+                self.name_index[normalize_bank_name(alias)] = name
+        self._keys = list(self.name_index)
+
+    def offers_for_amount(self, loan_amount: float) -> list:
+        """Offers whose [Min_Loan_Amount, Max_Loan_Amount] range contains `loan_amount`, cheapest first."""
+        if loan_amount <= 0:
+            return [dict(r) for r in self.offers]
+
+        # Ranges starting at or below the amount, then those that also reach it; row numbers are rate order
+        k = int(np.searchsorted(self._starts, loan_amount, side="right"))
+        rows = np.sort(self._by_start[:k][self._ends[:k] >= loan_amount])
+        return [dict(self.offers[j]) for j in rows.tolist()]
+
+    def resolve_bank(self, query: str):
+        """Maps a user-supplied bank name (alias, partial or misspelt) to its canonical name, or None."""
+        key = normalize_bank_name(query)
+        if not key:
+            return None
+
+        # 1. Exact alias / normalized hit
+        name = self.name_index.get(key) or self.name_index.get(key.replace(" ", ""))
+        if name:
+            return name
+
+        # 2. Partial name (e.g. "mahindra")
+        for k in self._keys:
+            if key in k:
+                return self.name_index[k]
+
+        # 3. Typos (e.g. "icci", "hfdc")
+        close = difflib.get_close_matches(key, self._keys, n=1, cutoff=0.75)
+        return self.name_index[close[0]] if close else None
+
+
+class BankDataEngine:
+    """
+    Loads the bank CSVs once and serves lookups from an in-memory `BankSnapshot`.
+    When a CSV's mtime changes the snapshot is rebuilt off to the side and swapped
+    in with a single reference assignment, so readers never see a half-built index.
+    """
+
+    def __init__(self, rates_path: str = RATES_CSV, health_path: str = HEALTH_CSV):
+        self.rates_path = rates_path
+        self.health_path = health_path
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._mtimes = None
+        self._next_check = 0.0
+
+    def _current_mtimes(self):
+        return (os.stat(self.rates_path).st_mtime_ns, os.stat(self.health_path).st_mtime_ns)
+
+    def _reload(self, mtimes):
+        import pandas as pd  # only needed to parse the CSVs; kept off the import path for fast startup
+        version = self._snapshot.version + 1 if self._snapshot else 1
+        snapshot = BankSnapshot(pd.read_csv(self.rates_path), pd.read_csv(self.health_path), version)
+        self._snapshot, self._mtimes = snapshot, mtimes
+
+    def snapshot(self) -> BankSnapshot:
+        now = time.monotonic()
+        if self._snapshot is not None and now < self._next_check:
+            return self._snapshot
+
+        with self._lock:
+            if self._snapshot is None or now >= self._next_check:
+                self._next_check = now + RELOAD_CHECK_INTERVAL
+                try:
+                    mtimes = self._current_mtimes()
+                    if mtimes != self._mtimes:
+                        self._reload(mtimes)
+                except Exception as e:
+                    # Keep serving the last good snapshot (e.g. file mid-write)
+                    if self._snapshot is None:
+                        raise
+                    print(f"Bank data reload failed, keeping version {self._snapshot.version}: {e}")
+        return self._snapshot
+
+
+# Shared engine used by the bank data tools
+bank_engine = BankDataEngine()
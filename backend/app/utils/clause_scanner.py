@@ -0,0 +1,166 @@
+# app/utils/clause_scanner.py
+"""
+Local pre-screen for the legal audit: finds the lexical risk markers the audit prompt asks
+about (hidden fees, processing charges, floating interest, foreclosure and default terms)
+in extracted text, with page and offset, and gives a preliminary risk score. Runs in
+milliseconds, so only the flagged passages need to go to the model.
+
+All phrases are compiled into one regex shaped like a character trie (alternatives sharing
+a prefix are tried once, so a position is rejected after a character or two, much like an
+Aho-Corasick automaton) and run in a single pass over lower-cased text; the matched phrase
+maps back to its category through a dict lookup keyed by casefolded phrase.
+"""
+import re
+
+# Category -> (weight toward the 0-100 score, phrases). Phrases are case-insensitive and
+# match across any whitespace (line breaks in extracted text); list spelling variants explicitly.
+RISK_CATEGORIES = {
+    "hidden_fees": (20, [
+        "hidden charges", "hidden charge", "hidden fees", "hidden fee", "other charges", "miscellaneous charges",
+        "administrative charges", "administrative fee", "administration fee", "documentation charges",
+        "documentation fee", "service charges", "service charge", "convenience fee", "handling charges",
+        "annual maintenance charges", "maintenance charges", "charges as applicable", "applicable charges",
+        "charges as may be levied", "charges as may be applicable", "non-maintenance charges",
+        "minimum balance charges", "legal charges", "valuation charges", "stamp duty", "insurance premium",
+    ]),
+    "processing_charges": (10, [
+        "processing fee", "processing fees", "processing charges", "processing charge", "login fee", "login charges",
+        "upfront fee", "upfront charges", "non-refundable", "non refundable",
+    ]),
+    "floating_interest": (15, [
+        "floating rate", "floating rate of interest", "floating interest", "floating interest rate", "variable rate",
+        "variable interest", "variable interest rate", "benchmark rate", "external benchmark", "repo linked",
+        "repo rate", "mclr", "eblr", "rllr", "reset period", "interest reset", "rate reset", "spread may be revised",
+        "rate of interest may be revised", "rate of interest may be changed", "interest rate may be revised",
+        "subject to change", "revised from time to time", "changed from time to time",
+    ]),
+    "foreclosure_prepayment": (20, [
+        "foreclosure charges", "foreclosure charge", "foreclosure fee", "foreclosure penalty", "foreclosure",
+        "prepayment penalty", "prepayment charges", "prepayment charge", "pre-payment penalty", "pre-payment charges",
+        "part prepayment charges", "part-prepayment charges", "pre-closure", "preclosure", "pre closure",
+        "lock-in period", "lock in period",
+    ]),
+    "default_penalty": (25, [
+        "penal interest", "penal charges", "penal charge", "penalty interest", "default interest",
+        "additional interest", "late payment charges", "late payment fee", "late payment penalty",
+        "overdue charges", "overdue interest", "bounce charges", "cheque bounce", "cheque return charges",
+        "dishonour charges", "emi bounce", "event of default", "events of default", "acceleration",
+        "recall the loan", "recall the entire loan", "cross default", "cross-default", "sarfaesi",
+        "right of set-off", "right of set off", "lien", "repossess", "repossession",
+    ]),
+    "discretionary_terms": (15, [
+        "sole discretion", "absolute discretion", "at its discretion", "without prior notice", "without notice",
+        "without assigning any reason", "unilaterally", "at any time without",
+    ]),
+}
+
+# Hits per category that earn the full weight (one hit earns half)
+FULL_WEIGHT_HITS = 3
+
+# Preliminary risk levels by score (same labels as the model's audit)
+HIGH_RISK_SCORE = 50
+MED_RISK_SCORE = 20
+
+# Passage around a hit: the enclosing sentence, capped at this many chars on each side.
+# Single line breaks don't end a sentence (extracted PDF text wraps lines); blank lines do.
+PASSAGE_CONTEXT = 240
+_SENTENCE_END = re.compile(r"[.!?]\s|\n\s*\n")
+
+
+def _trie_alternation(node: dict) -> str:
+    branches = []
+    for char in sorted(c for c in node if c):
+        child = node[char]
+        piece = r"\s+" if char == " " else re.escape(char)
+        rest = _trie_alternation(child)
+        if rest:
+            piece += f"(?:{rest})?" if "" in child else rest
+        branches.append(piece)
+    if len(branches) <= 1:
+        return "".join(branches)
+    return "(?:" + "|".join(branches) + ")"
+
+
+def _compile(categories: dict):
+    trie, lookup = {}, {}
+    for category, (_, phrases) in categories.items():
+        for phrase in phrases:
+            phrase = " ".join(phrase.casefold().split())
+            lookup[phrase] = category
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[""] = {}
+    # Whole words only; the optional tails are greedy, so the longest phrase at a position wins
+    pattern = r"(?<!\w)" + _trie_alternation(trie) + r"(?!\w)"
+    return re.compile(pattern), re.compile(pattern, re.IGNORECASE), lookup
+
+
+_PATTERN, _PATTERN_ANY_CASE, _LOOKUP = _compile(RISK_CATEGORIES)
+_WEIGHTS = {category: weight for category, (weight, _) in RISK_CATEGORIES.items()}
+
+
+def _passage_bounds(text: str, start: int, end: int) -> tuple:
+    """The sentence around [start, end), at most PASSAGE_CONTEXT chars either side."""
+    lo = max(0, start - PASSAGE_CONTEXT)
+    before = [m.end() for m in _SENTENCE_END.finditer(text, lo, start)]
+    left = before[-1] if before else lo
+    after = _SENTENCE_END.search(text, end, min(len(text), end + PASSAGE_CONTEXT))
+    right = after.start() + 1 if after else min(len(text), end + PASSAGE_CONTEXT)
+    return left, right
+
+
+def scan_page(text: str, page: int = 1) -> list:
+    """
+    Flagged clauses on one page: [{page, offset, categories, terms, passage, span}]. `offset` is
+    where the first term starts in the page text and `span` the passage's [start, end) there;
+    hits inside the same passage are merged into one clause.
+    """
+    clauses = []
+    lowered = text.lower()
+    # Matching lower-cased text is much faster than IGNORECASE; offsets only carry over if lower() kept the length
+    matches = _PATTERN.finditer(lowered) if len(lowered) == len(text) else _PATTERN_ANY_CASE.finditer(text)
+    for match in matches:
+        # IGNORECASE also matches Unicode case variants (e.g. "ſtamp duty"), which casefold() maps back
+        term = " ".join(match.group().casefold().split())
+        category = _LOOKUP.get(term)
+        if category is None:
+            continue
+        if clauses and match.start() < clauses[-1]["span"][1]:
+            clause = clauses[-1]
+            if category not in clause["categories"]:
+                clause["categories"].append(category)
+            clause["terms"].append(term)
+            continue
+        left, right = _passage_bounds(text, match.start(), match.end())
+        clauses.append({"page": page, "offset": match.start(), "categories": [category], "terms": [term], "span": (left, right)})
+    for clause in clauses:
+        clause["passage"] = " ".join(text[slice(*clause["span"])].split())
+    return clauses
+
+
+def score_clauses(clauses: list) -> tuple:
+    """Preliminary (score 0-100, risk level, hits per category) from flagged clauses."""
+    hits = {}
+    for clause in clauses:
+        for category in clause["categories"]:
+            hits[category] = hits.get(category, 0) + 1
+    score = 0.0
+    for category, count in hits.items():
+        score += _WEIGHTS[category] * min(1.0, 0.5 + 0.5 * (count - 1) / (FULL_WEIGHT_HITS - 1))
+    score = min(100, round(score))
+    level = "High" if score >= HIGH_RISK_SCORE else "Med" if score >= MED_RISK_SCORE else "Low"
+    return score, level, hits
+
+
+def clause_weight(clause: dict) -> int:
+    return max(_WEIGHTS[category] for category in clause["categories"])
+
+
+def scan_pages(pages: list) -> dict:
+    """Scans extracted pages (page 1 first): {score, risk_level, categories, clauses}."""
+    clauses = []
+    for number, text in enumerate(pages, start=1):
+        clauses.extend(scan_page(text, number))
+    score, level, hits = score_clauses(clauses)
+    return {"score": score, "risk_level": level, "categories": hits, "clauses": clauses}
@@ -0,0 +1,113 @@
+# app/utils/content_cache.py
+import os
+import json
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Persistent tier location (override with CONTENT_CACHE_PATH)
+CACHE_PATH = os.getenv("CONTENT_CACHE_PATH", os.path.join(".cache", "content_cache.sqlite3"))
+
+# Bounds for the in-memory LRU tier
+MEMORY_MAX_ITEMS = int(os.getenv("CONTENT_CACHE_MAX_ITEMS", "512"))
+MEMORY_MAX_BYTES = int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def content_hash(data: bytes) -> str:
+    """SHA-256 hex digest used as the content address of an uploaded file."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class ContentCache:
+    """
+    Two-tier cache for results derived from file contents (OCR text, audits, storage paths).
+
+    Keys are `(namespace, key)` where `key` is usually a SHA-256 of the file bytes.
+    Tier 1 is an in-process LRU bounded by item count and payload size.
+    Tier 2 is a local SQLite file so results survive restarts; hits there are promoted to tier 1.
+    Values must be JSON-serializable. Callers should only store successful results.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_items: int = MEMORY_MAX_ITEMS, max_bytes: int = MEMORY_MAX_BYTES):
+        self.path = path
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._lru = OrderedDict()
+        self._lru_bytes = 0
+        self._lock = threading.Lock()
+        self._db = None
+        self._counters = {}
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS cache (ns TEXT, key TEXT, value TEXT, PRIMARY KEY (ns, key))")
+        return self._db
+
+    def _count(self, namespace: str, outcome: str):
+        stats = self._counters.setdefault(namespace, {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0})
+        stats[outcome] += 1
+
+    def _remember(self, lru_key, payload: str):
+        if lru_key in self._lru:
+            self._lru_bytes -= len(self._lru.pop(lru_key))
+        self._lru[lru_key] = payload
+        self._lru_bytes += len(payload)
+        while self._lru and (len(self._lru) > self.max_items or self._lru_bytes > self.max_bytes):
+            _, evicted = self._lru.popitem(last=False)
+            self._lru_bytes -= len(evicted)
+
+    def get(self, namespace: str, key: str):
+        lru_key = (namespace, key)
+        with self._lock:
+            payload = self._lru.get(lru_key)
+            if payload is not None:
+                self._lru.move_to_end(lru_key)
+                self._count(namespace, "memory_hits")
+                return json.loads(payload)
+
+            try:
+                row = self._conn().execute("SELECT value FROM cache WHERE ns = ? AND key = ?", (namespace, key)).fetchone()
+            except Exception as e:
+                print(f"Content cache read error: {e}")
+                row = None
+
+            if row is None:
+                self._count(namespace, "misses")
+                return None
+
+            self._remember(lru_key, row[0])
+            self._count(namespace, "disk_hits")
+            return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value):
+        payload = json.dumps(value)
+        with self._lock:
+            self._remember((namespace, key), payload)
+            self._count(namespace, "writes")
+            try:
+                conn = self._conn()
+                conn.execute("INSERT OR REPLACE INTO cache (ns, key, value) VALUES (?, ?, ?)", (namespace, key, payload))
+                conn.commit()
+            except Exception as e:
+                print(f"Content cache write error: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {}
+            for ns, counts in self._counters.items():
+                lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+                hits = counts["memory_hits"] + counts["disk_hits"]
+                namespaces[ns] = dict(counts, hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+            return {
+                "memory_items": len(self._lru),
+                "memory_bytes": self._lru_bytes,
+                "namespaces": namespaces
+            }
+
+
+# Shared cache for OCR text, audit results and storage objects
+content_cache = ContentCache()
@@ -0,0 +1,102 @@
+# app/utils/context_window.py
+import os
+from app.utils.retrieval import estimate_tokens
+
+# Hard cap for everything sent on a turn (system instruction + tools + context + history + message)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "12000"))
+
+# Turns (user + model message pairs) always kept verbatim; older ones fold into the summary
+RECENT_TURNS = int(os.getenv("CONTEXT_RECENT_TURNS", "6"))
+SUMMARY_MAX_TOKENS = int(os.getenv("CONTEXT_SUMMARY_MAX_TOKENS", "600"))
+
+# Fold only once this many messages have aged out of the recent window (batches summarizer calls)
+FOLD_BATCH_MESSAGES = 4
+
+# Largest share of the free budget the per-turn context (profile, documents, excerpts, message) may take
+MAX_CONTEXT_SHARE = 0.5
+
+# Per-message overhead (role, part framing)
+_MESSAGE_OVERHEAD = 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[:max(max_tokens, 0) * 4] + "..."
+
+
+def to_gemini_history(messages: list) -> list:
+    history = []
+    for msg in messages:
+        role = "user" if msg["role"] == "user" else "model"
+        history.append({"role": role, "parts": [msg["content"]]})
+    return history
+
+
+def fold_range(messages: list):
+    """
+    `messages` are the un-summarized messages of a session. Returns how many of the oldest
+    should be folded into the summary, or None while fewer than FOLD_BATCH_MESSAGES have
+    aged out of the recent window.
+    """
+    end = len(messages) - RECENT_TURNS * 2
+    if end >= FOLD_BATCH_MESSAGES:
+        return end
+    return None
+
+
+class ContextWindow:
+    """
+    Assembles the prompt for one turn so it always fits `budget` tokens.
+
+    Priority: system instruction + tools (fixed) > user message > profile + summary >
+    retrieved excerpts > document list > history. Context is trimmed first (lowest-ranked
+    excerpts, then oldest documents) until it fits its share of the budget; the rest goes to
+    un-summarized history, newest messages first.
+    """
+
+    def __init__(self, fixed_tokens: int, budget: int = CONTEXT_TOKEN_BUDGET):
+        self.fixed_tokens = fixed_tokens
+        self.budget = budget
+
+    def fit(self, user_text: str, session: dict, context_data: dict, render):
+        """
+        `render(user_text, context_data)` must return the exact text that will be sent for this turn.
+        Returns (user_text, gemini_history, context_data), all trimmed to the budget.
+        """
+        available = self.budget - self.fixed_tokens
+        context_share = int(available * MAX_CONTEXT_SHARE)
+
+        context_data = dict(context_data or {})
+        if session.get("summary"):
+            context_data["summary"] = truncate_to_tokens(session["summary"], SUMMARY_MAX_TOKENS)
+        passages = list(context_data.get("passages") or [])
+        documents = sorted(context_data.get("documents") or [], key=lambda d: str(d.get("uploadedAt", "")), reverse=True)
+        context_data["passages"], context_data["documents"] = passages, documents
+
+        user_text = truncate_to_tokens(user_text, context_share // 2)
+        prompt_tokens = estimate_tokens(render(user_text, context_data))
+        while prompt_tokens > context_share and (passages or documents):
+            if passages:
+                passages.pop()
+            else:
+                documents.pop()
+            prompt_tokens = estimate_tokens(render(user_text, context_data))
+
+        # History: everything not yet folded into the summary, newest first, while it fits
+        remaining = available - prompt_tokens
+        messages = session.get("messages", [])
+        kept = []
+        for msg in reversed(messages):
+            cost = estimate_tokens(msg["content"]) + _MESSAGE_OVERHEAD
+            if cost > remaining:
+                break
+            remaining -= cost
+            kept.append(msg)
+        kept.reverse()
+
+        # Gemini history must open with a user turn
+        while kept and kept[0]["role"] != "user":
+            kept.pop(0)
+
+        return user_text, to_gemini_history(kept), context_data
@@ -1,17 +1,127 @@
 # app/utils/doc_parser.py
-from pypdf import PdfReader
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from io import BytesIO
 
-async def extract_text_from_pdf(file_bytes: bytes) -> str:
+# Page separator in extracted text (same convention as pdftotext)
+PAGE_BREAK = "\f"
+
+# A page needs at least this many letters/digits to count as having a usable text layer
+MIN_PAGE_CHARS = 40
+
+# Below this page count, extraction runs in-process (pool dispatch would cost more than it saves)
+PARALLEL_MIN_PAGES = 16
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # "spawn" keeps workers free of the parent's gRPC/Firebase threads
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drops a broken pool (a worker died, e.g. OOM) so the next large PDF starts a fresh one."""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pool():
+    """Stops the extraction workers (app shutdown)."""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _extract_page_range(file_bytes: bytes, start: int, stop: int) -> list:
+    """Worker: text of pages [start, stop). Failing pages yield "" so they fall through to OCR."""
+    from pypdf import PdfReader  # pypdf is imported on first use, not at startup
+    reader = PdfReader(BytesIO(file_bytes))
+    texts = []
+    for i in range(start, stop):
+        try:
+            texts.append(reader.pages[i].extract_text() or "")
+        except Exception:
+            texts.append("")
+    return texts
+
+
+def has_text_layer(text: str) -> bool:
+    return sum(ch.isalnum() for ch in text) >= MIN_PAGE_CHARS
+
+
+def extract_pdf_pages(file_bytes: bytes) -> list:
+    """
+    Extracts the text layer of every page, in order.
+    Large PDFs are split into contiguous page ranges across a process pool; if the pool is
+    broken it is replaced and this file is extracted in-process instead.
+    """
+    page_count = pdf_page_count(file_bytes)
+    if page_count < PARALLEL_MIN_PAGES or PDF_WORKERS <= 1:
+        return _extract_page_range(file_bytes, 0, page_count)
+
+    step = -(-page_count // PDF_WORKERS)
+    ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+    pool = _get_pool()
+    try:
+        futures = [pool.submit(_extract_page_range, file_bytes, start, stop) for start, stop in ranges]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+        return pages
+    except BrokenProcessPool as e:
+        print(f"PDF worker pool broken, restarting it and extracting in-process: {e}")
+        _discard_pool(pool)
+        return _extract_page_range(file_bytes, 0, page_count)
+
+
+def pdf_page_count(file_bytes: bytes) -> int:
+    from pypdf import PdfReader
+    return len(PdfReader(BytesIO(file_bytes)).pages)
+
+
+def _write_pages(reader, page_indexes) -> bytes:
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for i in page_indexes:
+        writer.add_page(reader.pages[i])
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+def build_pdf_subset(file_bytes: bytes, page_indexes: list) -> bytes:
+    """Returns a new PDF containing only `page_indexes` (0-based), for sending just those pages to OCR."""
+    from pypdf import PdfReader
+    return _write_pages(PdfReader(BytesIO(file_bytes)), page_indexes)
+
+
+def split_pdf(file_bytes: bytes, ranges: list) -> list:
+    """One new PDF per `(start, stop)` page range (0-based, stop exclusive), parsing the file once."""
+    from pypdf import PdfReader
+    reader = PdfReader(BytesIO(file_bytes))
+    return [_write_pages(reader, range(start, stop)) for start, stop in ranges]
+
+
+def extract_text_from_pdf(file_bytes: bytes) -> str:
     """
-    Extracts raw text from a PDF file in memory.
+    Extracts raw text from a PDF file in memory (text layer only, pages separated by PAGE_BREAK).
     """
     try:
-        pdf_file = BytesIO(file_bytes)
-        reader = PdfReader(pdf_file)
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text
+        return PAGE_BREAK.join(extract_pdf_pages(file_bytes))
     except Exception as e:
-        return f"Error reading PDF: {str(e)}"
\ No newline at end of file
+        return f"Error reading PDF: {str(e)}"
@@ -0,0 +1,155 @@
+# app/utils/intent_router.py
+import os
+import re
+
+# Set to 0 to send every message to the model
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "1") != "0"
+
+# Longer messages are almost always more than a bare calculation
+MAX_FAST_PATH_CHARS = 200
+
+_MULTIPLIERS = {
+    "k": 1e3, "thousand": 1e3,
+    "l": 1e5, "lac": 1e5, "lacs": 1e5, "lakh": 1e5, "lakhs": 1e5,
+    "m": 1e6, "mn": 1e6, "million": 1e6,
+    "cr": 1e7, "crs": 1e7, "crore": 1e7, "crores": 1e7,
+}
+
+_NUMBER = r"(\d+(?:,\d+)*(?:\.\d+)?)"
+_RATE = re.compile(_NUMBER + r"\s*(?:%|percent\b|per\s*cent\b)(?:\s*(?:p\.?\s*a\.?|per\s+annum|annual(?:ly)?|a\s+year|yearly))?")
+_TENURE = re.compile(_NUMBER + r"\s*(years?|yrs?|y|months?|mos?|mo)\b")
+_AMOUNT = re.compile(r"(?:₹|\brs\.?|\binr)?\s*" + _NUMBER + r"\s*(" + "|".join(sorted(_MULTIPLIERS, key=len, reverse=True)) + r")?\b")
+
+# Which tool a message is about; exactly one must match
+_INTENTS = {
+    "calculate_loan_emi": re.compile(r"\bemis?\b|\binstal+ments?\b"),
+    "calculate_sip": re.compile(r"\bsips?\b"),
+}
+
+# Everything left after the numbers are taken out must be one of these, otherwise the
+# message asks for something beyond the calculation (compare, prepay, eligibility...)
+_FILLER = set("""
+    a an the of for on at with in to by over per is are be will would what whats what's how much
+    i my me you your we can could please pls kindly tell show give find get calculate calc compute
+    check know want need if take taking borrow borrowing loan home car personal education housing
+    emi emis installment installments instalment instalments monthly month amount principal
+    rate interest roi tenure period duration term sip sips invest investing investment mutual fund
+    funds return returns maturity value corpus expected final total payable pay pm p m
+    rupees rupee inr rs ₹ - = ? , . : ! / about approx around
+""".split())
+
+_WORD = re.compile(r"[a-z₹']+|[?=/!:,.-]")
+
+# Sanity bounds; anything outside is left to the model to question
+_RATE_RANGE = (0.1, 50.0)
+_MAX_YEARS = 40
+_AMOUNT_RANGE = (100.0, 1e11)
+
+
+def parse_amount(number: str, unit: str = None) -> float:
+    """'50', 'lakh' -> 5000000.0. Handles Indian digit grouping ('5,00,000')."""
+    value = float(number.replace(",", ""))
+    return value * _MULTIPLIERS.get((unit or "").lower(), 1)
+
+
+def _take(pattern: re.Pattern, text: str):
+    matches = list(pattern.finditer(text))
+    return matches, pattern.sub(" ", text)
+
+
+def route(text: str):
+    """
+    Recognises a bare EMI / SIP calculation ("EMI for 50 lakh at 8.5% for 20 years",
+    "SIP of 10k for 15 years at 12%"). Returns (tool name, args) when the message is
+    unambiguous, else None so the turn goes to the model.
+    """
+    if not FAST_PATH_ENABLED or not text or len(text) > MAX_FAST_PATH_CHARS:
+        return None
+    text = text.lower()
+
+    intents = [name for name, pattern in _INTENTS.items() if pattern.search(text)]
+    if len(intents) != 1:
+        return None
+    tool = intents[0]
+
+    rates, rest = _take(_RATE, text)
+    tenures, rest = _take(_TENURE, rest)
+    amounts, rest = _take(_AMOUNT, rest)
+    if len(rates) != 1 or len(tenures) != 1 or len(amounts) != 1:
+        return None
+    if any(word not in _FILLER for word in _WORD.findall(rest)):
+        return None
+
+    rate = float(rates[0].group(1).replace(",", ""))
+    months = float(tenures[0].group(1).replace(",", ""))
+    if not tenures[0].group(2).startswith("m"):
+        months *= 12
+    amount = parse_amount(amounts[0].group(1), amounts[0].group(2))
+
+    if not (_RATE_RANGE[0] <= rate <= _RATE_RANGE[1]) or not (_AMOUNT_RANGE[0] <= amount <= _AMOUNT_RANGE[1]):
+        return None
+    # The tools take whole years; a fractional year passed on would price fractional periods
+    if months % 12 or not 12 <= months <= _MAX_YEARS * 12:
+        return None
+    years = int(months) // 12
+
+    if tool == "calculate_loan_emi":
+        return tool, {"principal": amount, "rate_of_interest": rate, "tenure_years": years}
+    return tool, {"monthly_investment": amount, "rate_of_interest": rate, "years": years}
+
+
+# --- Templated answers (in the Loan Advisor's voice, like the model would give them) ---
+
+def format_inr(value: float) -> str:
+    """12345678.4 -> '₹1,23,45,678' (Indian digit grouping, whole rupees)."""
+    digits = str(int(round(abs(value))))
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    grouped = ",".join(groups + [tail]) if groups else tail
+    return ("-₹" if value < 0 else "₹") + grouped
+
+
+def describe_amount(value: float) -> str:
+    """5000000 -> '₹50 lakh', 15000000 -> '₹1.5 crore', 25000 -> '₹25,000'."""
+    for unit, size in (("crore", 1e7), ("lakh", 1e5)):
+        if value >= size:
+            return f"₹{value / size:.2f}".rstrip("0").rstrip(".") + f" {unit}"
+    return format_inr(value)
+
+
+def _describe_tenure(years) -> str:
+    if years == int(years):
+        return f"{int(years)} year" + ("s" if years != 1 else "")
+    months = int(round(years * 12))
+    return f"{months} month" + ("s" if months != 1 else "")
+
+
+def _describe_rate(rate: float) -> str:
+    return f"{rate:g}%"
+
+
+def render(tool: str, args: dict, result: dict) -> str:
+    if tool == "calculate_loan_emi":
+        return (
+            f"Raj here, your Loan Advisor. For a loan of {describe_amount(args['principal'])} at "
+            f"{_describe_rate(args['rate_of_interest'])} p.a. over {_describe_tenure(args['tenure_years'])}:\n\n"
+            f"- **Monthly EMI:** {format_inr(result['monthly_emi'])}\n"
+            f"- **Total interest:** {format_inr(result['total_interest'])}\n"
+            f"- **Total payment:** {format_inr(result['total_payment'])}\n\n"
+            "Would you like me to compare current bank offers for this amount, or check how much you're eligible to borrow?"
+        )
+
+    return (
+        f"Raj here, your Loan Advisor. Investing {format_inr(args['monthly_investment'])} a month at an expected "
+        f"{_describe_rate(args['rate_of_interest'])} p.a. for {_describe_tenure(args['years'])}:\n\n"
+        f"- **Amount invested:** {format_inr(result['invested_amount'])}\n"
+        f"- **Estimated gains:** {format_inr(result['wealth_gained'])}\n"
+        f"- **Maturity value:** {format_inr(result['total_maturity_value'])}\n\n"
+        "Returns on market-linked investments aren't guaranteed, so treat this as an estimate. "
+        "Shall I try a different amount or tenure?"
+    )
@@ -0,0 +1,365 @@
+# app/utils/jobs.py
+import os
+import time
+import uuid
+import asyncio
+import json
+import hashlib
+import sqlite3
+import threading
+import contextvars
+import tempfile
+
+from app.utils.model_dispatcher import ModelUnavailableError
+
+# Documents processed at once (each holds its file in memory while Gemini reads it)
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Jobs accepted but not yet started; beyond this submitters are told to retry later
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "100"))
+
+# Finished jobs are kept this long for `/jobs/{id}`
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", "3600"))
+
+# Uploads are written here while they wait for a worker (deleted once processed)
+JOB_SPOOL_DIR = os.getenv("JOB_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "finbot-jobs"))
+
+# Job states are mirrored here so any worker process can answer `/jobs/{id}`
+JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", os.path.join(JOB_SPOOL_DIR, "jobs.sqlite3"))
+
+# How often a watcher re-reads a job that another worker is running
+JOB_POLL_INTERVAL = 0.5
+
+# Each process re-stamps its unfinished jobs in the store this often; a queued / running job
+# not stamped for JOB_STALE_SECONDS belongs to a worker that died (killed, OOM) and is reported failed
+JOB_HEARTBEAT_SECONDS = 10.0
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))
+
+# Retry hint for jobs lost to a worker restart (gunicorn `max_requests` recycling, deploys)
+JOB_INTERRUPTED_RETRY_AFTER = 5
+JOB_INTERRUPTED_ERROR = "The server restarted before this document was finished. Please upload it again."
+
+# Largest accepted upload; reading is chunked so a request never holds more than one chunk
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 * 1024)))
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+class UploadTooLargeError(Exception):
+    pass
+
+
+class QueueFullError(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SpooledUpload:
+    """An uploaded file written to disk, with its size and SHA-256 (computed while spooling)."""
+
+    def __init__(self, path: str, filename: str, content_type: str, size: int, digest: str):
+        self.path = path
+        self.filename = filename
+        self.content_type = content_type
+        self.size = size
+        self.digest = digest
+
+    def read(self) -> bytes:
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def discard(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+async def spool_upload(file, max_bytes: int = MAX_UPLOAD_BYTES) -> SpooledUpload:
+    """
+    Copies a FastAPI UploadFile to JOB_SPOOL_DIR chunk by chunk (disk writes run off the loop).
+    Raises UploadTooLargeError past `max_bytes`.
+    """
+    os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=JOB_SPOOL_DIR, suffix=".upload")
+    sha, size = hashlib.sha256(), 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(SPOOL_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+                sha.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return SpooledUpload(path, file.filename, file.content_type, size, sha.hexdigest())
+
+
+class JobStore:
+    """
+    Job states (the `to_dict()` form) in a local SQLite file shared by the worker processes
+    of one host. Writes are single small rows (WAL mode), cheap enough for the event loop.
+    """
+
+    def __init__(self, path: str = JOB_STORE_PATH):
+        self.path = path
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _conn(self):
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, finished INTEGER, updated_at REAL, data TEXT)")
+        return self._db
+
+    def save(self, state: dict):
+        try:
+            with self._lock:
+                conn = self._conn()
+                conn.execute("INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)",
+                             (state["job_id"], state["status"] in ("done", "failed"), state["updated_at"],
+                              json.dumps(state, default=str)))
+                conn.commit()
+        except Exception as e:
+            print(f"Job store write failed for {state['job_id']}: {e}")
+
+    def load(self, job_id: str):
+        """The stored state; an unfinished job whose owner stopped heartbeating comes back `failed`."""
+        try:
+            with self._lock:
+                row = self._conn().execute("SELECT data, finished, updated_at FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        except Exception as e:
+            print(f"Job store read failed for {job_id}: {e}")
+            return None
+        if row is None:
+            return None
+        state = json.loads(row[0])
+        if not row[1] and row[2] < time.time() - JOB_STALE_SECONDS:
+            state = dict(state, status="failed", stage="Interrupted", error=JOB_INTERRUPTED_ERROR,
+                         retry_after=JOB_INTERRUPTED_RETRY_AFTER)
+        return state
+
+    def touch(self, job_ids: list):
+        """Heartbeat: re-stamps the row times (not the states) of jobs this process still owns."""
+        if not job_ids:
+            return
+        try:
+            with self._lock:
+                conn = self._conn()
+                conn.executemany("UPDATE jobs SET updated_at = ? WHERE id = ? AND NOT finished",
+                                 [(time.time(), job_id) for job_id in job_ids])
+                conn.commit()
+        except Exception as e:
+            print(f"Job store heartbeat failed: {e}")
+
+    def prune(self, cutoff: float):
+        try:
+            with self._lock:
+                conn = self._conn()
+                conn.execute("DELETE FROM jobs WHERE finished AND updated_at < ?", (cutoff,))
+                conn.commit()
+        except Exception as e:
+            print(f"Job store prune failed: {e}")
+
+
+class Job:
+    def __init__(self, kind: str, store: JobStore = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"      # queued -> running -> done | failed
+        self.stage = "Waiting for a worker..."
+        self.result = None
+        self.error = None
+        self.retry_after = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.changed = asyncio.Event()
+        self.store = store
+        if store is not None:
+            store.save(self.to_dict())
+
+    def update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.updated_at = time.time()
+        if self.store is not None:
+            self.store.save(self.to_dict())
+        # Wake anyone watching, then re-arm for the next change
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        data = {"job_id": self.id, "kind": self.kind, "status": self.status, "stage": self.stage,
+                "created_at": self.created_at, "updated_at": self.updated_at}
+        if self.status == "done":
+            data["result"] = self.result
+        if self.status == "failed":
+            data["error"] = self.error
+            if self.retry_after is not None:
+                data["retry_after"] = self.retry_after
+        return data
+
+
+class JobQueue:
+    """
+    Runs document jobs in the background on a fixed number of workers.
+
+    `submit(kind, fn, *args)` returns a Job immediately; `fn(progress, *args)` is a blocking
+    function that runs in a worker thread and may call `progress("stage text")`. Its return
+    value becomes the job result. Finished jobs are kept for `retention` seconds.
+    States are mirrored to `store`, so jobs run by another worker process can be looked up too.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED, retention: float = JOB_RETENTION,
+                 store: JobStore = None):
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention = retention
+        self.store = store
+        self._queue = None
+        self._tasks = []
+        self._jobs = {}
+        self._counters = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0}
+
+    def _start(self):
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+        if self.store is not None:
+            self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            self.store.touch([j.id for j in self._jobs.values() if not j.finished()])
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished() and j.updated_at < cutoff]:
+            del self._jobs[job_id]
+        if self.store is not None:
+            self.store.prune(cutoff)
+
+    def queued(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def running(self) -> int:
+        return sum(1 for j in self._jobs.values() if j.status == "running")
+
+    async def submit(self, kind: str, fn, *args, cleanup=None) -> Job:
+        """Queues a job. `cleanup()` runs once it has finished (e.g. deleting the spooled file)."""
+        if self._queue is None:
+            self._start()
+        self._prune()
+        if self.queued() >= self.max_queued:
+            self._counters["rejected"] += 1
+            raise QueueFullError(f"{self.queued()} documents are already waiting; try again shortly.", retry_after=30)
+
+        job = Job(kind, self.store)
+        self._jobs[job.id] = job
+        self._counters["submitted"] += 1
+        self._queue.put_nowait((job, fn, args, cleanup))
+        return job
+
+    async def lookup(self, job_id: str):
+        """The job's current state, from this process or (if another worker runs it) the store."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        if self.store is not None:
+            return await asyncio.to_thread(self.store.load, job_id)
+        return None
+
+    async def watch(self, job_id: str):
+        """Yields the job's state now and after every change, until it finishes."""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            while True:
+                changed = job.changed
+                yield job.to_dict()
+                if job.finished():
+                    return
+                await changed.wait()
+
+        # Running in another worker: follow it through the store
+        last = None
+        while True:
+            state = await self.lookup(job_id)
+            if state is None:
+                return
+            if state != last:
+                yield state
+                last = state
+            if state["status"] in ("done", "failed"):
+                return
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, fn, args, cleanup = await self._queue.get()
+
+            def progress(stage: str, job=job):
+                # Called from the worker thread; job state is only touched on the loop
+                loop.call_soon_threadsafe(lambda: job.update(stage=stage))
+
+            job.update(status="running", stage="Processing...")
+            try:
+                # Fresh context: the worker task was started inside some request, whose trace it must not inherit
+                result = await asyncio.to_thread(contextvars.Context().run, fn, progress, *args)
+                job.update(status="done", stage="Complete", result=result)
+                self._counters["done"] += 1
+            except ModelUnavailableError as e:
+                job.update(status="failed", stage="Model unavailable", error=str(e), retry_after=e.retry_after)
+                self._counters["failed"] += 1
+            except Exception as e:
+                job.update(status="failed", stage="Failed", error=str(e))
+                self._counters["failed"] += 1
+            finally:
+                if cleanup is not None:
+                    await asyncio.to_thread(cleanup)
+                self._queue.task_done()
+
+    async def close(self):
+        """
+        Stops the workers (worker recycling, shutdown). Jobs that were queued or running here are
+        marked failed with a retry hint, so pollers on any worker stop waiting, and the spooled
+        files of queued jobs are deleted.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        cleanups = []
+        while self._queue is not None and not self._queue.empty():
+            _, _, _, cleanup = self._queue.get_nowait()
+            if cleanup is not None:
+                cleanups.append(cleanup)
+        for job in self._jobs.values():
+            if not job.finished():
+                job.update(status="failed", stage="Interrupted", error=JOB_INTERRUPTED_ERROR,
+                           retry_after=JOB_INTERRUPTED_RETRY_AFTER)
+                self._counters["failed"] += 1
+        for cleanup in cleanups:
+            try:
+                await asyncio.to_thread(cleanup)
+            except Exception as e:
+                print(f"Job cleanup failed: {e}")
+
+    def stats(self) -> dict:
+        return dict(self._counters, workers=self.workers, queued=self.queued(), running=self.running(),
+                    tracked=len(self._jobs))
+
+
+job_queue = JobQueue(store=JobStore())
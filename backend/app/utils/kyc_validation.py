@@ -0,0 +1,334 @@
+# app/utils/kyc_validation.py
+"""
+KYC field validation shared by the `submit_kyc_application` tool and the bulk endpoint
+(`/kyc/validate-bulk`). Validators are compiled once at import; each returns
+`(normalized value, None)` or `(None, error message)`.
+
+The bulk path parses CSV or NDJSON as it arrives and streams one result line per row,
+holding only the current chunk (constant memory for any batch size).
+"""
+import io
+import re
+import csv
+import json
+import codecs
+import asyncio
+from datetime import date
+from functools import lru_cache
+
+# --- Field validators ---
+
+# 5 letters (the 4th is the holder type), 4 digits, 1 check letter
+_PAN = re.compile(r"[A-Z]{5}[0-9]{4}[A-Z]")
+PAN_HOLDER_TYPES = {
+    "P": "Individual", "C": "Company", "H": "HUF", "F": "Firm", "A": "Association of Persons",
+    "T": "Trust", "B": "Body of Individuals", "L": "Local Authority", "J": "Artificial Juridical Person",
+    "G": "Government",
+}
+
+# UIDAI never issues Aadhaar numbers starting with 0 or 1; the last digit is a Verhoeff check digit
+_AADHAAR = re.compile(r"[2-9][0-9]{11}")
+
+# Indian mobile numbers start with 6-9; an optional +91 / 91 / 0 prefix is dropped
+_MOBILE = re.compile(r"(?:\+?91|0)?([6-9][0-9]{9})")
+
+_DOB = re.compile(r"([0-9]{1,2})[-/.]([0-9]{1,2})[-/.]([0-9]{4})")
+_NAME = re.compile(r"[^\W\d_]+(?:[ ,.'-]+[^\W\d_]+)*\.?")
+
+# Separators people type inside numbers ("2345 6789 0124", "98765-43210")
+_SEPARATORS = str.maketrans("", "", " -")
+
+MIN_AGE = 18
+MAX_AGE = 120
+
+# Verhoeff: multiplication table of the dihedral group D5 and the position permutation
+_VERHOEFF_D = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 2, 3, 4, 0, 6, 7, 8, 9, 5), (2, 3, 4, 0, 1, 7, 8, 9, 5, 6),
+    (3, 4, 0, 1, 2, 8, 9, 5, 6, 7), (4, 0, 1, 2, 3, 9, 5, 6, 7, 8), (5, 9, 8, 7, 6, 0, 4, 3, 2, 1),
+    (6, 5, 9, 8, 7, 1, 0, 4, 3, 2), (7, 6, 5, 9, 8, 2, 1, 0, 4, 3), (8, 7, 6, 5, 9, 3, 2, 1, 0, 4),
+    (9, 8, 7, 6, 5, 4, 3, 2, 1, 0),
+)
+_VERHOEFF_P = (
+    (0, 1, 2, 3, 4, 5, 6, 7, 8, 9), (1, 5, 7, 6, 2, 8, 3, 0, 9, 4), (5, 8, 0, 3, 7, 9, 6, 1, 4, 2),
+    (8, 9, 1, 6, 0, 4, 3, 5, 2, 7), (9, 4, 5, 3, 1, 2, 6, 8, 7, 0), (4, 2, 8, 6, 5, 7, 3, 9, 0, 1),
+    (2, 7, 9, 3, 8, 0, 6, 4, 1, 5), (7, 0, 4, 6, 9, 1, 3, 2, 5, 8),
+)
+# Both tables folded per position (counted from the right) and keyed by the digit's character:
+# one dict lookup per digit
+_VERHOEFF_STEPS = tuple(
+    tuple({str(digit): _VERHOEFF_D[check][_VERHOEFF_P[position % 8][digit]] for digit in range(10)} for check in range(10))
+    for position in range(12)
+)
+
+PAN_ERROR = "Invalid PAN format. It should be 5 letters, 4 numbers, 1 letter (e.g., ABCPE1234F)."
+PAN_HOLDER_ERROR = "Invalid PAN. The 4th letter must be a holder type (P for individuals, C for companies, etc.)."
+AADHAAR_ERROR = "Invalid Aadhaar. It must be exactly 12 digits."
+AADHAAR_CHECKSUM_ERROR = "Invalid Aadhaar. The number fails the checksum; please re-check the digits."
+MOBILE_ERROR = "Invalid Mobile Number. It must be 10 digits."
+DOB_ERROR = "Invalid Date of Birth. Use DD-MM-YYYY (e.g., 12-04-1990)."
+AGE_ERROR = f"Invalid Date of Birth. The applicant must be between {MIN_AGE} and {MAX_AGE} years old."
+NAME_ERROR = "Invalid Name. Use letters only, as on the PAN card."
+MISSING_ERROR = "This field is required."
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
+
+
+def verhoeff_valid(digits: str) -> bool:
+    """Verhoeff check over a 12-digit string (check digit last)."""
+    check = 0
+    for steps, char in zip(_VERHOEFF_STEPS, reversed(digits)):
+        check = steps[check][char]
+    return check == 0
+
+
+def validate_pan(value):
+    pan = _text(value).upper()
+    if not _PAN.fullmatch(pan):
+        return None, PAN_ERROR
+    if pan[3] not in PAN_HOLDER_TYPES:
+        return None, PAN_HOLDER_ERROR
+    return pan, None
+
+
+def validate_aadhaar(value):
+    number = _text(value).translate(_SEPARATORS)
+    if not (len(number) == 12 and number.isdigit()):
+        return None, AADHAAR_ERROR
+    if not _AADHAAR.fullmatch(number) or not verhoeff_valid(number):
+        return None, AADHAAR_CHECKSUM_ERROR
+    return number, None
+
+
+def validate_mobile(value):
+    match = _MOBILE.fullmatch(_text(value).translate(_SEPARATORS))
+    if not match:
+        return None, MOBILE_ERROR
+    return match.group(1), None
+
+
+def validate_dob(value, today: date = None):
+    match = _DOB.fullmatch(_text(value))
+    if not match:
+        return None, DOB_ERROR
+    day, month, year = (int(part) for part in match.groups())
+    try:
+        born = date(year, month, day)
+    except ValueError:
+        return None, DOB_ERROR
+    today = today or date.today()
+    age = today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+    if not MIN_AGE <= age <= MAX_AGE:
+        return None, AGE_ERROR
+    return f"{day:02d}-{month:02d}-{year}", None
+
+
+def validate_name(value):
+    name = " ".join(_text(value).split())
+    if not _NAME.fullmatch(name):
+        return None, NAME_ERROR
+    return name, None
+
+
+# Field -> validator, in the order errors are reported
+VALIDATORS = {
+    "full_name": validate_name,
+    "pan_number": validate_pan,
+    "aadhaar_number": validate_aadhaar,
+    "mobile": validate_mobile,
+    "dob": validate_dob,
+}
+
+
+def validate_kyc(record: dict, today: date = None) -> tuple:
+    """Validates one applicant. Returns (normalized fields, {field: error message})."""
+    normalized, errors = {}, {}
+    for field, validator in VALIDATORS.items():
+        value = record.get(field)
+        if value is None or value == "":
+            errors[field] = MISSING_ERROR
+            continue
+        result, error = validate_dob(value, today) if field == "dob" else validator(value)
+        if error:
+            errors[field] = error
+        else:
+            normalized[field] = result
+    return normalized, errors
+
+
+# --- Bulk validation ---
+
+# Column names partners use -> our field names ("ref" is echoed back to match results to rows)
+FIELD_ALIASES = {
+    "full_name": "full_name", "name": "full_name", "applicant_name": "full_name",
+    "pan_number": "pan_number", "pan": "pan_number", "pan_no": "pan_number",
+    "aadhaar_number": "aadhaar_number", "aadhaar": "aadhaar_number", "aadhar": "aadhaar_number", "aadhaar_no": "aadhaar_number", "uid": "aadhaar_number",
+    "mobile": "mobile", "mobile_number": "mobile", "phone": "mobile", "mobile_no": "mobile",
+    "dob": "dob", "date_of_birth": "dob", "birth_date": "dob",
+    "ref": "ref", "id": "ref", "reference": "ref", "row_id": "ref", "application_id": "ref",
+}
+
+# Bytes read per step; results for one step are produced before more input is read
+BULK_CHUNK_BYTES = 64 * 1024
+
+# A single row longer than this is rejected (bounds memory on input without line breaks)
+MAX_ROW_BYTES = 64 * 1024
+
+BULK_FORMATS = ("csv", "ndjson")
+
+
+class BulkFormatError(ValueError):
+    """The upload can't be read as the declared format (e.g. no CSV header)."""
+
+
+# Every NDJSON row repeats its keys
+@lru_cache(maxsize=256)
+def _field_name(column) -> str:
+    key = _text(column).lower().replace(" ", "_").replace("-", "_")
+    return FIELD_ALIASES.get(key, key)
+
+
+def _row_result(row: int, record: dict, today: date) -> dict:
+    _, errors = validate_kyc(record, today)
+    result = {"row": row}
+    if record.get("ref") not in (None, ""):
+        result["ref"] = record["ref"]
+    result["valid"], result["errors"] = not errors, errors
+    return result
+
+
+class _Summary:
+    def __init__(self):
+        self.rows = 0
+        self.valid = 0
+        self.errors_by_field = {}
+
+    def add(self, result: dict):
+        self.rows += 1
+        if result["valid"]:
+            self.valid += 1
+        for field in result["errors"]:
+            self.errors_by_field[field] = self.errors_by_field.get(field, 0) + 1
+
+    def to_dict(self) -> dict:
+        return {"rows": self.rows, "valid": self.valid, "invalid": self.rows - self.valid,
+                "errors_by_field": dict(sorted(self.errors_by_field.items()))}
+
+
+class _CsvRows:
+    """Turns text chunks into complete CSV records (quoted fields may span lines and chunks)."""
+
+    def __init__(self):
+        self.header = None
+        self._pending = ""      # text of an unfinished record
+        self._quoted = False    # inside a quoted field at the end of `_pending`
+
+    def feed(self, text: str, final: bool = False) -> list:
+        lines = (self._pending + text).split("\n")
+        self._pending = "" if final else lines.pop()
+        records, current = [], []
+        for line in lines:
+            current.append(line)
+            # A doubled quote toggles twice, so parity tracks whether we're inside a quoted field
+            if line.count('"') % 2:
+                self._quoted = not self._quoted
+            if not self._quoted:
+                records.append("\n".join(current))
+                current = []
+        if current:
+            # Record still open: keep it for the next chunk
+            self._pending = "\n".join(current) + ("\n" + self._pending if not final else "")
+            self._quoted = False
+            if final:
+                records.append(self._pending)
+                self._pending = ""
+        if len(self._pending) > MAX_ROW_BYTES:
+            raise BulkFormatError(f"A CSV row is longer than {MAX_ROW_BYTES} bytes (unbalanced quotes?).")
+
+        rows = []
+        for values in csv.reader(records):
+            if not values or not any(v.strip() for v in values):
+                continue
+            if self.header is None:
+                self.header = [_field_name(v) for v in values]
+                continue
+            rows.append(dict(zip(self.header, values)))
+        return rows
+
+
+class _NdjsonRows:
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text: str, final: bool = False) -> list:
+        lines = (self._pending + text).split("\n")
+        self._pending = "" if final else lines.pop()
+        if len(self._pending) > MAX_ROW_BYTES:
+            raise BulkFormatError(f"An NDJSON line is longer than {MAX_ROW_BYTES} bytes.")
+        rows = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                rows.append(None)   # reported as an unreadable row
+                continue
+            rows.append({_field_name(k): v for k, v in record.items()})
+        return rows
+
+
+def _validate_rows(rows: list, first_row: int, summary: _Summary, today: date) -> bytes:
+    out = io.StringIO()
+    for offset, record in enumerate(rows):
+        if record is None:
+            result = {"row": first_row + offset, "valid": False, "errors": {"row": "Not a JSON object."}}
+        else:
+            result = _row_result(first_row + offset, record, today)
+        summary.add(result)
+        out.write(json.dumps(result, ensure_ascii=False))
+        out.write("\n")
+    return out.getvalue().encode()
+
+
+async def validate_stream(chunks, fmt: str, chunk_bytes: int = BULK_CHUNK_BYTES):
+    """
+    Validates a CSV (header row first) or NDJSON upload as it arrives. Yields NDJSON bytes:
+    one `{row, ref?, valid, errors}` line per record (rows numbered from 1, excluding the CSV
+    header), then a final `{"summary": {...}}` line. Parsing and validation run off the event
+    loop, one chunk at a time; nothing else is kept, so memory doesn't grow with the batch.
+    """
+    if fmt not in BULK_FORMATS:
+        raise BulkFormatError(f"Unsupported format {fmt!r}; use one of {', '.join(BULK_FORMATS)}.")
+    parser = _CsvRows() if fmt == "csv" else _NdjsonRows()
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    summary, today, next_row = _Summary(), date.today(), 1
+
+    def step(data: bytes, final: bool) -> tuple:
+        # Lines split on "\n" only: csv and json both accept the "\r" left by CRLF line ends
+        rows = parser.feed(decoder.decode(data, final), final)
+        return len(rows), _validate_rows(rows, next_row, summary, today)
+
+    buffer = bytearray()
+    try:
+        async for data in chunks:
+            buffer += data
+            if len(buffer) < chunk_bytes:
+                continue
+            count, out = await asyncio.to_thread(step, bytes(buffer), False)
+            buffer.clear()
+            next_row += count
+            if out:
+                yield out
+        count, out = await asyncio.to_thread(step, bytes(buffer), True)
+        if out:
+            yield out
+        if fmt == "csv" and parser.header is None:
+            raise BulkFormatError("The CSV has no header row.")
+    except BulkFormatError as e:
+        # Headers are long gone by now: report in-band, like the rows
+        yield (json.dumps({"error": str(e)}) + "\n").encode()
+    yield (json.dumps({"summary": summary.to_dict()}) + "\n").encode()
@@ -0,0 +1,41 @@
+# app/utils/lazy.py
+import asyncio
+import threading
+
+
+class Lazy:
+    """
+    An object built by `factory` on first use in the current process, then proxied
+    (`lazy.attr` -> `factory().attr`). Thread-safe; a factory that raises is retried on next use.
+
+    Keeps heavy SDK imports and client construction out of module import, so the server can
+    answer its health check before they finish (see app/utils/readiness.py). Also keeps network
+    clients out of a preloading master: gRPC channels don't survive fork(), so each worker
+    builds its own. Async code must use `await lazy.aget()`; attribute access would build on
+    the event loop.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+    def get(self):
+        if self._value is None:
+            with self._lock:
+                if self._value is None:
+                    self._value = self._factory()
+        return self._value
+
+    async def aget(self):
+        """`get()` for coroutines: a first build (or a wait on one in progress) runs off the event loop."""
+        if self._value is None:
+            return await asyncio.to_thread(self.get)
+        return self._value
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,115 @@
+# app/utils/loan_kernel.py
+import math
+import numpy as np
+
+# Guard for the HTTP/agent entry points (rate x tenure x principal cells)
+MAX_GRID_CELLS = 2_000_000
+
+# Longest schedule we build: retail loans in India top out at 30-40 years, and the month arrays
+# (and (1+r)^n, which overflows for long terms) grow with the tenure
+MAX_TENURE_YEARS = 40
+
+
+def emi_kernel(principal, annual_rate, tenure_months):
+    """
+    Shared EMI formula: EMI = P * r * (1+r)^n / ((1+r)^n - 1), with r = annual_rate / 1200.
+
+    Accepts scalars or NumPy arrays and broadcasts them, so one call can price a single
+    loan or a whole sweep. Written as P * r / (1 - (1+r)^-n) via log1p/expm1, which is
+    one transcendental pair per cell and stays accurate for tiny rates. A 0% rate falls
+    back to straight-line repayment (P / n). Plain scalars skip NumPy entirely.
+    """
+    if np.isscalar(principal) and np.isscalar(annual_rate) and np.isscalar(tenure_months):
+        r = annual_rate / 1200.0
+        if r > 0:
+            return principal * r / -math.expm1(-tenure_months * math.log1p(r))
+        return principal / tenure_months
+
+    p = np.asarray(principal, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 1200.0
+    n = np.asarray(tenure_months, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        emi = p * r / -np.expm1(-n * np.log1p(r))
+        return np.where(r > 0, emi, p / n)
+
+
+def max_principal_kernel(emi, annual_rate, tenure_months):
+    """
+    Closed-form inverse of `emi_kernel`: the largest principal a given EMI can service,
+    P = EMI * (1 - (1+r)^-n) / r (or EMI * n at 0%). Broadcasts like `emi_kernel`.
+    """
+    e = np.asarray(emi, dtype=float)
+    r = np.asarray(annual_rate, dtype=float) / 1200.0
+    n = np.asarray(tenure_months, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        principal = e * -np.expm1(-n * np.log1p(r)) / r
+        return np.where(r > 0, principal, e * n)
+
+
+def emi_grid(principals, annual_rates, tenure_years) -> np.ndarray:
+    """EMIs for every (principal, rate, tenure) combination, shape (len(P), len(R), len(T))."""
+    p = np.asarray(principals, dtype=float)[:, None, None]
+    r = np.asarray(annual_rates, dtype=float)[None, :, None]
+    n = np.asarray(tenure_years, dtype=float)[None, None, :] * 12
+    return emi_kernel(p, r, n)
+
+
+def amortization_schedule(principal: float, annual_rate: float, tenure_years: float) -> dict:
+    """
+    Month-by-month schedule computed in one vectorized pass (no running loop):
+    balance_k = P(1+r)^k - EMI * ((1+r)^k - 1) / r.
+    Returns NumPy columns keyed by name.
+    """
+    n = int(round(tenure_years * 12))
+    if not 1 <= n <= MAX_TENURE_YEARS * 12:
+        raise ValueError(f"Tenure must be between 1 month and {MAX_TENURE_YEARS} years.")
+    r = annual_rate / 1200.0
+    emi = float(emi_kernel(principal, annual_rate, n))
+    months = np.arange(1, n + 1)
+
+    if r > 0:
+        growth = np.power(1 + r, np.arange(0, n + 1))
+        balance = principal * growth - emi * (growth - 1) / r
+    else:
+        balance = principal - emi * np.arange(0, n + 1)
+    balance = np.maximum(balance, 0.0)
+    balance[-1] = 0.0
+
+    interest = balance[:-1] * r
+    principal_paid = emi - interest
+
+    return {
+        "month": months,
+        "emi": np.full(n, emi),
+        "interest": interest,
+        "principal": principal_paid,
+        "balance": balance[1:],
+    }
+
+
+def yearly_summary(schedule: dict) -> dict:
+    """Collapses a monthly schedule into per-year totals (closing balance per year)."""
+    months = schedule["month"]
+    years = (months - 1) // 12 + 1
+    edges = np.flatnonzero(np.diff(years)) + 1
+    starts = np.concatenate([[0], edges])
+    ends = np.concatenate([edges, [len(months)]]) - 1
+
+    return {
+        "year": years[starts],
+        "emi_paid": np.add.reduceat(schedule["emi"], starts),
+        "interest": np.add.reduceat(schedule["interest"], starts),
+        "principal": np.add.reduceat(schedule["principal"], starts),
+        "balance": schedule["balance"][ends],
+    }
+
+
+def to_columns(columns: dict, decimals: int = 2) -> dict:
+    """Compact columnar JSON: {"columns": [...], "data": {name: [values]}} with rounded floats."""
+    data = {}
+    for name, values in columns.items():
+        values = np.asarray(values)
+        data[name] = (np.round(values, decimals) if values.dtype.kind == "f" else values).tolist()
+    return {"columns": list(columns), "rows": len(next(iter(data.values()), [])), "data": data}
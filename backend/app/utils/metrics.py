@@ -0,0 +1,126 @@
+# app/utils/metrics.py
+import bisect
+import threading
+
+# Seconds; covers in-process work (ms) up to slow model/OCR calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_registry = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram, keyed by label values. Thread-safe."""
+
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}   # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(series)) for key, series in self._series.items()]
+        for key, series in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + (bound,))} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + ('+Inf',))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines += [f"{self.name}{_labels(self.label_names, key)} {value}" for key, value in items]
+        return lines
+
+
+class Gauge:
+    """Read at scrape time from `fn() -> number` or `fn() -> {label value: number}` (with one label)."""
+
+    def __init__(self, name: str, help_text: str, fn, label: str = None):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.label = label
+        _registry.append(self)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.fn()
+        except Exception:
+            return lines
+        if self.label:
+            lines += [f"{self.name}{_labels((self.label,), (k,))} {v}" for k, v in sorted(value.items())]
+        else:
+            lines.append(f"{self.name} {value}")
+        return lines
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition (format 0.0.4) of every registered metric."""
+    lines = []
+    for metric in _registry:
+        lines += metric.render()
+    return "\n".join(lines) + "\n"
+
+
+# --- Shared metrics ---
+HTTP_DURATION = Histogram("finbot_http_request_duration_seconds", "HTTP request latency (until the response body is sent).",
+                          ("method", "route", "status"))
+STAGE_DURATION = Histogram("finbot_stage_duration_seconds", "Duration of request pipeline stages and spans.",
+                           ("stage", "detail"))
+FAST_PATH_TURNS = Counter("finbot_fast_path_turns_total", "Chat turns answered by the deterministic router (no model call).", ("tool",))
+RESPONSE_CACHE_LOOKUPS = Counter("finbot_response_cache_lookups_total", "Generic-question reply cache lookups by result.", ("result",))
+TOOL_ERRORS = Counter("finbot_tool_errors_total", "Tool executions that returned an error.", ("tool",))
+MODEL_QUEUE_WAIT = Histogram("finbot_model_queue_wait_seconds", "Time Gemini calls waited for the rate limiter and a slot.",
+                             ("label",))
+MODEL_CALL_DURATION = Histogram("finbot_model_call_duration_seconds", "Gemini call time (successful attempts).", ("label",))
+MODEL_CALL_ERRORS = Counter("finbot_model_call_errors_total", "Gemini call errors by kind (transient, failure).", ("label", "kind"))
+ADMISSION_WAIT = Histogram("finbot_admission_wait_seconds", "Time chat turns waited for an admission slot.")
+ADMISSION_SHED = Counter("finbot_admission_shed_total", "Chat turns rejected with 429 by admission control.", ("reason",))
+WRITE_BATCH_DURATION = Histogram("finbot_write_batch_seconds", "Write-behind batch write latency.", ("queue",))
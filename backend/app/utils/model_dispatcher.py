@@ -0,0 +1,276 @@
+# app/utils/model_dispatcher.py
+import os
+import time
+import random
+import asyncio
+import threading
+from collections import deque
+from google.api_core import exceptions as api_exceptions
+from app.utils.metrics import MODEL_QUEUE_WAIT, MODEL_CALL_DURATION, MODEL_CALL_ERRORS
+
+# Quota: requests per minute (token refill rate) and how many may go out back-to-back
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "10"))
+
+# Model calls in flight at once (across chat, summaries, OCR and audits)
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+
+# Per-attempt deadline (for streams: time to first chunk and between chunks)
+GEMINI_CALL_TIMEOUT = float(os.getenv("GEMINI_CALL_TIMEOUT", "60"))
+
+# Transient failures are retried with full-jitter exponential backoff
+GEMINI_MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# 429 / 5xx from Gemini, plus our own deadline
+TRANSIENT_ERRORS = (
+    api_exceptions.TooManyRequests,
+    api_exceptions.ServiceUnavailable,
+    api_exceptions.InternalServerError,
+    api_exceptions.GatewayTimeout,
+    api_exceptions.DeadlineExceeded,
+    TimeoutError,
+    asyncio.TimeoutError,
+)
+
+
+class ModelUnavailableError(Exception):
+    """Gemini stayed rate-limited/unavailable through every retry. `retry_after` is a hint in seconds."""
+
+    def __init__(self, message: str, retry_after: float = BACKOFF_MAX):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Thread-safe token bucket. `reserve()` takes a token and returns how long to wait for it."""
+
+    def __init__(self, rate_per_sec: float, burst: int):
+        self.rate = rate_per_sec
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class ConcurrencyLimiter:
+    """
+    FIFO slot limiter usable from both the event loop and worker threads
+    (async waiters park on a future, thread waiters on an Event).
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.waiters = deque()
+        self.lock = threading.Lock()
+
+    def _try_acquire(self, waiter) -> bool:
+        with self.lock:
+            if self.in_use < self.limit and not self.waiters:
+                self.in_use += 1
+                return True
+            self.waiters.append(waiter)
+            return False
+
+    def _cancel(self, waiter) -> bool:
+        """Removes a waiter that gave up. False if it was already handed a slot."""
+        with self.lock:
+            try:
+                self.waiters.remove(waiter)
+                return True
+            except ValueError:
+                return False
+
+    def acquire(self):
+        event = threading.Event()
+        if not self._try_acquire(("thread", event)):
+            event.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = ("async", (loop, future))
+        if self._try_acquire(waiter):
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            if not self._cancel(waiter):
+                self.release()
+            raise
+
+    def release(self):
+        with self.lock:
+            if not self.waiters:
+                self.in_use -= 1
+                return
+            # Hand the slot straight to the next waiter (in_use stays the same)
+            kind, target = self.waiters.popleft()
+        if kind == "thread":
+            target.set()
+        else:
+            loop, future = target
+            loop.call_soon_threadsafe(_resolve, future)
+
+    def waiting(self) -> int:
+        return len(self.waiters)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+class ModelDispatcher:
+    """
+    Single gate for Gemini traffic: rate limit (token bucket) -> concurrency slot -> call with a deadline,
+    retrying transient errors (429/5xx/timeouts) with jittered exponential backoff.
+
+    `call` is for blocking SDK calls (from worker threads), `acall` for coroutines and `astream`
+    for streamed responses (the slot is held until the stream is drained; only failures before
+    the first chunk are retried, since nothing has reached the user yet).
+    Each wrapped SDK function receives `request_options={"timeout": ...}`.
+    Metrics split queue wait (limiter + slot) from model time, per call label.
+    """
+
+    def __init__(self, rpm: float = GEMINI_RPM, burst: int = GEMINI_BURST,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY, timeout: float = GEMINI_CALL_TIMEOUT,
+                 max_retries: int = GEMINI_MAX_RETRIES):
+        self.bucket = TokenBucket(rpm / 60.0, burst)
+        self.slots = ConcurrencyLimiter(max_concurrency)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _record(self, label: str, **values):
+        if "model_ms" in values:
+            MODEL_QUEUE_WAIT.observe(values["queue_wait_ms"] / 1000, label=label)
+            MODEL_CALL_DURATION.observe(values["model_ms"] / 1000, label=label)
+        for kind in ("transient_errors", "failures"):
+            if values.get(kind):
+                MODEL_CALL_ERRORS.inc(values[kind], label=label, kind=kind)
+        with self._lock:
+            m = self._metrics.setdefault(label, {
+                "calls": 0, "transient_errors": 0, "failures": 0, "timeouts": 0,
+                "queue_wait_ms_total": 0.0, "queue_wait_ms_max": 0.0,
+                "model_ms_total": 0.0, "model_ms_max": 0.0,
+            })
+            for key, value in values.items():
+                if key.endswith("_ms"):
+                    m[f"{key}_total"] += value
+                    m[f"{key}_max"] = max(m[f"{key}_max"], value)
+                else:
+                    m[key] += value
+
+    def _options(self, kwargs: dict) -> dict:
+        return dict(kwargs, request_options={"timeout": self.timeout})
+
+    def _give_up(self, label: str, error: Exception):
+        self._record(label, failures=1)
+        raise ModelUnavailableError(f"Gemini unavailable ({label}): {error}", retry_after=BACKOFF_MAX) from error
+
+    # --- blocking ---
+    def call(self, label: str, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            queued = time.perf_counter()
+            time.sleep(self.bucket.reserve())
+            self.slots.acquire()
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **self._options(kwargs))
+                self._record(label, calls=1, queue_wait_ms=(started - queued) * 1000,
+                             model_ms=(time.perf_counter() - started) * 1000)
+                return result
+            except TRANSIENT_ERRORS as e:
+                self._record(label, transient_errors=1, timeouts=int(isinstance(e, (TimeoutError, api_exceptions.DeadlineExceeded))))
+                if attempt == self.max_retries:
+                    self._give_up(label, e)
+            finally:
+                self.slots.release()
+            time.sleep(_backoff(attempt))
+
+    # --- async ---
+    async def _acquire(self) -> float:
+        queued = time.perf_counter()
+        await asyncio.sleep(self.bucket.reserve())
+        await self.slots.acquire_async()
+        return (time.perf_counter() - queued) * 1000
+
+    async def acall(self, label: str, fn, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            wait_ms = await self._acquire()
+            started = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(fn(*args, **self._options(kwargs)), self.timeout)
+                self._record(label, calls=1, queue_wait_ms=wait_ms, model_ms=(time.perf_counter() - started) * 1000)
+                return result
+            except TRANSIENT_ERRORS as e:
+                self._record(label, transient_errors=1, timeouts=int(isinstance(e, (TimeoutError, asyncio.TimeoutError))))
+                if attempt == self.max_retries:
+                    self._give_up(label, e)
+            finally:
+                self.slots.release()
+            await asyncio.sleep(_backoff(attempt))
+
+    async def astream(self, label: str, fn, *args, **kwargs):
+        """Yields the chunks of `await fn(*args, stream=True, ...)`."""
+        for attempt in range(self.max_retries + 1):
+            wait_ms = await self._acquire()
+            started = time.perf_counter()
+            first_chunk = True
+            try:
+                response = await asyncio.wait_for(fn(*args, stream=True, **self._options(kwargs)), self.timeout)
+                chunks = response.__aiter__()
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout)
+                    except StopAsyncIteration:
+                        break
+                    first_chunk = False
+                    yield chunk
+                self._record(label, calls=1, queue_wait_ms=wait_ms, model_ms=(time.perf_counter() - started) * 1000)
+                return
+            except TRANSIENT_ERRORS as e:
+                self._record(label, transient_errors=1, timeouts=int(isinstance(e, (TimeoutError, asyncio.TimeoutError))))
+                if not first_chunk or attempt == self.max_retries:
+                    self._give_up(label, e)
+            finally:
+                self.slots.release()
+            await asyncio.sleep(_backoff(attempt))
+
+    def stats(self) -> dict:
+        with self._lock:
+            labels = {}
+            for label, m in self._metrics.items():
+                calls = m["calls"] or 1
+                labels[label] = dict(
+                    m,
+                    queue_wait_ms_avg=round(m["queue_wait_ms_total"] / calls, 2),
+                    model_ms_avg=round(m["model_ms_total"] / calls, 2),
+                )
+            return {
+                "in_flight": self.slots.in_use,
+                "waiting": self.slots.waiting(),
+                "max_concurrency": self.slots.limit,
+                "rpm": self.bucket.rate * 60,
+                "labels": labels,
+            }
+
+
+# Shared dispatcher for every Gemini call in this process
+model_dispatcher = ModelDispatcher()
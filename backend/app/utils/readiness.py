@@ -0,0 +1,62 @@
+# app/utils/readiness.py
+import time
+import asyncio
+
+# Backoff between attempts for a component that fails to warm (e.g. Firestore unreachable)
+WARM_RETRY_SECONDS = 2.0
+WARM_RETRY_MAX_SECONDS = 60.0
+
+
+class Readiness:
+    """
+    Slow-to-build dependencies (SDK imports, clients, reference data), warmed in the background
+    after startup so the liveness check (`/`) answers at once. `/ready` reports 503 until every
+    component is up. Requests that arrive earlier still work: they build what they need on first
+    use (see app/utils/lazy.py), they just pay for it.
+    """
+
+    def __init__(self):
+        self._components = {}
+        self._tasks = []
+        self._started = None
+
+    def add(self, name: str, warm):
+        """Registers a blocking callable that loads one component (run in a thread)."""
+        self._components[name] = {"warm": warm, "status": "pending", "seconds": None, "attempts": 0, "error": None}
+
+    def start(self):
+        """Starts warming every component concurrently. Call from the running event loop."""
+        self._started = time.perf_counter()
+        self._tasks = [asyncio.create_task(self._warm(name)) for name in self._components]
+
+    async def _warm(self, name: str):
+        component = self._components[name]
+        delay = WARM_RETRY_SECONDS
+        while True:
+            component["status"] = "warming"
+            component["attempts"] += 1
+            try:
+                await asyncio.to_thread(component["warm"])
+            except Exception as e:
+                component["status"], component["error"] = "failed", str(e)
+                print(f"⚠️ Warm-up of {name} failed (attempt {component['attempts']}), retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARM_RETRY_MAX_SECONDS)
+                continue
+            component["status"], component["error"] = "ready", None
+            component["seconds"] = round(time.perf_counter() - self._started, 3)
+            return
+
+    @property
+    def ready(self) -> bool:
+        return all(c["status"] == "ready" for c in self._components.values())
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+
+    def status(self) -> dict:
+        return {
+            "ready": self.ready,
+            "components": {name: {k: v for k, v in c.items() if k != "warm"} for name, c in self._components.items()},
+        }
@@ -0,0 +1,189 @@
+# app/utils/response_cache.py
+import os
+import re
+import time
+import threading
+from collections import OrderedDict
+
+from app.utils.metrics import RESPONSE_CACHE_LOOKUPS
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_MAX_ITEMS = int(os.getenv("RESPONSE_CACHE_MAX_ITEMS", "2000"))
+
+# Jaccard similarity (over word unigrams + bigrams) needed to reuse a reply for a reworded question
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.8"))
+
+# Long messages are rarely generic and make poor keys
+MAX_QUERY_CHARS = 300
+
+# The officers from the system instruction; whoever spoke last is handling the user
+PERSONAS = ("Eva", "Raj", "Sam", "Maya")
+DEFAULT_PERSONA = "Eva"
+
+# Words that tie a question to this user or to earlier turns ("my salary", "can I borrow", "what about it")
+_PERSONAL = {"i", "me", "my", "mine", "myself", "i'm", "im", "i've", "ive", "i'd", "i'll", "we", "us", "our",
+             "ours", "ourselves", "we're", "we've", "we'd", "we'll", "it", "this", "these", "those",
+             "them", "they", "above", "earlier", "previous", "again", "same"}
+
+# Dropped before fingerprinting, so "What is FOIR?" and "what's FOIR" share a key. Interrogatives
+# stay: "What is a home loan?" and "How do I get a home loan?" are different questions.
+_STOPWORDS = set("""
+    a an the is are was were be been am do does did can could would should will shall may might
+    please pls kindly tell me us you your i we
+    to of for in on at by with about explain define meaning mean means describe know understand
+    hi hello hey there some any get need needed required require
+""".split()) - {"no", "not", "without"}
+
+# Contracted interrogatives fingerprint like the plain word
+_INTERROGATIVES = {"whats": "what", "what's": "what", "hows": "how", "how's": "how", "whos": "who",
+                   "who's": "who", "wheres": "where", "where's": "where", "whens": "when", "when's": "when"}
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+_NUMERIC = re.compile(r"\d")
+
+
+def _stem(word: str) -> str:
+    for suffix, replacement in (("ing", ""), ("ed", ""), ("ies", "y"), ("s", "")):
+        if len(word) > len(suffix) + 3 and word.endswith(suffix) and not word.endswith("ss"):
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def tokenize(text: str) -> list:
+    return [_stem(_INTERROGATIVES.get(w, w)) for w in _TOKEN.findall(text.lower()) if w not in _STOPWORDS]
+
+
+def shingles(tokens: list) -> frozenset:
+    return frozenset(tokens) | frozenset(" ".join(pair) for pair in zip(tokens, tokens[1:]))
+
+
+def is_generic(text: str) -> bool:
+    """True if the question doesn't refer to the user's own details or to earlier turns."""
+    if not text or len(text) > MAX_QUERY_CHARS:
+        return False
+    words = _TOKEN.findall(text.lower())
+    return bool(words) and not any(w in _PERSONAL for w in words)
+
+
+def active_persona(messages: list) -> str:
+    """The officer who spoke last in the session (by the last name used in the latest model message)."""
+    for msg in reversed(messages or []):
+        if msg.get("role") != "user":
+            content = msg.get("content") or ""
+            found = [(content.rfind(name), name) for name in PERSONAS if name in content]
+            if found:
+                return max(found)[1]
+    return DEFAULT_PERSONA
+
+
+class ResponseCache:
+    """
+    Replies to generic questions, keyed by (persona, normalized question).
+
+    Lookups try the exact fingerprint first, then the most similar stored question for the same
+    persona (Jaccard over word shingles, found through an inverted index). Questions containing
+    numbers only match questions with the same numbers. Entries expire after `ttl` seconds and
+    the least recently used are evicted past `max_items`.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_items: int = RESPONSE_CACHE_MAX_ITEMS,
+                 threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.ttl = ttl
+        self.max_items = max_items
+        self.threshold = threshold
+        self._entries = OrderedDict()   # (persona, fingerprint) -> (expires_at, shingles, numbers, value)
+        self._index = {}                # (persona, shingle) -> {fingerprint}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    @staticmethod
+    def _key(text: str):
+        tokens = tokenize(text)
+        numbers = frozenset(t for t in tokens if _NUMERIC.search(t))
+        return " ".join(tokens), shingles(tokens), numbers
+
+    def _drop(self, key):
+        _, grams, _, _ = self._entries.pop(key)
+        persona, fingerprint = key
+        for gram in grams:
+            bucket = self._index.get((persona, gram))
+            if bucket is not None:
+                bucket.discard(fingerprint)
+                if not bucket:
+                    del self._index[(persona, gram)]
+
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._drop(key)
+            return None
+        return entry
+
+    def get(self, persona: str, text: str):
+        fingerprint, grams, numbers = self._key(text)
+        if not fingerprint:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live((persona, fingerprint), now)
+            if entry is not None:
+                self._entries.move_to_end((persona, fingerprint))
+                self._counters["hits"] += 1
+                RESPONSE_CACHE_LOOKUPS.inc(result="hit")
+                return entry[3]
+
+            candidates = set()
+            for gram in grams:
+                candidates |= self._index.get((persona, gram), set())
+
+            best, best_score = None, 0.0
+            for candidate in candidates:
+                entry = self._live((persona, candidate), now)
+                if entry is None or entry[2] != numbers:
+                    continue
+                score = len(grams & entry[1]) / len(grams | entry[1])
+                if score > best_score:
+                    best, best_score = candidate, score
+
+            if best is not None and best_score >= self.threshold:
+                self._entries.move_to_end((persona, best))
+                self._counters["near_hits"] += 1
+                RESPONSE_CACHE_LOOKUPS.inc(result="near_hit")
+                return self._entries[(persona, best)][3]
+
+            self._counters["misses"] += 1
+            RESPONSE_CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def put(self, persona: str, text: str, value):
+        fingerprint, grams, numbers = self._key(text)
+        if not fingerprint:
+            return
+        key = (persona, fingerprint)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, grams, numbers, value)
+            for gram in grams:
+                self._index.setdefault((persona, gram), set()).add(fingerprint)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_items:
+                self._drop(next(iter(self._entries)))
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._index.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._counters["hits"] + self._counters["near_hits"]
+            lookups = hits + self._counters["misses"]
+            return dict(self._counters, items=len(self._entries),
+                        hit_rate=round(hits / lookups, 3) if lookups else 0.0)
+
+
+response_cache = ResponseCache()
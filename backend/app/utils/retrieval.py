@@ -0,0 +1,185 @@
+# app/utils/retrieval.py
+import os
+import re
+import math
+import threading
+from collections import Counter, OrderedDict
+import numpy as np
+
+from app.utils.doc_parser import PAGE_BREAK
+
+# Chunking (in words) and BM25 parameters
+CHUNK_WORDS = 180
+CHUNK_OVERLAP = 30
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Defaults for what gets injected into a prompt
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "6"))
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", "1500"))
+
+# Users whose indexes stay resident
+RETRIEVAL_MAX_USERS = int(os.getenv("RETRIEVAL_MAX_USERS", "256"))
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "is", "are", "was", "be", "by",
+    "it", "this", "that", "with", "as", "at", "from", "my", "me", "i", "you", "your", "what", "how",
+}
+
+
+def tokenize(text: str) -> list:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap model-token estimate (~4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def chunk_document(text: str):
+    """Yields (page_number, chunk_text): overlapping word windows that never cross a page break."""
+    step = CHUNK_WORDS - CHUNK_OVERLAP
+    for page_number, page in enumerate(text.split(PAGE_BREAK), start=1):
+        words = page.split()
+        for start in range(0, len(words), step):
+            yield page_number, " ".join(words[start:start + CHUNK_WORDS])
+            if start + CHUNK_WORDS >= len(words):
+                break
+
+
+class UserDocumentIndex:
+    """
+    BM25 index over every chunk of one user's documents.
+    Postings are stored as NumPy arrays with the BM25 term weight precomputed,
+    so a query is one vectorized scatter-add per query term.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.chunks = []          # {"doc_id", "name", "page", "text"}
+        self._term_counts = []    # Counter per chunk
+        self.doc_ids = set()
+        self._doc_ordinals = {}   # doc_id -> small int, for fast scoping masks
+        self._postings = None     # term -> (chunk ids, weights); None = needs rebuild
+        self._chunk_doc = None
+
+    def add_document(self, doc_id: str, name: str, text: str):
+        if doc_id in self.doc_ids:
+            return
+        self.doc_ids.add(doc_id)
+        self._doc_ordinals[doc_id] = len(self._doc_ordinals)
+        for page, chunk in chunk_document(text or ""):
+            self.chunks.append({"doc_id": doc_id, "name": name, "page": page, "text": chunk})
+            self._term_counts.append(Counter(tokenize(chunk)))
+        self._postings = None
+
+    def _build(self):
+        n = len(self.chunks)
+        lengths = np.array([sum(c.values()) for c in self._term_counts], dtype=np.float32)
+        avg_len = float(lengths.mean()) if n else 1.0
+
+        ids_by_term, tfs_by_term = {}, {}
+        for chunk_id, counts in enumerate(self._term_counts):
+            for term, tf in counts.items():
+                ids_by_term.setdefault(term, []).append(chunk_id)
+                tfs_by_term.setdefault(term, []).append(tf)
+
+        postings = {}
+        for term, ids in ids_by_term.items():
+            ids = np.array(ids, dtype=np.int32)
+            tf = np.array(tfs_by_term[term], dtype=np.float32)
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[ids] / avg_len)
+            postings[term] = (ids, idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        self._postings = postings
+        self._chunk_doc = np.array([self._doc_ordinals[c["doc_id"]] for c in self.chunks], dtype=np.int32)
+
+    def search(self, query: str, doc_ids=None, top_k: int = RETRIEVAL_TOP_K, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> list:
+        """Top-k chunks for `query`, optionally limited to `doc_ids`, trimmed to `token_budget`."""
+        if self._postings is None:
+            self._build()
+        postings, chunk_doc = self._postings, self._chunk_doc
+
+        scores = np.zeros(len(chunk_doc), dtype=np.float32)
+        for term in set(tokenize(query)):
+            hit = postings.get(term)
+            if hit is not None:
+                scores[hit[0]] += hit[1]
+
+        if doc_ids is not None:
+            allowed = [self._doc_ordinals[d] for d in doc_ids if d in self._doc_ordinals]
+            scores[~np.isin(chunk_doc, allowed)] = 0
+
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k)[:top_k]]
+        ranked = candidates[np.argsort(-scores[candidates])]
+
+        results, used = [], 0
+        for chunk_id in ranked:
+            chunk = self.chunks[chunk_id]
+            cost = estimate_tokens(chunk["text"])
+            if used + cost > token_budget:
+                break
+            used += cost
+            results.append(dict(chunk, score=round(float(scores[chunk_id]), 3)))
+        return results
+
+
+class RetrievalStore:
+    """
+    Per-user document indexes, LRU-bounded by user count.
+
+    Indexes are extended at upload time. A user whose index isn't resident (restart,
+    eviction, or a document uploaded through another instance) is filled in through
+    `loader(user_id, doc_ids) -> [{"id", "name", "extractedText"}]`, which must raise (not
+    return fewer documents) when the read fails.
+    """
+
+    def __init__(self, loader, max_users: int = RETRIEVAL_MAX_USERS):
+        self.loader = loader
+        self.max_users = max_users
+        self._indexes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add_document(self, user_id: str, doc_id: str, name: str, text: str):
+        with self._lock:
+            index = self._indexes.get(user_id)
+        if index is not None:
+            with index.lock:
+                index.add_document(doc_id, name, text)
+
+    def _index_for(self, user_id: str) -> UserDocumentIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None:
+                index = self._indexes[user_id] = UserDocumentIndex()
+                while len(self._indexes) > self.max_users:
+                    self._indexes.popitem(last=False)
+            self._indexes.move_to_end(user_id)
+            return index
+
+    def search(self, user_id: str, query: str, doc_ids: set, scope_doc_id: str = None) -> list:
+        """
+        Searches the user's documents listed in `doc_ids` (the current metadata), or just
+        `scope_doc_id` when the chat is pinned to one document.
+        """
+        if not doc_ids:
+            return []
+        if scope_doc_id:
+            doc_ids = {scope_doc_id} & set(doc_ids)
+            if not doc_ids:
+                return []
+        index = self._index_for(user_id)
+        with index.lock:
+            missing = set(doc_ids) - index.doc_ids
+            if missing:
+                for doc in self.loader(user_id, sorted(missing)):
+                    index.add_document(doc["id"], doc.get("name"), doc.get("extractedText"))
+                # Ids missing from a successful load (deleted) are indexed as empty so they aren't re-fetched
+                # every turn; a loader that fails raises before this, so those ids are retried next turn
+                for doc_id in missing - index.doc_ids:
+                    index.add_document(doc_id, None, "")
+            return index.search(query, doc_ids=doc_ids)
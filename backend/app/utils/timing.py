@@ -0,0 +1,121 @@
+# app/utils/timing.py
+import re
+import time
+from contextlib import contextmanager
+
+from app.context import get_trace, set_trace, trace_ctx
+from app.utils.metrics import STAGE_DURATION, HTTP_DURATION
+
+_TOKEN_UNSAFE = re.compile(r"[^A-Za-z0-9_.\-]")
+
+
+class StageTimer:
+    """
+    Records wall-clock spans (ms) for the stages of one request.
+    Stages may overlap (e.g. concurrent reads) or repeat (model rounds, tool calls), so each
+    span is kept individually; `stages` holds the per-name totals. Every span is also
+    observed in the `finbot_stage_duration_seconds` histogram.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self.spans = []
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str, detail: str = ""):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter() - started, detail)
+
+    def record(self, name: str, started: float, seconds: float, detail: str = ""):
+        ms = round(seconds * 1000, 2)
+        self.spans.append({"name": name, "detail": detail, "start_ms": round((started - self._start) * 1000, 2), "duration_ms": ms})
+        self.stages[name] = round(self.stages.get(name, 0) + ms, 2)
+        STAGE_DURATION.observe(seconds, stage=name, detail=detail)
+
+    async def timed(self, name: str, awaitable):
+        """Awaits `awaitable` while recording its duration under `name`."""
+        with self.stage(name):
+            return await awaitable
+
+    def total_ms(self) -> float:
+        return round((time.perf_counter() - self._start) * 1000, 2)
+
+    def server_timing(self) -> str:
+        """`Server-Timing` header value: one entry per span recorded so far, plus the total."""
+        entries = []
+        for s in self.spans:
+            token = _TOKEN_UNSAFE.sub("_", f"{s['name']}.{s['detail']}" if s["detail"] else s["name"])
+            entries.append(f"{token};dur={s['duration_ms']}")
+        entries.append(f"total;dur={self.total_ms()}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def span(name: str, detail: str = ""):
+    """
+    Times a block into the current request's trace (found through app.context, so it works in
+    tool threads too). Outside a request (background writes) only the histogram is updated.
+    """
+    trace = get_trace()
+    if trace is not None:
+        with trace.stage(name, detail):
+            yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=name, detail=detail)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware: starts a StageTimer per HTTP request (available to handlers via
+    `app.context.get_trace()`), adds the `Server-Timing` header and records request latency
+    by route template. For streamed responses the header carries the spans recorded before
+    the first byte.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        trace = StageTimer()
+        token = set_trace(trace)
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            HTTP_DURATION.observe(trace.total_ms() / 1000, method=scope["method"],
+                                  route=_route_template(scope), status=status["code"])
+            trace_ctx.reset(token)
+
+
+def _route_template(scope) -> str:
+    # Templated path (e.g. /history/{user_id}) keeps the label set small
+    route = scope.get("route")
+    if route is not None:
+        return getattr(route, "path", "unmatched")
+    app = scope.get("app")
+    for candidate in getattr(app, "routes", []):
+        match, _ = candidate.matches(scope)
+        if match.name == "FULL":
+            return candidate.path
+    return "unmatched"
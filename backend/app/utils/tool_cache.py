@@ -0,0 +1,86 @@
+# app/utils/tool_cache.py
+import os
+import inspect
+import functools
+
+from app.utils.ttl_cache import TTLCache
+from app.utils.bank_engine import bank_engine
+
+TOOL_CACHE_TTL = float(os.getenv("TOOL_CACHE_TTL", "600"))
+TOOL_CACHE_MAX_ITEMS = int(os.getenv("TOOL_CACHE_MAX_ITEMS", "1024"))
+
+# Numbers that differ below this many decimals are treated as the same argument
+ARG_DECIMALS = 4
+
+# Tools with side effects or per-call identity; `pure_tool` refuses to wrap them
+STATEFUL_TOOLS = {"update_application", "submit_kyc_application"}
+
+# Tools whose results depend only on public reference data, never on the user's figures; a reply
+# that used any other tool (eligibility, EMI math on the user's numbers...) is never shared
+CONTEXT_FREE_TOOLS = {"query_best_loan_offers", "check_bank_health"}
+
+_caches = {}
+
+
+def _normalize(value):
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), ARG_DECIMALS) + 0.0   # 20 == 20.0, and -0.0 -> 0.0
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return repr(value)
+
+
+def pure_tool(uses_bank_data: bool = False):
+    """
+    Memoizes a tool whose result depends only on its arguments (and, with `uses_bank_data`,
+    on the bank dataset). Arguments are normalized (defaults applied, numbers rounded, strings
+    case/space-folded) so equivalent calls share an entry. Entries live in a per-tool LRU with
+    TTL; bank-data tools drop their entries when the dataset reloads. Error results are not
+    cached. Cached results are shared between callers and must not be mutated.
+    """
+    def decorate(fn):
+        if fn.__name__ in STATEFUL_TOOLS:
+            raise ValueError(f"{fn.__name__} has side effects and cannot be cached")
+
+        signature = inspect.signature(fn)
+        cache = _caches[fn.__name__] = TTLCache(ttl=TOOL_CACHE_TTL, max_items=TOOL_CACHE_MAX_ITEMS)
+        seen_version = [None]
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            try:
+                bound = signature.bind(*args, **kwargs)
+            except TypeError:
+                return fn(*args, **kwargs)
+            bound.apply_defaults()
+            key = tuple((name, _normalize(value)) for name, value in bound.arguments.items())
+
+            if uses_bank_data:
+                version = bank_engine.snapshot().version
+                if version != seen_version[0]:
+                    cache.clear()
+                    seen_version[0] = version
+                # Keyed by version too, so a call racing the reload can't store an old-dataset result
+                key = (version,) + key
+
+            hit, result = cache.get(key)
+            if hit:
+                return result
+            result = fn(*args, **kwargs)
+            if not (isinstance(result, dict) and "error" in result):
+                cache.set(key, result)
+            return result
+
+        return wrapper
+    return decorate
+
+
+def tool_cache_stats() -> dict:
+    """Hit/miss counters per memoized tool."""
+    return {name: cache.stats() for name, cache in _caches.items()}
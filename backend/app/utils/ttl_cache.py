@@ -0,0 +1,70 @@
+# app/utils/ttl_cache.py
+import time
+import threading
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Small in-process LRU whose entries expire after `ttl` seconds.
+
+    `get_or_load(key, loader)` fills misses. `invalidate(key)` drops an entry immediately and
+    also discards any load for that key that was already in flight, so a write can't be
+    undone by a slower read finishing after it.
+    """
+
+    def __init__(self, ttl: float, max_items: int = 1024):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._generations = {}          # key -> bumped on every invalidate
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._counters["misses"] += 1
+            return False, None
+
+    def set(self, key, value, generation: int = None):
+        with self._lock:
+            if generation is not None and self._generations.get(key, 0) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, key, loader):
+        hit, value = self.get(key)
+        if hit:
+            return value
+        with self._lock:
+            generation = self._generations.get(key, 0)
+        value = loader()
+        self.set(key, value, generation=generation)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(self._counters, items=len(self._entries),
+                        hit_rate=round(self._counters["hits"] / lookups, 3) if lookups else 0.0)
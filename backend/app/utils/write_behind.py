@@ -0,0 +1,134 @@
+# app/utils/write_behind.py
+import os
+import time
+import random
+import asyncio
+import zlib
+from app.utils.metrics import WRITE_BATCH_DURATION
+
+# Sessions are sharded across this many writers; one session always maps to the same writer
+WRITE_BEHIND_WORKERS = int(os.getenv("WRITE_BEHIND_WORKERS", "4"))
+
+# Total items buffered in memory before submitters wait (backpressure)
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "2000"))
+
+# Items coalesced into one write call
+WRITE_BEHIND_BATCH = 100
+
+# Retries per batch (exponential backoff with jitter, capped)
+WRITE_BEHIND_RETRIES = 5
+WRITE_BEHIND_BACKOFF = 0.2
+WRITE_BEHIND_BACKOFF_MAX = 5.0
+
+# Warn once the buffer is this full (at most every WARN_INTERVAL seconds)
+WRITE_BEHIND_WARN_RATIO = 0.5
+WARN_INTERVAL = 10.0
+
+
+class WriteBehindQueue:
+    """
+    Buffers writes in memory and flushes them in batches off the request path.
+
+    `write(items)` is a blocking function (run in a worker thread) that persists a list of
+    `(key, payload)` items in one round trip. Items sharing a key go to the same writer and
+    are written in submission order; a failing batch is retried (with backoff) before the
+    writer takes anything newer, so retries never reorder a key's items.
+    Until an item is written it is visible through `pending(key)`, for read-your-writes.
+    """
+
+    def __init__(self, write, name: str = "write-behind", workers: int = WRITE_BEHIND_WORKERS,
+                 max_pending: int = WRITE_BEHIND_MAX_PENDING):
+        self.write = write
+        self.name = name
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._queues = None
+        self._tasks = []
+        self._pending = {}
+        self._closing = False
+        self._last_warning = 0.0
+        self._counters = {"submitted": 0, "written": 0, "batches": 0, "retries": 0, "failed": 0, "max_depth": 0}
+
+    def _start(self):
+        per_worker = max(1, self.max_pending // self.workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(self.workers)]
+        self._tasks = [asyncio.create_task(self._run(q)) for q in self._queues]
+
+    def depth(self) -> int:
+        return sum(q.qsize() for q in self._queues) if self._queues else 0
+
+    async def submit(self, key, payload):
+        """Queues one item. Only waits when the buffer is full."""
+        if self._closing:
+            raise RuntimeError(f"{self.name} is shut down")
+        if self._queues is None:
+            self._start()
+
+        self._pending.setdefault(key, []).append(payload)
+        self._counters["submitted"] += 1
+        await self._queues[zlib.crc32(repr(key).encode()) % self.workers].put((key, payload))
+
+        depth = self.depth()
+        self._counters["max_depth"] = max(self._counters["max_depth"], depth)
+        now = time.monotonic()
+        if depth >= self.max_pending * WRITE_BEHIND_WARN_RATIO and now - self._last_warning > WARN_INTERVAL:
+            self._last_warning = now
+            print(f"⚠️ {self.name} backing up: {depth}/{self.max_pending} items queued")
+
+    def pending(self, key) -> list:
+        """Payloads submitted for `key` that haven't been written yet (oldest first)."""
+        return list(self._pending.get(key, ()))
+
+    def _settle(self, batch: list):
+        for key, payload in batch:
+            items = self._pending.get(key)
+            if items:
+                items.remove(payload)
+                if not items:
+                    del self._pending[key]
+
+    async def _run(self, queue: asyncio.Queue):
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < WRITE_BEHIND_BATCH and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            try:
+                await self._write_with_retry(batch)
+            finally:
+                self._settle(batch)
+                for _ in batch:
+                    queue.task_done()
+
+    async def _write_with_retry(self, batch: list):
+        for attempt in range(WRITE_BEHIND_RETRIES + 1):
+            try:
+                started = time.perf_counter()
+                await asyncio.to_thread(self.write, batch)
+                WRITE_BATCH_DURATION.observe(time.perf_counter() - started, queue=self.name)
+                self._counters["batches"] += 1
+                self._counters["written"] += len(batch)
+                return
+            except Exception as e:
+                if attempt == WRITE_BEHIND_RETRIES:
+                    self._counters["failed"] += len(batch)
+                    print(f"❌ {self.name} dropped {len(batch)} items after {attempt + 1} attempts: {e}")
+                    return
+                self._counters["retries"] += 1
+                delay = min(WRITE_BEHIND_BACKOFF * 2 ** attempt, WRITE_BEHIND_BACKOFF_MAX)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def close(self, timeout: float = 10.0):
+        """Stops accepting items and flushes everything buffered (bounded by `timeout`)."""
+        self._closing = True
+        if self._queues is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*(q.join() for q in self._queues)), timeout)
+        except asyncio.TimeoutError:
+            print(f"❌ {self.name} shutdown with {self.depth()} items unwritten")
+        for task in self._tasks:
+            task.cancel()
+
+    def stats(self) -> dict:
+        return dict(self._counters, depth=self.depth(), capacity=self.max_pending, sessions_pending=len(self._pending))
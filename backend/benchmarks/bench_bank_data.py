@@ -0,0 +1,82 @@
+# benchmarks/bench_bank_data.py
+"""
+Measures bank data tool latency and snapshot build time as the product table grows,
+once with products sharing a few round-number loan limits and once with every limit distinct.
+
+Usage (from backend/):
+    python -m benchmarks.bench_bank_data
+"""
+import os
+import time
+import random
+import tempfile
+import pandas as pd
+
+from app.utils.bank_engine import BankDataEngine, HEALTH_CSV
+
+LIMITS = [100000, 200000, 300000, 500000, 1000000, 5000000, 10000000, 50000000, 80000000, 100000000, 150000000, 200000000]
+
+# Loan amount looked up; inside most synthetic ranges
+PROBE_AMOUNT = 10000000
+
+
+def _synthetic_rates(n: int, distinct: bool = False) -> pd.DataFrame:
+    rng = random.Random(42)
+    rows = []
+    for i in range(n):
+        if distinct:
+            lo, hi = sorted(rng.sample(range(LIMITS[0], LIMITS[-1]), 2))
+        else:
+            lo, hi = sorted(rng.sample(LIMITS, 2))
+        rate = round(rng.uniform(8.0, 12.0), 2)
+        rows.append({
+            "Bank_Name": f"Bank {i}",
+            "Min_Interest_Rate": rate,
+            "Max_Interest_Rate": round(rate + rng.uniform(0.2, 1.5), 2),
+            "Processing_Fee_Percent": round(rng.uniform(0, 1), 2),
+            "Min_Tenure": 1,
+            "Max_Tenure": rng.choice([5, 10, 15, 20, 25, 30]),
+            "Min_Loan_Amount": lo,
+            "Max_Loan_Amount": hi,
+            "Best_For_Segment": "Synthetic",
+        })
+    return pd.DataFrame(rows)
+
+
+def _time_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    print(f"{'limits':>8} {'products':>9} {'build':>9} {'matches':>8} {'offers_for_amount':>18} {'resolve_bank':>13} {'pd.read_csv+filter':>19}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for distinct in (False, True):
+            for n in (6, 100, 1000, 5000, 20000):
+                rates_path = os.path.join(tmp, f"rates_{n}_{int(distinct)}.csv")
+                _synthetic_rates(n, distinct).to_csv(rates_path, index=False)
+                engine = BankDataEngine(rates_path, HEALTH_CSV)
+                started = time.perf_counter()
+                snapshot = engine.snapshot()
+                build = (time.perf_counter() - started) * 1e3
+
+                # Most of the lookup cost is copying the matching offers out
+                matches = len(snapshot.offers_for_amount(PROBE_AMOUNT))
+                iterations = max(20, 20000 // max(matches, 1))
+                lookup = _time_us(lambda: snapshot.offers_for_amount(PROBE_AMOUNT), iterations)
+                resolve = _time_us(lambda: snapshot.resolve_bank("hdfc"), 2000)
+
+                def legacy():
+                    df = pd.read_csv(rates_path)
+                    df = df[(df['Min_Loan_Amount'] <= PROBE_AMOUNT) & (df['Max_Loan_Amount'] >= PROBE_AMOUNT)]
+                    df.sort_values(by="Min_Interest_Rate").to_dict(orient="records")
+                baseline = _time_us(legacy, 20)
+
+                label = "distinct" if distinct else "round"
+                print(f"{label:>8} {n:>9} {build:>7.1f}ms {matches:>8} {lookup:>16.2f}us {resolve:>11.2f}us {baseline:>17.0f}us")
+
+
+if __name__ == "__main__":
+    main()
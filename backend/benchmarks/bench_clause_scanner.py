@@ -0,0 +1,137 @@
+# benchmarks/bench_clause_scanner.py
+"""
+Throughput of the local clause-risk scanner (app/utils/clause_scanner.py) on large synthetic
+documents: a long loan agreement (prose with risk clauses scattered through it) and a bank
+statement (transaction lines with the occasional fee or bounce charge). Compared against the
+naive approach of one regex per phrase. Target: a 100-page agreement scanned well under 100 ms.
+Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    python -m benchmarks.bench_clause_scanner --pages 500
+"""
+import argparse
+import random
+import re
+import time
+
+from benchmarks import results
+from app.utils.clause_scanner import RISK_CATEGORIES, scan_pages
+
+TARGET_MS_PER_100_PAGES = 100
+
+_AGREEMENT_WORDS = ("the borrower shall pay all amounts due under this agreement to the lender on each due date "
+                    "in accordance with the terms and conditions herein and any schedule annexure or sanction letter "
+                    "thereto including the principal sum interest and other monies payable from time to time").split()
+_AGREEMENT_CLAUSES = [
+    "A processing fee of 1% of the loan amount plus applicable taxes is non-refundable.",
+    "The loan carries a floating rate of interest linked to the external benchmark (repo rate) with a reset period of three months.",
+    "Prepayment charges of 4% apply to any part payment made during the lock-in period.",
+    "Penal interest at 2% per month shall be levied on all overdue amounts.",
+    "Upon an Event of Default the Lender may recall the entire loan at its sole discretion without prior notice.",
+    "Documentation charges, valuation charges and other charges as applicable shall be borne by the Borrower.",
+]
+_STATEMENT_NARRATIONS = ["UPI/P2M/{n}/GROCERY MART", "NEFT CR {n} SALARY ACME LTD", "ATM WDL {n} MG ROAD", "IMPS/{n}/RENT",
+                         "POS {n} FUEL STATION", "ACH DR {n} HOME LOAN EMI", "INT CREDIT {n}", "UPI/P2P/{n}/FRIEND"]
+_STATEMENT_FEES = ["SMS CHARGES QTR {n}", "MINIMUM BALANCE CHARGES {n}", "ECS RETURN - CHEQUE BOUNCE CHARGES {n}",
+                   "ANNUAL MAINTENANCE CHARGES DEBIT CARD {n}", "LATE PAYMENT CHARGES CC {n}"]
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=500, help="pages per synthetic document")
+    parser.add_argument("--repeats", type=int, default=5, help="best-of runs")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    return parser.parse_args()
+
+
+def _agreement(pages: int, rng: random.Random) -> list:
+    out = []
+    for _ in range(pages):
+        sentences = []
+        for _ in range(30):
+            if rng.random() < 0.04:
+                sentences.append(rng.choice(_AGREEMENT_CLAUSES))
+            else:
+                words = [rng.choice(_AGREEMENT_WORDS) for _ in range(rng.randint(12, 24))]
+                sentences.append(" ".join(words).capitalize() + ".")
+        # Extracted text wraps lines mid-sentence
+        text = " ".join(sentences)
+        out.append("\n".join(text[i:i + 90] for i in range(0, len(text), 90)))
+    return out
+
+
+def _statement(pages: int, rng: random.Random) -> list:
+    out = []
+    for page in range(pages):
+        lines = []
+        for row in range(45):
+            n = rng.randrange(10**11, 10**12)
+            template = rng.choice(_STATEMENT_FEES) if rng.random() < 0.02 else rng.choice(_STATEMENT_NARRATIONS)
+            amount = rng.randrange(100, 200000) / 100
+            lines.append(f"{(page * 45 + row) % 28 + 1:02d}-03-2025  {template.format(n=n):<48}{amount:>12,.2f}{rng.randrange(10**5, 10**7) / 100:>14,.2f}")
+        out.append("\n".join(lines))
+    return out
+
+
+def _best_of(fn, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _naive(pages: list) -> int:
+    """Baseline: one IGNORECASE regex per phrase, each run over every page."""
+    hits = 0
+    for pattern in _NAIVE_PATTERNS:
+        for text in pages:
+            hits += sum(1 for _ in pattern.finditer(text))
+    return hits
+
+
+_NAIVE_PATTERNS = [re.compile(r"\b" + r"\s+".join(re.escape(w) for w in phrase.split()) + r"\b", re.IGNORECASE)
+                   for _, phrases in RISK_CATEGORIES.values() for phrase in phrases]
+
+
+def main():
+    args = _parse_args()
+    rng = random.Random(args.seed)
+    documents = {"agreement": _agreement(args.pages, rng), "statement": _statement(args.pages, rng)}
+
+    metrics = {}
+    print(f"{'document':<11}{'pages':>7}{'MB':>7}{'scan ms':>10}{'MB/s':>8}{'pages/s':>10}{'ms/100p':>9}"
+          f"{'clauses':>9}{'score':>7}{'naive ms':>10}{'speedup':>9}")
+    for name, pages in documents.items():
+        mb = sum(len(p) for p in pages) / 1e6
+        scan = scan_pages(pages)
+        scan_s = _best_of(lambda: scan_pages(pages), args.repeats)
+        naive_s = _best_of(lambda: _naive(pages), 1)
+        row = {
+            "pages": len(pages),
+            "mb": round(mb, 2),
+            "scan_ms": round(scan_s * 1000, 2),
+            "mb_per_s": round(mb / scan_s, 1),
+            "pages_per_s": round(len(pages) / scan_s),
+            "ms_per_100_pages": round(scan_s * 1000 * 100 / len(pages), 2),
+            "clauses": len(scan["clauses"]),
+            "score": scan["score"],
+            "risk_level": scan["risk_level"],
+            "naive_ms": round(naive_s * 1000, 2),
+            "speedup_vs_naive": round(naive_s / scan_s, 1),
+        }
+        metrics[name] = row
+        verdict = "PASS" if row["ms_per_100_pages"] <= TARGET_MS_PER_100_PAGES else "FAIL"
+        print(f"{name:<11}{row['pages']:>7}{row['mb']:>7.2f}{row['scan_ms']:>10.1f}{row['mb_per_s']:>8.1f}"
+              f"{row['pages_per_s']:>10,}{row['ms_per_100_pages']:>9.1f}{row['clauses']:>9}{row['score']:>7}"
+              f"{row['naive_ms']:>10.1f}{row['speedup_vs_naive']:>8.1f}x  {verdict}")
+
+    if not args.no_save:
+        config = {k: v for k, v in vars(args).items() if k != "no_save"}
+        results.save("clause_scanner", metrics, config)
+
+
+if __name__ == "__main__":
+    main()
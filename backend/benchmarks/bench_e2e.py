@@ -0,0 +1,233 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end load test of the FastAPI app, served by uvicorn on a local port, against local
+Firestore/Storage/Gemini stand-ins (benchmarks/fakes.py). Replays the multi-turn traces in benchmarks/traces.py at a target
+concurrency, alongside document uploads and audits, and reports p50/p95/p99 latency and
+throughput per endpoint. Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt   # adds httpx, the HTTP client used here
+    python -m benchmarks.bench_e2e --concurrency 32 --conversations 200 --model-ms 300
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import threading
+import time
+from io import BytesIO
+
+from benchmarks import fakes, results
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32, help="virtual users running at once")
+    parser.add_argument("--conversations", type=int, default=120, help="traces replayed (each turn in order)")
+    parser.add_argument("--uploads", type=int, default=24, help="/upload-doc requests (unique files)")
+    parser.add_argument("--analyses", type=int, default=12, help="/analyze-doc requests (unique files)")
+    parser.add_argument("--audit-pages", type=int, default=2, help="pages per /analyze-doc file (long ones are audited in batches)")
+    parser.add_argument("--stream-share", type=float, default=0.5, help="share of conversations using /chat/stream")
+    parser.add_argument("--model-ms", type=float, default=fakes.LATENCY["model_ms"])
+    parser.add_argument("--token-ms", type=float, default=fakes.LATENCY["token_ms"])
+    parser.add_argument("--ocr-ms", type=float, default=fakes.LATENCY["ocr_ms"])
+    parser.add_argument("--store-ms", type=float, default=fakes.LATENCY["store_ms"])
+    parser.add_argument("--rpm", type=float, default=1_000_000, help="simulated Gemini quota (requests/minute)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    return parser.parse_args()
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _pdf(pages: int, seed: int) -> bytes:
+    from pypdf import PdfWriter
+    writer = PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=595, height=842)
+    writer.add_metadata({"/Subject": f"bench-{seed}"})
+    out = BytesIO()
+    writer.write(out)
+    return out.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, endpoint: str, seconds: float, ok: bool):
+        self.samples.setdefault(endpoint, []).append(seconds * 1000)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def report(self, wall_s: float) -> dict:
+        metrics = {}
+        print(f"\n{'endpoint':<22}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>9}")
+        for endpoint, values in sorted(self.samples.items()):
+            values = sorted(values)
+            row = {
+                "n": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "p50_ms": round(_percentile(values, 50), 2),
+                "p95_ms": round(_percentile(values, 95), 2),
+                "p99_ms": round(_percentile(values, 99), 2),
+                "mean_ms": round(sum(values) / len(values), 2),
+                "throughput_rps": round(len(values) / wall_s, 2),
+            }
+            metrics[endpoint] = row
+            print(f"{endpoint:<22}{row['n']:>6}{row['errors']:>5}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}"
+                  f"{row['p99_ms']:>10.1f}{row['mean_ms']:>10.1f}{row['throughput_rps']:>9.2f}")
+        return metrics
+
+
+async def _conversation(client, recorder: Recorder, trace: list, user_id: str, session_id: str, stream: bool):
+    for turn in trace:
+        payload = {"user_id": user_id, "session_id": session_id, "message": turn["message"]}
+        started = time.perf_counter()
+        if not stream:
+            response = await client.post("/chat", json=payload)
+            recorder.add("/chat", time.perf_counter() - started, response.status_code == 200)
+            continue
+
+        first_token, ok = None, False
+        async with client.stream("POST", "/chat/stream", json=payload) as response:
+            async for line in response.aiter_lines():
+                if line.startswith("event: token") and first_token is None:
+                    first_token = time.perf_counter() - started
+                elif line.startswith("event: done"):
+                    ok = True
+                elif line.startswith("event: error"):
+                    ok = False
+        recorder.add("/chat/stream", time.perf_counter() - started, ok)
+        if first_token is not None:
+            recorder.add("/chat/stream (ttft)", first_token, True)
+
+
+async def _upload(client, recorder: Recorder, user_id: str, index: int):
+    if index % 2:
+        files = {"file": (f"statement-{index}.pdf", _pdf(3, index), "application/pdf")}
+    else:
+        files = {"file": (f"pan-{index}.png", random.randbytes(64 * 1024), "image/png")}
+    started = time.perf_counter()
+    response = await client.post("/upload-doc", files=files, data={"user_id": user_id})
+    await _finish_job(client, recorder, "/upload-doc", response, started)
+
+
+async def _analyze(client, recorder: Recorder, index: int, pages: int):
+    files = {"file": (f"agreement-{index}.pdf", _pdf(pages, 10_000 + index), "application/pdf")}
+    started = time.perf_counter()
+    response = await client.post("/analyze-doc", files=files)
+    await _finish_job(client, recorder, "/analyze-doc", response, started)
+
+
+async def _finish_job(client, recorder: Recorder, endpoint: str, response, started: float):
+    """Records the accept latency, then follows the job's SSE stream to record time to result."""
+    recorder.add(f"{endpoint} (accept)", time.perf_counter() - started, response.status_code == 202)
+    if response.status_code != 202:
+        recorder.add(endpoint, time.perf_counter() - started, False)
+        return
+    ok = False
+    async with client.stream("GET", f"/jobs/{response.json()['job_id']}/events") as events:
+        async for line in events.aiter_lines():
+            if line.startswith("data:"):
+                ok = json.loads(line[5:])["status"] == "done"
+    recorder.add(endpoint, time.perf_counter() - started, ok)
+
+
+def _serve(app):
+    """Runs the app under uvicorn on a free local port in a background thread (its own event loop)."""
+    import uvicorn
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+async def _run(args, base_url: str) -> tuple:
+    import httpx
+    from benchmarks.traces import TRACES
+
+    rng = random.Random(args.seed)
+    names = sorted(TRACES)
+    jobs = []
+    for i in range(args.conversations):
+        name = rng.choice(names)
+        jobs.append(("chat", name, f"user-{i % max(1, args.concurrency * 2)}", f"bench-{i}", rng.random() < args.stream_share))
+    jobs += [("upload", i) for i in range(args.uploads)]
+    jobs += [("analyze", i) for i in range(args.analyses)]
+    rng.shuffle(jobs)
+
+    recorder = Recorder()
+    queue = asyncio.Queue()
+    for job in jobs:
+        queue.put_nowait(job)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+        async def user():
+            while not queue.empty():
+                job = queue.get_nowait()
+                if job[0] == "chat":
+                    _, name, user_id, session_id, stream = job
+                    await _conversation(client, recorder, TRACES[name], user_id, session_id, stream)
+                elif job[0] == "upload":
+                    await _upload(client, recorder, f"user-{job[1]}", job[1])
+                else:
+                    await _analyze(client, recorder, job[1], args.audit_pages)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+        wall_s = time.perf_counter() - started
+        persistence = (await client.get("/persistence/stats")).json()
+        model = (await client.get("/model/stats")).json()
+
+    return recorder, wall_s, persistence, model
+
+
+def main():
+    args = _parse_args()
+    random.seed(args.seed)
+    fakes.LATENCY.update(model_ms=args.model_ms, token_ms=args.token_ms, ocr_ms=args.ocr_ms, store_ms=args.store_ms)
+    stores = fakes.install(rpm=args.rpm)
+
+    from benchmarks.traces import scripts
+    fakes.SCRIPTS.update(scripts())
+
+    from app.main import app
+    server, thread, base_url = _serve(app)
+    try:
+        recorder, wall_s, persistence, model = asyncio.run(_run(args, base_url))
+    finally:
+        # Graceful shutdown flushes the write-behind queue
+        server.should_exit = True
+        thread.join()
+
+    metrics = recorder.report(wall_s)
+    requests = sum(m["n"] for name, m in metrics.items() if "(ttft)" not in name)
+    print(f"\n{requests} requests in {wall_s:.2f}s -> {requests / wall_s:.1f} req/s at concurrency {args.concurrency}")
+    print(f"Firestore round trips: {stores['db'].round_trips}, model calls: {fakes.FakeGenerativeModel.calls}")
+    print(f"Write-behind: {json.dumps({k: persistence[k] for k in ('written', 'batches', 'max_depth', 'failed')})}")
+    for label, m in model["labels"].items():
+        print(f"Model [{label}]: {m['calls']} calls, queue wait avg {m['queue_wait_ms_avg']}ms, model avg {m['model_ms_avg']}ms")
+
+    metrics["overall"] = {"requests": requests, "wall_s": round(wall_s, 2), "throughput_rps": round(requests / wall_s, 2),
+                          "firestore_round_trips": stores["db"].round_trips}
+    if not args.no_save:
+        config = {k: v for k, v in vars(args).items() if k != "no_save"}
+        results.save("e2e", metrics, config)
+
+
+if __name__ == "__main__":
+    main()
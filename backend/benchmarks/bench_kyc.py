@@ -0,0 +1,221 @@
+# benchmarks/bench_kyc.py
+"""
+Throughput of KYC validation (app/utils/kyc_validation.py):
+
+- core:      `validate_kyc` on pre-built records (a mix of valid rows and rows with a bad
+             PAN / Aadhaar checksum / mobile / DOB), rows per second.
+- endpoint:  `/kyc/validate-bulk` served by uvicorn (app.main, no Firebase credentials needed),
+             with batches of increasing size uploaded as CSV and NDJSON. The body is generated
+             while it's sent and the results are read as they come back, on the same connection.
+             Reports rows/s, time to the first result and the server's peak RSS after each
+             batch, which should stay flat as batches grow.
+
+Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt   # adds httpx, the HTTP client used here
+    python -m benchmarks.bench_kyc --rows 10000 100000 500000
+"""
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import results
+from benchmarks.bench_scaling import BACKEND_DIR, _free_port
+from benchmarks.bench_startup import _env
+from app.utils.kyc_validation import validate_kyc, verhoeff_valid
+
+_NAMES = ["Asha Verma", "Ravi Kumar", "Priya Nair", "Mohammed Iqbal", "Sunita D'Souza", "K. Ramesh", "Anil Kumar-Singh"]
+COLUMNS = ["ref", "name", "pan", "aadhaar", "mobile", "dob"]
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000, 500000], help="batch sizes to upload")
+    parser.add_argument("--core-rows", type=int, default=200000, help="records for the in-process measurement")
+    parser.add_argument("--invalid-share", type=float, default=0.2, help="share of rows with one bad field")
+    parser.add_argument("--upload-chunk", type=int, default=16 * 1024, help="bytes per upload chunk")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    return parser.parse_args()
+
+
+def _aadhaar(rng: random.Random) -> str:
+    stem = str(rng.randint(2, 9)) + "".join(rng.choice("0123456789") for _ in range(10))
+    return next(stem + d for d in "0123456789" if verhoeff_valid(stem + d))
+
+
+def _record(i: int, rng: random.Random, invalid_share: float) -> dict:
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    record = {
+        "ref": f"R{i}",
+        "name": rng.choice(_NAMES),
+        "pan": "".join(rng.choice(letters) for _ in range(3)) + "P" + rng.choice(letters)
+               + f"{rng.randrange(10000):04d}" + rng.choice(letters),
+        "aadhaar": _aadhaar(rng),
+        "mobile": f"{rng.randint(6, 9)}{rng.randrange(10**9):09d}",
+        "dob": f"{rng.randint(1, 28):02d}-{rng.randint(1, 12):02d}-{rng.randint(1950, 2000)}",
+    }
+    if rng.random() < invalid_share:
+        field = rng.choice(["pan", "aadhaar", "mobile", "dob"])
+        record[field] = {"pan": "ABCDE1234F", "aadhaar": record["aadhaar"][:-1] + str((int(record["aadhaar"][-1]) + 1) % 10),
+                         "mobile": "12345", "dob": "31-02-1990"}[field]
+    return record
+
+
+def _records(count: int, seed: int, invalid_share: float):
+    rng = random.Random(seed)
+    for i in range(count):
+        yield _record(i, rng, invalid_share)
+
+
+def _body(fmt: str, count: int, seed: int, invalid_share: float, chunk_bytes: int):
+    """Upload body generated on the fly, in chunks of about `chunk_bytes`."""
+    buffer = [",".join(COLUMNS) + "\n"] if fmt == "csv" else []
+    size = sum(len(line) for line in buffer)
+    for record in _records(count, seed, invalid_share):
+        if fmt == "csv":
+            line = ",".join(f'"{record[c]}"' if "," in record[c] else record[c] for c in COLUMNS) + "\n"
+        else:
+            line = json.dumps(record) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+def _measure_core(args) -> dict:
+    records = [{"full_name": r["name"], "pan_number": r["pan"], "aadhaar_number": r["aadhaar"], "mobile": r["mobile"], "dob": r["dob"]}
+               for r in _records(args.core_rows, args.seed, args.invalid_share)]
+    started = time.perf_counter()
+    valid = sum(1 for record in records if not validate_kyc(record)[1])
+    seconds = time.perf_counter() - started
+    return {"rows": len(records), "valid": valid, "rows_per_s": round(len(records) / seconds),
+            "us_per_row": round(seconds * 1e6 / len(records), 2)}
+
+
+def _peak_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return round(int(line.split()[1]) / 1024, 1)
+    return 0.0
+
+
+async def _measure_upload(port: int, fmt: str, count: int, args) -> dict:
+    """
+    Sends the batch and reads results at the same time over one connection (HTTP/1.1 allows
+    it; httpx doesn't read the response before the request body is sent, and a large batch's
+    results would fill the socket buffers and stall both sides). h11 comes with uvicorn.
+    """
+    import h11
+
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    conn = h11.Connection(our_role=h11.CLIENT)
+    started = time.perf_counter()
+    sent = 0
+
+    async def upload():
+        nonlocal sent
+        writer.write(conn.send(h11.Request(method="POST", target="/kyc/validate-bulk", headers=[
+            ("Host", "127.0.0.1"), ("Content-Type", content_type), ("Transfer-Encoding", "chunked")])))
+        for chunk in _body(fmt, count, args.seed, args.invalid_share, args.upload_chunk):
+            sent += len(chunk)
+            writer.write(conn.send(h11.Data(data=chunk)))
+            await writer.drain()
+            # drain() doesn't yield while the socket buffer has room; let the reader run
+            await asyncio.sleep(0)
+        writer.write(conn.send(h11.EndOfMessage()))
+        await writer.drain()
+
+    sending = asyncio.create_task(upload())
+    rows = valid = 0
+    first_result = summary = None
+    pending = b""
+    try:
+        while True:
+            event = conn.next_event()
+            if event is h11.NEED_DATA:
+                conn.receive_data(await reader.read(65536))
+                continue
+            if isinstance(event, h11.Response) and event.status_code != 200:
+                raise RuntimeError(f"{fmt}: HTTP {event.status_code}")
+            if isinstance(event, h11.Data):
+                *lines, pending = (pending + bytes(event.data)).split(b"\n")
+                for line in lines:
+                    result = json.loads(line)
+                    if "summary" in result:
+                        summary = result["summary"]
+                    elif "row" in result:
+                        if first_result is None:
+                            first_result = time.perf_counter() - started
+                        rows += 1
+                        valid += result["valid"]
+            if isinstance(event, (h11.EndOfMessage, h11.ConnectionClosed)):
+                break
+        await sending
+    finally:
+        sending.cancel()
+        writer.close()
+    seconds = time.perf_counter() - started
+    if rows != count or summary is None or summary["rows"] != count:
+        raise RuntimeError(f"{fmt}: expected {count} results, got {rows} (summary {summary})")
+    return {"rows": rows, "valid": valid, "upload_mb": round(sent / 1e6, 2), "seconds": round(seconds, 2),
+            "rows_per_s": round(rows / seconds), "first_result_ms": round(first_result * 1000, 1)}
+
+
+def main():
+    args = _parse_args()
+    import httpx
+
+    metrics = {"core": _measure_core(args)}
+    core = metrics["core"]
+    print(f"core: {core['rows']:,} records, {core['rows_per_s']:,} rows/s ({core['us_per_row']} us/row), {core['valid']:,} valid")
+
+    scratch = tempfile.mkdtemp(prefix="bench-kyc-")
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(scratch), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"server exited with {process.returncode}")
+                try:
+                    client.get("/")
+                    break
+                except httpx.HTTPError:
+                    time.sleep(0.05)
+        print(f"\n{'format':<8}{'rows':>10}{'MB':>8}{'seconds':>9}{'rows/s':>10}{'first ms':>10}{'valid':>10}{'server peak RSS MB':>20}")
+        for fmt in ("csv", "ndjson"):
+            for count in sorted(args.rows):
+                row = asyncio.run(_measure_upload(port, fmt, count, args))
+                row["server_peak_rss_mb"] = _peak_rss_mb(process.pid)
+                metrics[f"{fmt}_{count}"] = row
+                print(f"{fmt:<8}{count:>10,}{row['upload_mb']:>8.1f}{row['seconds']:>9.2f}{row['rows_per_s']:>10,}"
+                      f"{row['first_result_ms']:>10.1f}{row['valid']:>10,}{row['server_peak_rss_mb']:>20.1f}")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+    if not args.no_save:
+        config = {k: v for k, v in vars(args).items() if k != "no_save"}
+        results.save("kyc", metrics, config)
+
+
+if __name__ == "__main__":
+    main()
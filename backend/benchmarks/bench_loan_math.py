@@ -0,0 +1,50 @@
+# benchmarks/bench_loan_math.py
+"""
+Throughput of the shared EMI kernel (target: >= 1M EMI evaluations/second)
+and latency of a 30-year monthly amortization schedule.
+
+Usage (from backend/):
+    python -m benchmarks.bench_loan_math
+"""
+import time
+import numpy as np
+
+from app.tools.loan_math import calculate_loan_emi, generate_amortization_schedule
+from app.utils.loan_kernel import emi_grid, amortization_schedule
+
+TARGET_EVALS_PER_SEC = 1_000_000
+
+
+def _best_of(fn, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    principals = np.linspace(100000, 20000000, 200)
+    rates = np.arange(6.0, 16.0, 0.05)
+    tenures = np.arange(1, 31)
+    cells = principals.size * rates.size * tenures.size
+
+    grid_s = _best_of(lambda: emi_grid(principals, rates, tenures))
+    grid_rate = cells / grid_s
+    print(f"emi_grid            {cells:>9,} EMIs in {grid_s * 1000:7.2f} ms -> {grid_rate:>14,.0f} EMIs/s "
+          f"({'PASS' if grid_rate >= TARGET_EVALS_PER_SEC else 'FAIL'} >= {TARGET_EVALS_PER_SEC:,})")
+
+    scalar_n = 20000
+    scalar_s = _best_of(lambda: [calculate_loan_emi(5000000, 8.5, 20) for _ in range(scalar_n)], repeats=3)
+    print(f"calculate_loan_emi  {scalar_n:>9,} calls in {scalar_s * 1000:7.2f} ms -> {scalar_n / scalar_s:>14,.0f} calls/s")
+
+    sched_s = _best_of(lambda: amortization_schedule(5000000, 8.5, 30), repeats=50)
+    print(f"amortization (360m) kernel {sched_s * 1e6:9.1f} us")
+
+    tool_s = _best_of(lambda: generate_amortization_schedule(5000000, 8.5, 30, "monthly"), repeats=50)
+    print(f"amortization (360m) tool + columnar JSON {tool_s * 1e6:9.1f} us")
+
+
+if __name__ == "__main__":
+    main()
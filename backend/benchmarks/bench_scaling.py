@@ -0,0 +1,238 @@
+# benchmarks/bench_scaling.py
+"""
+Throughput vs. worker count for the multi-process serving mode (gunicorn.conf.py), against the
+local Firestore/Storage/Gemini stand-ins (benchmarks/fake_app.py).
+
+For each worker count it starts gunicorn, drives a CPU-bound mix (chat turns with a fast stub
+model, amortization schedules and EMI sweeps) from separate load-generator processes for a
+fixed time, and reports req/s, latency, speedup over one worker and per-worker memory
+(RSS vs. PSS: the gap is what the workers share copy-on-write from the preloaded master).
+Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt   # adds httpx, the HTTP client used here
+    python -m benchmarks.bench_scaling --workers 1 2 4 --seconds 15
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import results
+from benchmarks.bench_e2e import _percentile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _parse_args():
+    cores = os.cpu_count() or 1
+    default_workers = sorted({1, 2, max(1, cores // 2), cores})
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers, help="worker counts to measure")
+    parser.add_argument("--seconds", type=float, default=15, help="load duration per worker count")
+    parser.add_argument("--clients", type=int, default=max(2, cores // 2), help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight requests per load generator")
+    parser.add_argument("--model-ms", type=float, default=20, help="stub model latency (kept low so CPU dominates)")
+    parser.add_argument("--store-ms", type=float, default=1)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    return parser.parse_args()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(workers: int, args, scratch: str):
+    port = _free_port()
+    env = dict(os.environ,
+               PORT=str(port), WEB_CONCURRENCY=str(workers), GEMINI_API_KEY="benchmark",
+               GEMINI_RPM="1000000000", GEMINI_BURST="1000000", GEMINI_MAX_CONCURRENCY=str(64 * workers),
+               ADMISSION_MAX_IN_FLIGHT="256", ADMISSION_MAX_QUEUE="1024", ADMISSION_MAX_PER_USER="1024",
+               CONTENT_CACHE_PATH=os.path.join(scratch, f"cache-{workers}.sqlite3"),
+               JOB_SPOOL_DIR=os.path.join(scratch, f"jobs-{workers}"),
+               BENCH_MODEL_MS=str(args.model_ms), BENCH_TOKEN_MS="0", BENCH_STORE_MS=str(args.store_ms),
+               FAST_PATH_ENABLED="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--log-level", "warning", "benchmarks.fake_app:app"],
+        # Per-turn timing lines go to stdout; keep stderr for worker errors
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    import httpx
+    deadline = time.monotonic() + 120
+    ready = 0
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            if httpx.get(base_url + "/", timeout=1).status_code == 200:
+                ready += 1
+                # Every worker has to have booted, not just the first one
+                if ready >= workers * 3:
+                    break
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    else:
+        process.kill()
+        raise RuntimeError("gunicorn did not become ready")
+    return process, base_url
+
+
+def _stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def _memory_kb(pid: int) -> dict:
+    """RSS and PSS of one process (Linux); PSS splits shared pages among the processes sharing them."""
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss"):
+                    values[key.lower()] = int(rest.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _worker_pids(master_pid: int) -> list:
+    try:
+        with open(f"/proc/{master_pid}/task/{master_pid}/children") as f:
+            return [int(pid) for pid in f.read().split()]
+    except OSError:
+        return []
+
+
+def _requests(rng: random.Random):
+    """One request of the mix: (path, json)."""
+    from benchmarks.traces import TRACES
+    kind = rng.random()
+    if kind < 0.5:
+        trace = TRACES[rng.choice(sorted(TRACES))]
+        turn = rng.choice(trace)
+        payload = {"user_id": f"user-{rng.randrange(10_000)}", "session_id": "scale", "message": turn["message"]}
+        return "/chat", payload
+    if kind < 0.8:
+        payload = {"principal": rng.choice([2e6, 5e6, 8e6]), "rate_of_interest": rng.choice([8.4, 8.9, 9.5]),
+                   "tenure_years": rng.choice([15, 20, 25]), "granularity": "monthly"}
+        return "/loan/amortization", payload
+    payload = {"principals": [1e6 * i for i in range(1, 21)], "rates_of_interest": [7 + 0.25 * i for i in range(16)],
+               "tenure_years": [5, 10, 15, 20, 25, 30]}
+    return "/loan/emi-sweep", payload
+
+
+def _load_generator(base_url: str, seconds: float, concurrency: int, seed: int, out):
+    import httpx
+
+    async def run():
+        rng = random.Random(seed)
+        samples, errors = {}, {}
+        stop_at = time.perf_counter() + seconds
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+            async def user():
+                while time.perf_counter() < stop_at:
+                    path, payload = _requests(rng)
+                    started = time.perf_counter()
+                    try:
+                        ok = (await client.post(path, json=payload)).status_code == 200
+                    except httpx.HTTPError:
+                        ok = False
+                    samples.setdefault(path, []).append((time.perf_counter() - started) * 1000)
+                    if not ok:
+                        errors[path] = errors.get(path, 0) + 1
+            await asyncio.gather(*(user() for _ in range(concurrency)))
+        return samples, errors
+
+    out.put(asyncio.run(run()))
+
+
+def _measure(workers: int, args, scratch: str) -> dict:
+    process, base_url = _start_server(workers, args, scratch)
+    try:
+        # Warm-up: first requests per worker pay for lazy imports and connection setup
+        _run_load(base_url, min(3.0, args.seconds), args)
+        memory = [_memory_kb(pid) for pid in _worker_pids(process.pid)]
+        started = time.perf_counter()
+        samples, errors = _run_load(base_url, args.seconds, args)
+        wall_s = time.perf_counter() - started
+    finally:
+        _stop_server(process)
+
+    values = sorted(v for series in samples.values() for v in series)
+    row = {
+        "workers": workers,
+        "requests": len(values),
+        "errors": sum(errors.values()),
+        "throughput_rps": round(len(values) / wall_s, 2),
+        "p50_ms": round(_percentile(values, 50), 2),
+        "p95_ms": round(_percentile(values, 95), 2),
+        "p99_ms": round(_percentile(values, 99), 2),
+        "by_endpoint_rps": {label: round(len(series) / wall_s, 2) for label, series in sorted(samples.items())},
+    }
+    if memory and all(memory):
+        row["worker_rss_mb"] = round(sum(m["rss"] for m in memory) / len(memory) / 1024, 1)
+        row["worker_pss_mb"] = round(sum(m["pss"] for m in memory) / len(memory) / 1024, 1)
+    return row
+
+
+def _run_load(base_url: str, seconds: float, args):
+    ctx = multiprocessing.get_context("spawn")
+    out = ctx.Queue()
+    procs = [ctx.Process(target=_load_generator, args=(base_url, seconds, args.concurrency, args.seed + i, out))
+             for i in range(args.clients)]
+    for p in procs:
+        p.start()
+    samples, errors = {}, {}
+    for _ in procs:
+        part_samples, part_errors = out.get()
+        for label, series in part_samples.items():
+            samples.setdefault(label, []).extend(series)
+        for label, count in part_errors.items():
+            errors[label] = errors.get(label, 0) + count
+    for p in procs:
+        p.join()
+    return samples, errors
+
+
+def main():
+    args = _parse_args()
+    scratch = tempfile.mkdtemp(prefix="bench-scaling-")
+
+    rows = [_measure(n, args, scratch) for n in sorted(set(args.workers))]
+    base = rows[0]["throughput_rps"] or 1.0
+
+    print(f"\n{os.cpu_count()} cores, {args.clients} load generators x {args.concurrency} in flight, {args.seconds:.0f}s per run")
+    print(f"{'workers':>8}{'req/s':>10}{'speedup':>9}{'eff.':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err':>6}{'RSS MB':>9}{'PSS MB':>9}")
+    for row in rows:
+        row["speedup"] = round(row["throughput_rps"] / base, 2)
+        row["efficiency"] = round(row["speedup"] / (row["workers"] / rows[0]["workers"]), 2)
+        print(f"{row['workers']:>8}{row['throughput_rps']:>10.1f}{row['speedup']:>9.2f}{row['efficiency']:>7.2f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['errors']:>6}"
+              f"{row.get('worker_rss_mb', 0):>9.1f}{row.get('worker_pss_mb', 0):>9.1f}")
+
+    if not args.no_save:
+        metrics = {f"workers={row['workers']}": row for row in rows}
+        metrics["overall"] = {"cores": os.cpu_count(), "max_speedup": max(row["speedup"] for row in rows)}
+        config = {k: v for k, v in vars(args).items() if k != "no_save"}
+        results.save("scaling", metrics, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# benchmarks/bench_startup.py
+"""
+Cold-start cost of the backend, each sample in a fresh Python process:
+
+- import:  time to `import app.main`, and which heavy libraries that already pulled in
+           (Firebase, the Gemini SDK and pandas should load lazily or in the startup warm-up).
+- app.main served by uvicorn with no Firebase credentials: time from spawn to the first
+           `/` (liveness) answer and latency of the first compute-only request.
+- fake_app (benchmarks/fake_app.py, local Firestore/Storage/Gemini stand-ins): time to
+           liveness, time until `/ready` reports every component warm, and the first and
+           second `/chat` latencies. The stand-ins import the Firebase and Gemini SDKs up front
+           in order to patch them, so liveness here is slower than for app.main.
+
+Reports medians over `--runs`. Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    pip install -r requirements-dev.txt   # adds httpx, the HTTP client used here
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks import results
+from benchmarks.bench_scaling import BACKEND_DIR, _free_port
+
+HEAVY_MODULES = ("firebase_admin", "google.generativeai", "pandas", "pypdf")
+
+IMPORT_SNIPPET = f"""
+import json, sys, time
+started = time.perf_counter()
+import app.main
+print(json.dumps({{"seconds": time.perf_counter() - started,
+                  "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement")
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for liveness / readiness")
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    return parser.parse_args()
+
+
+def _env(scratch: str) -> dict:
+    env = dict(os.environ, GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "benchmark"),
+               CONTENT_CACHE_PATH=os.path.join(scratch, "cache.sqlite3"),
+               JOB_SPOOL_DIR=os.path.join(scratch, "jobs"), PYTHONDONTWRITEBYTECODE="1")
+    env.pop("FIREBASE_CREDENTIALS", None)
+    return env
+
+
+def _measure_import(scratch: str) -> dict:
+    out = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], cwd=BACKEND_DIR, env=_env(scratch),
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _wait_for(client, path: str, started: float, timeout: float, process) -> float:
+    """Seconds from `started` until GET `path` answers 200."""
+    import httpx
+    while time.perf_counter() - started < timeout:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with {process.returncode}")
+        try:
+            if client.get(path).status_code == 200:
+                return time.perf_counter() - started
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.005)
+    raise RuntimeError(f"{path} not ready after {timeout}s")
+
+
+def _timed_post(client, path: str, payload: dict) -> float:
+    started = time.perf_counter()
+    response = client.post(path, json=payload)
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def _measure_server(target: str, scratch: str, timeout: float) -> dict:
+    import httpx
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=_env(scratch), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    row = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            row["live_ms"] = _wait_for(client, "/", started, timeout, process)
+            sweep = {"principals": [1e6, 5e6], "rates_of_interest": [8.5, 9.0], "tenure_years": [10, 20]}
+            row["first_emi_sweep_ms"] = _timed_post(client, "/loan/emi-sweep", sweep)
+            if target.startswith("benchmarks."):
+                row["ready_ms"] = _wait_for(client, "/ready", started, timeout, process)
+                chat = {"user_id": "startup", "session_id": "startup", "message": "What is the best home loan rate?"}
+                row["first_chat_ms"] = _timed_post(client, "/chat", chat)
+                row["second_chat_ms"] = _timed_post(client, "/chat", chat)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return row
+
+
+def _medians(samples: list) -> dict:
+    # Samples are in seconds
+    return {key: round(statistics.median(s[key] for s in samples) * 1000, 1) for key in samples[0]}
+
+
+def main():
+    args = _parse_args()
+    scratch = tempfile.mkdtemp(prefix="bench-startup-")
+
+    imports = [_measure_import(scratch) for _ in range(args.runs)]
+    metrics = {
+        "import": {"import_app_main_ms": round(statistics.median(s["seconds"] for s in imports) * 1000, 1),
+                   "heavy_modules_loaded": imports[-1]["loaded"]},
+        "app.main": _medians([_measure_server("app.main:app", scratch, args.timeout) for _ in range(args.runs)]),
+        "fake_app": _medians([_measure_server("benchmarks.fake_app:app", scratch, args.timeout) for _ in range(args.runs)]),
+    }
+
+    print(f"\nMedian of {args.runs} fresh processes (ms; live and ready are counted from process spawn)")
+    print(f"import app.main: {metrics['import']['import_app_main_ms']:.1f} ms, "
+          f"heavy modules loaded at import: {metrics['import']['heavy_modules_loaded'] or 'none'}")
+    for name in ("app.main", "fake_app"):
+        print(f"{name:<10}" + "".join(f"  {key[:-3]} {value:.1f}" for key, value in metrics[name].items()))
+
+    if not args.no_save:
+        config = {k: v for k, v in vars(args).items() if k != "no_save"}
+        results.save("startup", metrics, config)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_tools.py
+"""
+Micro-benchmarks for every tool the agent exposes (app/tools/*), called directly with
+representative arguments. Firestore-backed tools run against the in-memory fake with zero
+latency, so only our own code is measured. Results are stored per commit (see benchmarks/results.py).
+
+Usage (from backend/):
+    python -m benchmarks.bench_tools [--seconds 0.5]
+"""
+import argparse
+import time
+
+from benchmarks import fakes, results
+
+# One representative call per tool; a tool missing here fails the run so the suite stays complete
+SAMPLE_ARGS = {
+    "calculate_loan_emi": {"principal": 5000000, "rate_of_interest": 8.5, "tenure_years": 20},
+    "calculate_emi_sweep": {"principals": [3000000, 4000000, 5000000], "rates_of_interest": [8, 8.5, 9, 9.5, 10], "tenure_years": [10, 15, 20, 25, 30]},
+    "generate_amortization_schedule": {"principal": 5000000, "rate_of_interest": 8.5, "tenure_years": 30, "granularity": "monthly"},
+    "calculate_sip": {"monthly_investment": 15000, "rate_of_interest": 12, "years": 15},
+    "calculate_fd": {"principal": 500000, "rate_of_interest": 7.1, "years": 5},
+    "check_loan_eligibility": {"monthly_salary": 90000, "current_emis": 10000, "requested_loan_amount": 4000000, "tenure_years": 20, "rate_of_interest": 8.5},
+    "find_max_eligible_loan": {"monthly_salary": 160000, "current_emis": 15000},
+    "query_best_loan_offers": {"loan_amount": 6000000},
+    "check_bank_health": {"bank_name": "State Bank of India"},
+    "submit_kyc_application": {"full_name": "Asha Verma", "pan_number": "ABCPE1234F", "aadhaar_number": "234567890124", "mobile": "9876543210", "dob": "12-04-1990"},
+    "update_application": {"title": "Home Loan Request", "application_type": "Home Loan", "amount": 6000000},
+}
+
+
+def _bench(fn, kwargs: dict, seconds: float) -> dict:
+    fn(**kwargs)  # warm-up (lazy loads, caches)
+    samples = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline or len(samples) < 20:
+        started = time.perf_counter_ns()
+        fn(**kwargs)
+        samples.append(time.perf_counter_ns() - started)
+    samples.sort()
+    total_s = sum(samples) / 1e9
+    return {
+        "calls": len(samples),
+        "p50_us": round(samples[len(samples) // 2] / 1000, 2),
+        "p99_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] / 1000, 2),
+        "calls_per_s": round(len(samples) / total_s, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=0.5, help="time spent per tool")
+    parser.add_argument("--no-save", action="store_true", help="don't write benchmarks/results")
+    args = parser.parse_args()
+
+    fakes.LATENCY.update(store_ms=0.0)
+    fakes.install()
+
+    from app.agent import all_tools
+    from app.context import set_chat_context
+    set_chat_context("bench-user", "bench-session")
+
+    missing = [fn.__name__ for fn in all_tools if fn.__name__ not in SAMPLE_ARGS]
+    if missing:
+        raise SystemExit(f"No SAMPLE_ARGS for: {', '.join(missing)}")
+
+    metrics = {}
+    print(f"{'tool':<34}{'calls':>9}{'p50 us':>11}{'p99 us':>11}{'calls/s':>14}")
+    for fn in all_tools:
+        row = _bench(fn, SAMPLE_ARGS[fn.__name__], args.seconds)
+        metrics[fn.__name__] = row
+        print(f"{fn.__name__:<34}{row['calls']:>9}{row['p50_us']:>11.2f}{row['p99_us']:>11.2f}{row['calls_per_s']:>14,.1f}")
+
+    if not args.no_save:
+        results.save("tools", metrics, {"seconds": args.seconds})
+
+
+if __name__ == "__main__":
+    main()
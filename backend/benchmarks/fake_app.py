@@ -0,0 +1,21 @@
+# benchmarks/fake_app.py
+"""
+The FastAPI app with the local Firestore/Storage/Gemini stand-ins installed, for serving under
+a real multi-process server (`gunicorn -c gunicorn.conf.py benchmarks.fake_app:app`).
+Each worker imports this after the fork. Latencies come from BENCH_<NAME> env vars
+(e.g. BENCH_MODEL_MS=20), defaulting to fakes.LATENCY.
+"""
+import os
+
+from benchmarks import fakes
+from benchmarks.traces import scripts
+
+for _name, _default in fakes.LATENCY.items():
+    _value = os.getenv(f"BENCH_{_name.upper()}")
+    if _value is not None:
+        fakes.LATENCY[_name] = type(_default)(float(_value))
+
+fakes.install()
+fakes.SCRIPTS.update(scripts())
+
+from app.main import app  # noqa: E402
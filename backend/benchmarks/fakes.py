@@ -0,0 +1,319 @@
+# benchmarks/fakes.py
+"""
+Local stand-ins for Firestore, Firebase Storage and Gemini, so the FastAPI app can be
+benchmarked without credentials or network.
+
+`install()` must run before anything under `app` is imported. The Firebase and Gemini clients
+are built lazily (`app.memory.db`, `app.main.agent`), but the startup warm-up builds them as
+soon as the app starts, and the model dispatcher quota and content-cache path it sets in the
+environment are read at import. It patches the SDK seams the app uses: `firebase_admin._apps`,
+`firestore.client`, `storage.bucket` and `genai.GenerativeModel`. Latencies are read from
+`LATENCY` at call time, so they can be changed between runs.
+
+The Gemini stub is scripted by user message: `SCRIPTS[message] = {"tools": [[name, args], ...],
+"reply": text}` makes the model request each tool (one per round) and then stream `reply`.
+Unscripted messages get a plain reply.
+"""
+import os
+import time
+import uuid
+import random
+import asyncio
+import tempfile
+import threading
+
+LATENCY = {
+    "store_ms": 5.0,         # each Firestore/Storage round trip (blocking, like the real SDK)
+    "model_ms": 300.0,       # Gemini time to first chunk
+    "token_ms": 15.0,        # between streamed chunks
+    "reply_chunks": 8,       # chunks a reply is streamed in
+    "ocr_ms": 1500.0,        # Vision OCR / audit call
+    "jitter": 0.1,           # +/- fraction applied to every delay
+}
+
+SCRIPTS = {}
+
+
+def _delay_s(key: str) -> float:
+    base = LATENCY[key] / 1000.0
+    return max(0.0, base * random.uniform(1 - LATENCY["jitter"], 1 + LATENCY["jitter"]))
+
+
+# --- Firestore ---
+class FakeSnapshot:
+    def __init__(self, doc_id: str, data: dict):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, store, path: str):
+        self.store = store
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str):
+        return FakeQuery(self.store, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, **kwargs):
+        self.store.round_trip()
+        data = self.store.read(self.path)
+        if data is not None and field_paths is not None:
+            data = {k: v for k, v in data.items() if k in field_paths}
+        return FakeSnapshot(self.id, data)
+
+    def set(self, data: dict, merge: bool = False):
+        self.store.round_trip()
+        self.store.write(self.path, data, merge)
+
+    def update(self, data: dict):
+        self.store.round_trip()
+        self.store.write(self.path, data, merge=True)
+
+
+class FakeQuery:
+    def __init__(self, store, path: str, order=None, cursor=None, limit=None, fields=None, end=None):
+        self.store = store
+        self.path = path
+        self._order, self._cursor, self._limit, self._fields, self._end = order, cursor, limit, fields, end
+
+    def _with(self, **changes):
+        state = dict(order=self._order, cursor=self._cursor, limit=self._limit, fields=self._fields, end=self._end)
+        state.update(changes)
+        return FakeQuery(self.store, self.path, **state)
+
+    def document(self, doc_id: str = None):
+        return FakeDocument(self.store, f"{self.path}/{doc_id or uuid.uuid4().hex[:20]}")
+
+    def select(self, fields):
+        return self._with(fields=set(fields))
+
+    def order_by(self, field: str, direction=None):
+        return self._with(order=(field, direction == "DESCENDING"))
+
+    def start_after(self, values: dict):
+        return self._with(cursor=values)
+
+    def end_before(self, values: dict):
+        return self._with(end=values)
+
+    def limit(self, n: int):
+        return self._with(limit=n)
+
+    def stream(self):
+        self.store.round_trip()
+        docs = self.store.children(self.path)
+        if self._order:
+            field, descending = self._order
+            docs.sort(key=lambda d: d[1].get(field), reverse=descending)
+            if self._cursor is not None:
+                bound = self._cursor[field]
+                docs = [d for d in docs if (d[1].get(field) < bound if descending else d[1].get(field) > bound)]
+            if self._end is not None:
+                bound = self._end[field]
+                docs = [d for d in docs if (d[1].get(field) > bound if descending else d[1].get(field) < bound)]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        for doc_id, data in docs:
+            if self._fields is not None:
+                data = {k: v for k, v in data.items() if k in self._fields}
+            yield FakeSnapshot(doc_id, data)
+
+
+class FakeBatch:
+    def __init__(self, store):
+        self.store = store
+        self.ops = []
+
+    def set(self, ref, data: dict, merge: bool = False):
+        self.ops.append((ref.path, data, merge))
+
+    def commit(self):
+        self.store.round_trip()
+        for path, data, merge in self.ops:
+            self.store.write(path, data, merge)
+
+
+class FakeFirestore:
+    """Dict-backed Firestore covering the calls made in app/ (documents, subcollections, batches, projections)."""
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+        self.round_trips = 0
+
+    def round_trip(self):
+        self.round_trips += 1
+        time.sleep(_delay_s("store_ms"))
+
+    def read(self, path: str):
+        with self.lock:
+            data = self.docs.get(path)
+            return dict(data) if data is not None else None
+
+    def write(self, path: str, data: dict, merge: bool):
+        from firebase_admin import firestore
+        with self.lock:
+            current = dict(self.docs.get(path) or {}) if merge else {}
+            for key, value in data.items():
+                if value is firestore.DELETE_FIELD:
+                    current.pop(key, None)
+                elif isinstance(value, firestore.Increment):
+                    current[key] = current.get(key, 0) + value.value
+                elif isinstance(value, firestore.ArrayUnion):
+                    current[key] = list(current.get(key, [])) + [v for v in value.values if v not in current.get(key, [])]
+                else:
+                    current[key] = value
+            self.docs[path] = current
+
+    def children(self, path: str) -> list:
+        prefix = path + "/"
+        with self.lock:
+            return [(p[len(prefix):], dict(d)) for p, d in self.docs.items()
+                    if p.startswith(prefix) and "/" not in p[len(prefix):]]
+
+    def collection(self, name: str):
+        return FakeQuery(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def get_all(self, refs):
+        self.round_trip()
+        return [FakeSnapshot(ref.id, self.read(ref.path)) for ref in refs]
+
+
+# --- Storage ---
+class FakeBlob:
+    def __init__(self, bucket, name: str):
+        self.bucket = bucket
+        self.name = name
+
+    def upload_from_string(self, data: bytes, content_type: str = None):
+        time.sleep(_delay_s("store_ms"))
+        self.bucket.objects[self.name] = len(data)
+
+
+class FakeBucket:
+    def __init__(self):
+        self.objects = {}
+
+    def blob(self, name: str):
+        return FakeBlob(self, name)
+
+
+# --- Gemini ---
+def _query_text(contents) -> tuple:
+    """(latest user query, tool rounds already answered after it) from a contents list."""
+    from google.generativeai import protos
+    rounds = 0
+    for item in reversed(contents):
+        if isinstance(item, protos.Content):
+            if item.role == "user":
+                rounds += 1
+            continue
+        text = item["parts"][0] if isinstance(item, dict) else str(item)
+        return text.split("USER_QUERY:")[-1].strip(), rounds
+    return "", rounds
+
+
+class _Chunk:
+    def __init__(self, parts):
+        from google.generativeai import protos
+        self.candidates = [protos.Candidate(content=protos.Content(role="model", parts=parts))]
+
+    @property
+    def text(self):
+        return "".join(p.text for p in self.candidates[0].content.parts)
+
+
+class _Stream:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def _iterate(self):
+        for i, chunk in enumerate(self.chunks):
+            if i:
+                await asyncio.sleep(_delay_s("token_ms"))
+            yield chunk
+
+    def __aiter__(self):
+        return self._iterate()
+
+
+class FakeGenerativeModel:
+    """Scripted `genai.GenerativeModel`: tool calls and replies come from SCRIPTS, timing from LATENCY."""
+
+    calls = 0
+
+    def __init__(self, model_name: str = None, tools=None, system_instruction=None, **kwargs):
+        self.model_name = model_name
+        self.tools = tools
+
+    def _chunks(self, contents) -> list:
+        from google.generativeai import protos
+        query, rounds = _query_text(contents)
+        script = SCRIPTS.get(query, {})
+        tools = script.get("tools", [])
+        if self.tools and rounds < len(tools):
+            name, args = tools[rounds]
+            return [_Chunk([protos.Part(function_call=protos.FunctionCall(name=name, args=args))])]
+
+        reply = script.get("reply") or f"Here is what I found about: {query[:60]}"
+        n = max(1, LATENCY["reply_chunks"])
+        step = -(-len(reply) // n)
+        return [_Chunk([protos.Part(text=reply[i:i + step])]) for i in range(0, len(reply), step)]
+
+    async def generate_content_async(self, contents, stream: bool = False, **kwargs):
+        FakeGenerativeModel.calls += 1
+        await asyncio.sleep(_delay_s("model_ms"))
+        if isinstance(contents, str):
+            return _Chunk([_text_part("- Summary of the conversation so far.")])
+        chunks = self._chunks(contents)
+        if stream:
+            return _Stream(chunks)
+        return _Chunk([p for c in chunks for p in c.candidates[0].content.parts])
+
+    def generate_content(self, contents, **kwargs):
+        # Vision OCR / audit: [prompt, {"mime_type", "data"}]
+        FakeGenerativeModel.calls += 1
+        time.sleep(_delay_s("ocr_ms"))
+        prompt = contents[0] if isinstance(contents, list) else str(contents)
+        if "=== PAGE" in prompt:
+            return _Chunk([_text_part("=== PAGE 1 ===\nScanned page text. Interest rate 9.5% floating. Prepayment penalty 2%.")])
+        if "Legal Risk" in prompt:
+            return _Chunk([_text_part('{"doc_type": "Loan Agreement", "risk_level": "Med", "summary": "Stub audit.", "flagged_clauses": []}')])
+        return _Chunk([_text_part("Loan agreement. Interest rate 9.5% floating. Prepayment penalty 2%. " * 20)])
+
+
+def _text_part(text: str):
+    from google.generativeai import protos
+    return protos.Part(text=text)
+
+
+def install(rpm: float = 1_000_000, max_concurrency: int = 64) -> dict:
+    """
+    Patches Firebase/Gemini before the app is imported. Returns the fakes.
+    The dispatcher is opened up (`rpm`, `max_concurrency`) unless a quota is being simulated.
+    """
+    os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+    os.environ.setdefault("CONTENT_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-cache-"), "cache.sqlite3"))
+    os.environ["GEMINI_RPM"] = str(rpm)
+    os.environ["GEMINI_BURST"] = str(int(min(rpm, 1_000_000)))
+    os.environ["GEMINI_MAX_CONCURRENCY"] = str(max_concurrency)
+
+    import firebase_admin
+    from firebase_admin import firestore, storage
+    import google.generativeai as genai
+
+    db, bucket = FakeFirestore(), FakeBucket()
+    firebase_admin._apps.setdefault("[DEFAULT]", object())
+    firestore.client = lambda *args, **kwargs: db
+    storage.bucket = lambda *args, **kwargs: bucket
+    genai.configure = lambda *args, **kwargs: None
+    genai.GenerativeModel = FakeGenerativeModel
+    return {"db": db, "bucket": bucket}
@@ -0,0 +1,84 @@
+# benchmarks/results.py
+"""
+Stores benchmark results per commit (benchmarks/results/<suite>/<sha>.json) and compares a run
+with the newest result recorded for an ancestor commit, so regressions show up between commits.
+"""
+import os
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def _git(*args) -> str:
+    try:
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(__file__)).stdout.strip()
+    except Exception:
+        return ""
+
+
+def current_revision() -> str:
+    sha = _git("rev-parse", "--short=10", "HEAD") or "unknown"
+    dirty = _git("status", "--porcelain", "--untracked-files=no")
+    return f"{sha}-dirty" if dirty else sha
+
+
+def _previous(suite: str, revision: str):
+    folder = os.path.join(RESULTS_DIR, suite)
+    if not os.path.isdir(folder):
+        return None
+    for sha in _git("rev-list", "--max-count=500", "HEAD").split():
+        for name in (sha[:10], f"{sha[:10]}-dirty"):
+            if name == revision:
+                continue
+            path = os.path.join(folder, f"{name}.json")
+            if os.path.exists(path):
+                with open(path) as f:
+                    return json.load(f)
+    return None
+
+
+def save(suite: str, metrics: dict, config: dict = None) -> str:
+    """
+    `metrics` is {group: {metric: number}}. Writes the result file, prints the comparison
+    with the previous commit's run and returns the file path.
+    """
+    revision = current_revision()
+    result = {
+        "suite": suite,
+        "revision": revision,
+        "recorded_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "config": config or {},
+        "metrics": metrics,
+    }
+    previous = _previous(suite, revision)
+
+    os.makedirs(os.path.join(RESULTS_DIR, suite), exist_ok=True)
+    path = os.path.join(RESULTS_DIR, suite, f"{revision}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    if previous:
+        compare(previous, result)
+    print(f"\nSaved {os.path.relpath(path)}")
+    return path
+
+
+def compare(previous: dict, current: dict):
+    print(f"\nvs {previous['revision']} ({previous['recorded_at']}):")
+    if previous.get("config") != current.get("config"):
+        print("  (config differs - deltas are indicative only)")
+    for group, metrics in current["metrics"].items():
+        before = previous["metrics"].get(group, {})
+        for name, value in metrics.items():
+            old = before.get(name)
+            if not isinstance(old, (int, float)) or not isinstance(value, (int, float)) or not old:
+                continue
+            delta = (value - old) / old * 100
+            print(f"  {group:<32} {name:<14} {old:>12.2f} -> {value:>12.2f}  ({delta:+6.1f}%)")
@@ -0,0 +1,97 @@
+# benchmarks/traces.py
+"""
+Multi-turn conversation traces replayed by bench_e2e. Each turn scripts the stub model:
+the tools it calls (in order, one per round) and the reply it streams afterwards.
+"""
+
+HOME_LOAN = [
+    {
+        "message": "Hi, I want to buy a flat in Pune next year.",
+        "tools": [],
+        "reply": "Hi, I'm Raj, your loan advisor. Congratulations on planning your home! What budget are you looking at?",
+    },
+    {
+        "message": "Around 60 lakhs. What would the EMI be for 20 years at 8.5%?",
+        "tools": [["calculate_loan_emi", {"principal": 6000000, "rate_of_interest": 8.5, "tenure_years": 20}]],
+        "reply": "For Rs 60,00,000 at 8.5% over 20 years, your EMI is about Rs 52,069 per month.",
+    },
+    {
+        "message": "Which banks give the best rates for that amount?",
+        "tools": [["query_best_loan_offers", {"loan_amount": 6000000}]],
+        "reply": "The cheapest options right now are listed above, sorted by interest rate.",
+    },
+    {
+        "message": "I earn 1.6 lakh a month and pay 15k in EMIs. How much can I borrow?",
+        "tools": [["find_max_eligible_loan", {"monthly_salary": 160000, "current_emis": 15000}]],
+        "reply": "Based on a 50% FOIR, you can borrow up to the amounts shown for each bank and tenure.",
+    },
+    {
+        "message": "Great, start a home loan application for 60 lakhs.",
+        "tools": [["update_application", {"title": "Home Loan Request", "application_type": "Home Loan", "amount": 6000000}]],
+        "reply": "Done! I've opened a Home Loan application for Rs 60 lakhs. Next, Sam will verify your KYC.",
+    },
+]
+
+INVESTOR = [
+    {
+        "message": "If I put 15000 a month into a SIP for 15 years at 12%, what do I get?",
+        "tools": [["calculate_sip", {"monthly_investment": 15000, "rate_of_interest": 12, "years": 15}]],
+        "reply": "Your SIP would grow to roughly Rs 75.7 lakhs, of which Rs 27 lakhs is your investment.",
+    },
+    {
+        "message": "And a 5 lakh FD for 5 years at 7.1%?",
+        "tools": [["calculate_fd", {"principal": 500000, "rate_of_interest": 7.1, "years": 5}]],
+        "reply": "That FD would mature at about Rs 7.1 lakhs.",
+    },
+    {
+        "message": "Is HDFC a safe bank to keep it in?",
+        "tools": [["check_bank_health", {"bank_name": "HDFC"}]],
+        "reply": "HDFC Bank's capital adequacy and NPA figures are shown above; it is rated low risk.",
+    },
+]
+
+KYC = [
+    {
+        "message": "I'd like to complete my KYC.",
+        "tools": [],
+        "reply": "Hi, I'm Sam from Verification. Please share your full name, PAN, Aadhaar, mobile and date of birth.",
+    },
+    {
+        "message": "Asha Verma, ABCPE1234F, 234567890124, 9876543210, 12-04-1990",
+        "tools": [["submit_kyc_application", {
+            "full_name": "Asha Verma", "pan_number": "ABCPE1234F", "aadhaar_number": "234567890124",
+            "mobile": "9876543210", "dob": "12-04-1990",
+        }]],
+        "reply": "Your KYC application has been received. Our team will verify it shortly.",
+    },
+]
+
+COMPARE = [
+    {
+        "message": "Compare EMIs for 30, 40 and 50 lakhs at 8 to 10% over 15 and 20 years.",
+        "tools": [["calculate_emi_sweep", {
+            "principals": [3000000, 4000000, 5000000], "rates_of_interest": [8, 8.5, 9, 9.5, 10], "tenure_years": [15, 20],
+        }]],
+        "reply": "Here is the full EMI comparison table.",
+    },
+    {
+        "message": "Show me the yearly schedule for 40 lakhs at 8.5% over 20 years.",
+        "tools": [["generate_amortization_schedule", {"principal": 4000000, "rate_of_interest": 8.5, "tenure_years": 20}]],
+        "reply": "Here is your year-by-year repayment schedule.",
+    },
+    {
+        "message": "Can I afford it on 90k salary with no other EMIs?",
+        "tools": [["check_loan_eligibility", {
+            "monthly_salary": 90000, "current_emis": 0, "requested_loan_amount": 4000000, "tenure_years": 20, "rate_of_interest": 8.5,
+        }]],
+        "reply": "Yes - the EMI is within 50% of your salary, so you are eligible.",
+    },
+]
+
+TRACES = {"home_loan": HOME_LOAN, "investor": INVESTOR, "kyc": KYC, "compare": COMPARE}
+
+
+def scripts() -> dict:
+    """SCRIPTS entries for the Gemini stub, keyed by user message."""
+    return {turn["message"]: {"tools": turn["tools"], "reply": turn["reply"]}
+            for trace in TRACES.values() for turn in trace}
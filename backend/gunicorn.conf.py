@@ -0,0 +1,42 @@
+# gunicorn.conf.py
+# Multi-process serving: `gunicorn -c gunicorn.conf.py app.main:app` (see Procfile).
+# The master preloads the read-only reference data (app/preload.py) and forks the workers,
+# which share it copy-on-write; each worker then imports app.main and opens its own
+# Firebase / Gemini clients.
+import gc
+import math
+import os
+import multiprocessing
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Chat turns and document jobs can take a while; shutdown flushes buffered chat writes
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then (bounds slow leaks); jittered so they don't restart together
+max_requests = int(os.getenv("MAX_REQUESTS", "5000"))
+max_requests_jitter = max_requests // 10
+
+
+def _split(name: str, default: float, minimum: float = 1):
+    # The Gemini quota is per API key, so each worker gets its share (set before anything reads it)
+    total = float(os.getenv(name, str(default)))
+    os.environ[name] = str(max(minimum, math.floor(total / workers)))
+
+
+_split("GEMINI_RPM", 60)
+_split("GEMINI_BURST", 10)
+_split("GEMINI_MAX_CONCURRENCY", 8)
+
+
+def on_starting(server):
+    from app.preload import preload
+    summary = preload()
+    # Move everything loaded so far out of the GC's reach: collections would otherwise touch
+    # (and un-share) every preloaded object's page in every worker
+    gc.freeze()
+    server.log.info(f"Preloaded reference data for {workers} workers: {summary}")
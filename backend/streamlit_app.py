@@ -2,11 +2,33 @@
 import streamlit as st
 import requests
 import json
+import time
 
 # --- CONFIGURATION ---
 API_URL = "http://127.0.0.1:8000"
 st.set_page_config(page_title="FinBot Banking Assistant", page_icon="🏦", layout="wide")
 
+# Longest we poll a job before giving up (a long PDF audit takes a few minutes)
+JOB_TIMEOUT = 600
+
+def wait_for_job(job_id, status=None, interval=1.0, timeout=JOB_TIMEOUT):
+    """Polls a background upload/audit job until it finishes; returns (ok, result or error text)."""
+    deadline = time.monotonic() + timeout
+    while True:
+        if time.monotonic() > deadline:
+            return False, "Document processing is taking too long. Please try again."
+        res = requests.get(f"{API_URL}/jobs/{job_id}")
+        if res.status_code != 200:
+            return False, res.json().get("detail", "Job not found")
+        job = res.json()
+        if status is not None:
+            status.write(job.get("stage", ""))
+        if job["status"] == "done":
+            return True, job["result"]
+        if job["status"] == "failed":
+            return False, job.get("error", "Job failed")
+        time.sleep(interval)
+
 # --- SESSION STATE INITIALIZATION ---
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -67,12 +89,15 @@ with st.sidebar:
             with st.spinner("Reading document..."):
                 files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
                 try:
-                    res = requests.post(f"{API_URL}/upload-doc", files=files)
-                    if res.status_code == 200:
-                        data = res.json()
-                        st.session_state.current_doc_id = data["doc_id"]
-                        st.success("Document Context Created!")
-                        st.caption(f"ID: {data['doc_id']}")
+                    res = requests.post(f"{API_URL}/upload-doc", files=files, data={"user_id": st.session_state.user_id})
+                    if res.status_code == 202:
+                        ok, data = wait_for_job(res.json()["job_id"], status=st.empty())
+                        if ok:
+                            st.session_state.current_doc_id = data["doc_id"]
+                            st.success("Document Context Created!")
+                            st.caption(f"ID: {data['doc_id']}")
+                        else:
+                            st.error(f"Error: {data}")
                     else:
                         st.error(f"Error: {res.text}")
                 except Exception as e:
@@ -121,40 +146,56 @@ if mode in ["Standard Banking Chat", "Chat with Document"]:
         if mode == "Chat with Document" and st.session_state.current_doc_id:
             payload["doc_id"] = st.session_state.current_doc_id
 
-        # C. Get Bot Response
+        # C. Get Bot Response (streamed token by token via SSE)
         with st.chat_message("assistant"):
-            with st.spinner("FinBot is thinking..."):
-                try:
-                    response = requests.post(f"{API_URL}/chat", json=payload)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        
-                        # Extract Data
-                        bot_reply = data.get("response", "No text returned")
-                        agent_name = data.get("agent_used", "General Agent")
-                        process_log = data.get("process_log", "Processing...")
-
-                        # --- NEW: SIDE-BY-SIDE LAYOUT ---
-                        col_info, col_ans = st.columns([1, 3])
-                        
-                        with col_info:
-                            # Left Column: Agent Metadata
-                            st.info(f"🤖 **{agent_name}**")
-                            st.caption(f"⚙️ {process_log}")
-                        
-                        with col_ans:
-                            # Right Column: The Actual Answer
-                            st.markdown(bot_reply)
-
-                        # Save interaction to local state
-                        st.session_state.messages.append({"role": "model", "content": bot_reply})
-                    
-                    else:
-                        st.error(f"API Error {response.status_code}: {response.text}")
-                
-                except Exception as e:
-                    st.error(f"Connection Error: {e}")
+            try:
+                response = requests.post(f"{API_URL}/chat/stream", json=payload, stream=True)
+
+                if response.status_code == 200:
+                    col_info, col_ans = st.columns([1, 3])
+                    final = {}
+
+                    with col_info:
+                        # Left Column: Agent Metadata (updated live as tools run)
+                        agent_box = st.empty()
+                        agent_box.info("🤖 **FinBot Team**")
+                        log_box = st.empty()
+                        log_box.caption("⚙️ FinBot is thinking...")
+
+                    def token_stream():
+                        """Parses SSE events; yields tokens and updates the agent panel on tool events."""
+                        event_name = None
+                        for line in response.iter_lines(decode_unicode=True):
+                            if line.startswith("event: "):
+                                event_name = line[len("event: "):]
+                            elif line.startswith("data: "):
+                                data = json.loads(line[len("data: "):])
+                                if event_name == "token":
+                                    yield data["text"]
+                                elif event_name == "tool_start":
+                                    agent_box.info(f"🤖 **{data['agent']}**")
+                                    log_box.caption(f"⚙️ {data['log']}")
+                                elif event_name == "done":
+                                    final.update(data)
+                                elif event_name == "error":
+                                    st.error(f"API Error: {data['detail']}")
+
+                    with col_ans:
+                        # Right Column: The Actual Answer
+                        bot_reply = st.write_stream(token_stream())
+
+                    if final:
+                        agent_box.info(f"🤖 **{final['agent_used']}**")
+                        log_box.caption(f"⚙️ {final['process_log']}")
+
+                    # Save interaction to local state
+                    st.session_state.messages.append({"role": "model", "content": final.get("response", bot_reply)})
+
+                else:
+                    st.error(f"API Error {response.status_code}: {response.text}")
+
+            except Exception as e:
+                st.error(f"Connection Error: {e}")
 
 # ==========================================
 # MODE 2: LEGAL RISK AUDIT
@@ -170,9 +211,12 @@ elif mode == "Legal Risk Audit":
             files = {"file": (audit_file.name, audit_file, audit_file.type)}
             try:
                 res = requests.post(f"{API_URL}/analyze-doc", files=files)
+                if res.status_code == 202:
+                    ok, data = wait_for_job(res.json()["job_id"], status=st.empty())
+                else:
+                    ok, data = False, res.text
                 
-                if res.status_code == 200:
-                    data = res.json()
+                if ok:
                     analysis_text = data.get("analysis", "No analysis returned.")
                     
                     st.success("Audit Complete")
@@ -185,6 +229,6 @@ elif mode == "Legal Risk Audit":
                     st.markdown("### 📋 Analysis Report")
                     st.markdown(analysis_text)
                 else:
-                    st.error(f"Analysis Failed: {res.text}")
+                    st.error(f"Analysis Failed: {data}")
             except Exception as e:
                 st.error(f"Connection Error: {e}")
\ No newline at end of file
@@ -17,12 +17,26 @@ interface Message {
     agentName?: string;
 }
 
+// Messages fetched per /history page; older pages load on demand
+const HISTORY_PAGE_SIZE = 50;
+
+const toMessages = (history: any[], prefix: string): Message[] =>
+    history.map((msg: any, index: number): Message => ({
+        id: `hist_${prefix}_${index}`, // Ensure unique ID
+        role: msg.role === 'user' ? 'user' : 'model',
+        content: msg.content,
+        timestamp: Date.now()
+    }));
+
 function ChatContent() {
     const { user, loading } = useAuth();
     const [messages, setMessages] = useState<Message[]>([]);
     const [input, setInput] = useState('');
     const [isLoading, setIsLoading] = useState(false);
     const [isHistoryLoading, setIsHistoryLoading] = useState(true);
+    // Cursor for the page before the oldest loaded message; null once the start is reached
+    const [olderBefore, setOlderBefore] = useState<string | null>(null);
+    const [isOlderLoading, setIsOlderLoading] = useState(false);
     const [isUploading, setIsUploading] = useState(false);
     const [attachedDoc, setAttachedDoc] = useState<{ id: string; name: string } | null>(null);
     const messagesEndRef = useRef<HTMLDivElement>(null);
@@ -48,19 +62,15 @@ function ChatContent() {
 
     const loadHistory = async (uid: string, sid: string) => {
         try {
-            const data = await getHistory(uid, sid);
+            const data = await getHistory(uid, sid, HISTORY_PAGE_SIZE);
             if (data.history && Array.isArray(data.history)) {
-                const mappedMessages = data.history.map((msg: any, index: number) => ({
-                    id: `hist_${index}_${Date.now()}`, // Ensure unique ID
-                    role: msg.role === 'user' ? 'user' : 'model',
-                    content: msg.content,
-                    timestamp: Date.now()
-                }));
+                const mappedMessages = toMessages(data.history, `${Date.now()}`);
 
                 setMessages((prev) => {
                     const localMessages = prev.filter(m => !m.id.startsWith('hist_'));
                     return [...mappedMessages, ...localMessages];
                 });
+                setOlderBefore(data.next_before ?? null);
             }
         } catch (e) {
             console.error("Failed to load history:", e);
@@ -69,13 +79,32 @@ function ChatContent() {
         }
     };
 
+    const loadOlderHistory = async () => {
+        if (!user || !olderBefore || isOlderLoading) return;
+        setIsOlderLoading(true);
+        try {
+            const data = await getHistory(user.uid, sessionId, HISTORY_PAGE_SIZE, olderBefore);
+            if (data.history && Array.isArray(data.history)) {
+                const olderMessages = toMessages(data.history, `${olderBefore}`);
+                setMessages((prev) => [...olderMessages, ...prev]);
+                setOlderBefore(data.next_before ?? null);
+            }
+        } catch (e) {
+            console.error("Failed to load earlier messages:", e);
+        } finally {
+            setIsOlderLoading(false);
+        }
+    };
+
     const scrollToBottom = () => {
         messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' });
     };
 
+    // Auto-scroll when a message is added at the bottom or loading starts (not when earlier messages are prepended)
+    const lastMessageId = messages[messages.length - 1]?.id;
     useEffect(() => {
         scrollToBottom();
-    }, [messages, isLoading]); // Auto-scroll when messages change or loading starts
+    }, [lastMessageId, isLoading]);
 
     const handleFileSelect = async (e: React.ChangeEvent<HTMLInputElement>) => {
         if (!e.target.files || e.target.files.length === 0) return;
@@ -233,7 +262,20 @@ function ChatContent() {
                             </div>
                         </div>
                     ) : (
-                        messages.map((msg) => (
+                        <>
+                        {olderBefore && (
+                            <div className="flex justify-center">
+                                <button
+                                    onClick={loadOlderHistory}
+                                    disabled={isOlderLoading}
+                                    className="text-sm text-blue-600 bg-white px-4 py-2 rounded-full border border-gray-200 hover:bg-blue-50/50 transition-all flex items-center gap-2 focus:ring-2 focus:ring-blue-500 outline-none"
+                                >
+                                    {isOlderLoading && <Loader2 size={14} className="animate-spin" />}
+                                    Load earlier messages
+                                </button>
+                            </div>
+                        )}
+                        {messages.map((msg) => (
                             <div
                                 key={msg.id}
                                 className={`flex gap-4 ${msg.role === 'user' ? 'justify-end' : 'justify-start'}`}
@@ -266,7 +308,8 @@ function ChatContent() {
                                     </div>
                                 )}
                             </div>
-                        ))
+                        ))}
+                        </>
                     )}
 
                     {/* Typing Indicator */}
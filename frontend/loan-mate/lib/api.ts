@@ -49,11 +49,17 @@ export async function sendMessage(
     return response.json();
 }
 
-export async function getHistory(user_id: string, session_id?: string) {
+export async function getHistory(user_id: string, session_id?: string, limit?: number, before?: string) {
     const url = new URL(`${API_BASE_URL}/history/${user_id}`);
     if (session_id) {
         url.searchParams.append('session_id', session_id);
     }
+    if (limit) {
+        url.searchParams.append('limit', String(limit));
+    }
+    if (before) {
+        url.searchParams.append('before', before);
+    }
 
     const response = await fetch(url.toString());
 
@@ -64,7 +70,43 @@ export async function getHistory(user_id: string, session_id?: string) {
     return response.json();
 }
 
-export async function uploadDocument(file: File, user_id: string) {
+export interface JobStatus {
+    job_id: string;
+    kind: string;
+    status: 'queued' | 'running' | 'done' | 'failed';
+    stage: string;
+    result?: any;
+    error?: string;
+}
+
+// Longest we poll a job before giving up (a long PDF audit takes a few minutes)
+const JOB_TIMEOUT_MS = 10 * 60 * 1000;
+
+// Uploads and audits run as background jobs; poll until the job finishes
+export async function waitForJob(job_id: string, onProgress?: (job: JobStatus) => void, interval = 1000, timeout = JOB_TIMEOUT_MS) {
+    const deadline = Date.now() + timeout;
+    while (true) {
+        if (Date.now() > deadline) {
+            throw new Error('Document processing is taking too long. Please try again.');
+        }
+        const response = await fetch(`${API_BASE_URL}/jobs/${job_id}`);
+        if (!response.ok) {
+            throw new Error('Failed to fetch job status');
+        }
+
+        const job: JobStatus = await response.json();
+        onProgress?.(job);
+        if (job.status === 'done') {
+            return job.result;
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Document processing failed');
+        }
+        await new Promise((resolve) => setTimeout(resolve, interval));
+    }
+}
+
+export async function uploadDocument(file: File, user_id: string, onProgress?: (job: JobStatus) => void) {
     const formData = new FormData();
     formData.append('file', file);
     formData.append('user_id', user_id);
@@ -78,5 +120,6 @@ export async function uploadDocument(file: File, user_id: string) {
         throw new Error('Failed to upload document');
     }
 
-    return response.json();
+    const { job_id } = await response.json();
+    return waitForJob(job_id, onProgress);
 }